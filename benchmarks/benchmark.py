@@ -0,0 +1,235 @@
+"""
+End-to-end benchmarks of all builders on synthetic projects.
+
+Usage (from the repository root):
+
+    python benchmarks/benchmark.py --pages 500 --depth 3 --output results.json
+    python benchmarks/benchmark.py --pages 500 --depth 3 --baseline results.json
+
+Each builder runs on a freshly generated project with empty caches.
+The builders that work with a single document (all except web) build every document of the project concurrently.
+
+The results include the total wall time of each builder and the time spent in each stage,
+collected from the same spans that `sobiraka --trace` records.
+For each stage, `wall` is the time during which at least one span of this stage was running,
+while `sum` is the sum of all spans' durations, which exceeds `wall` when the spans run concurrently.
+When a baseline is given, the results are compared against it, and the exit code is 1
+if any builder became slower than allowed by `--tolerance`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+from argparse import ArgumentParser, Namespace
+from asyncio import gather, run
+from collections import defaultdict
+from dataclasses import asdict
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable
+
+from synthetic import SyntheticProject
+
+from sobiraka.models import Project
+from sobiraka.models.load import load_project
+from sobiraka.pandoc import Pandoc
+from sobiraka.processing.abstract import Builder
+from sobiraka.runtime import RT, Scheduler, Tracer
+from sobiraka.utils import AbsolutePath
+
+
+def _web(project: Project, output: AbsolutePath) -> list[Builder]:
+    from sobiraka.processing.web import WebBuilder
+    return [WebBuilder(project, output / 'web')]
+
+
+def _pdf(project: Project, output: AbsolutePath) -> list[Builder]:
+    from sobiraka.processing.weasyprint import WeasyPrintBuilder
+    return [WeasyPrintBuilder(document, output / f'weasyprint-{i}.pdf') for i, document in enumerate(project.documents)]
+
+
+def _latex(project: Project, output: AbsolutePath) -> list[Builder]:
+    from sobiraka.processing.latex import LatexBuilder
+    return [LatexBuilder(document, output / f'latex-{i}.pdf') for i, document in enumerate(project.documents)]
+
+
+def _markdown(project: Project, output: AbsolutePath) -> list[Builder]:
+    from sobiraka.processing.markdown import MarkdownBuilder
+    return [MarkdownBuilder(document, output / f'markdown-{i}') for i, document in enumerate(project.documents)]
+
+
+def _prover(project: Project, _: AbsolutePath) -> list[Builder]:
+    from sobiraka.prover import Prover
+    return [Prover(document) for document in project.documents]
+
+
+BUILDERS: dict[str, Callable[[Project, AbsolutePath], list[Builder]]] = {
+    'web': _web,
+    'pdf': _pdf,
+    'latex': _latex,
+    'markdown': _markdown,
+    'prover': _prover,
+}
+
+
+async def benchmark_builder(name: str, spec: SyntheticProject, *, jobs: int | None) -> dict[str, Any]:
+    """
+    Generate the project in a temporary directory, build it with the given builder and return the timings.
+    """
+    with TemporaryDirectory(prefix='sobiraka-benchmark-') as temp_dir:
+        temp_dir = AbsolutePath(temp_dir)
+        manifest_path = spec.write(temp_dir / 'project')
+
+        RT.TMP = temp_dir / 'tmp'
+        RT.SCHEDULER = Scheduler(jobs)
+        RT.TRACER = Tracer()
+        RT.TRACER.start()
+
+        result: dict[str, Any] = {}
+        start = perf_counter()
+        try:
+            project = load_project(manifest_path)
+            builders = BUILDERS[name](project, temp_dir / 'output')
+            exit_codes = await gather(*(RT.run_isolated(builder.run()) for builder in builders))
+            result['exit_code'] = max(exit_code or 0 for exit_code in exit_codes)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            result['error'] = f'{exc.__class__.__name__}: {exc}'
+        finally:
+            # The caches live in the temporary directory, which is about to be deleted
+            RT.close_caches()
+            RT.TMP = None
+        result['total'] = perf_counter() - start
+
+        spans: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for event in RT.TRACER.events:
+            if event['ph'] == 'X':
+                spans[event['name']].append((event['ts'], event['ts'] + event['dur']))
+        result['stages'] = {stage: dict(wall=_wall_time(intervals), sum=_sum_time(intervals))
+                            for stage, intervals in sorted(spans.items())}
+
+        return result
+
+
+def _wall_time(intervals: list[tuple[int, int]]) -> float:
+    """
+    Return the length of the union of the given intervals (in microseconds), in seconds.
+    """
+    total = 0
+    end = None
+    for interval_start, interval_end in sorted(intervals):
+        if end is None or interval_start > end:
+            total += interval_end - interval_start
+            end = interval_end
+        elif interval_end > end:
+            total += interval_end - end
+            end = interval_end
+    return total / 1_000_000
+
+
+def _sum_time(intervals: list[tuple[int, int]]) -> float:
+    return sum(interval_end - interval_start for interval_start, interval_end in intervals) / 1_000_000
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], *, tolerance: float) -> list[str]:
+    """
+    Return a list of human-readable descriptions of the builders that became slower than the baseline allows.
+    """
+    regressions: list[str] = []
+    if results['project'] != baseline['project']:
+        print('Warning: the baseline was measured on a different project.', file=sys.stderr)
+
+    for name, result in results['builders'].items():
+        old = baseline['builders'].get(name)
+        if old is None or 'error' in old or 'error' in result:
+            continue
+        ratio = result['total'] / old['total']
+        print(f'{name}: {old["total"]:.2f}s → {result["total"]:.2f}s ({ratio - 1:+.0%})', file=sys.stderr)
+        if ratio > 1 + tolerance:
+            regressions.append(f'{name} is {ratio - 1:.0%} slower than the baseline')
+    return regressions
+
+
+async def async_main(args: Namespace) -> int:
+    RT.PANDOC = Pandoc(args.pandoc_workers)
+
+    spec = SyntheticProject(pages=args.pages,
+                            depth=args.depth,
+                            fanout=args.fanout,
+                            links=args.links,
+                            headers=args.headers,
+                            code_blocks=args.code_blocks,
+                            images=args.images,
+                            languages=tuple(args.languages.split(',')),
+                            nav=args.nav,
+                            seed=args.seed)
+
+    results: dict[str, Any] = dict(
+        sobiraka=RT.VERSION,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        project=asdict(spec),
+        builders={},
+    )
+
+    for name in args.builders.split(','):
+        runs = [await benchmark_builder(name, spec, jobs=args.jobs) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r['total'])
+        results['builders'][name] = best
+        status = best.get('error') or f'exit code {best["exit_code"]}'
+        print(f'{name}: {best["total"]:.2f}s ({status})', file=sys.stderr)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+def main():
+    defaults = SyntheticProject()
+
+    parser = ArgumentParser(description='Benchmark Sobiraka builders on a synthetic project.')
+    parser.add_argument('--builders', default=','.join(BUILDERS),
+                        help=f'Comma-separated list of builders to run (default: {",".join(BUILDERS)}).')
+    parser.add_argument('--repeat', metavar='N', type=int, default=1, help='Run each builder N times, keep the best.')
+    parser.add_argument('--jobs', metavar='N', type=int)
+    parser.add_argument('--pandoc-workers', metavar='N', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', metavar='FILE', type=AbsolutePath, help='Save the results as JSON.')
+    parser.add_argument('--baseline', metavar='FILE', type=AbsolutePath, help='Compare the results against a file.')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Allowed slowdown compared to the baseline (default: 0.1, i.e., 10%%).')
+
+    group = parser.add_argument_group('synthetic project')
+    group.add_argument('--pages', type=int, default=defaults.pages)
+    group.add_argument('--depth', type=int, default=defaults.depth)
+    group.add_argument('--fanout', type=int, default=defaults.fanout)
+    group.add_argument('--links', type=int, default=defaults.links)
+    group.add_argument('--headers', type=int, default=defaults.headers)
+    group.add_argument('--code-blocks', type=int, default=defaults.code_blocks)
+    group.add_argument('--images', type=int, default=defaults.images)
+    group.add_argument('--languages', default=','.join(defaults.languages))
+    group.add_argument('--nav', action='store_true')
+    group.add_argument('--seed', type=int, default=defaults.seed)
+
+    args = parser.parse_args()
+    unknown = set(args.builders.split(',')) - set(BUILDERS)
+    if unknown:
+        parser.error(f'Unknown builders: {", ".join(sorted(unknown))}')
+
+    sys.exit(run(async_main(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+A generator of synthetic projects for benchmarking.
+
+The generated files are described in the same nested-dictionary format that `FakeFileSystem` in the tests uses,
+so the same project can be either written to disk (for end-to-end benchmarks) or loaded into a `FakeProject`.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from textwrap import dedent
+
+import yaml
+
+from sobiraka.utils import AbsolutePath
+
+PseudoFiles = dict[str, 'str | bytes | PseudoFiles']
+
+# The smallest valid PNG image (1×1, transparent)
+PNG = bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+                    '1f15c4890000000d49444154789c6300010000000500010d0a2db40000000049454e44ae426082')
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et '
+         'dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+         'commodo consequat').split()
+
+
+@dataclass(frozen=True, kw_only=True)
+class SyntheticProject:
+    """
+    Parameters of a synthetic project.
+    The same parameters and the same `seed` always produce exactly the same files.
+    """
+
+    pages: int = 100
+    """Number of pages in each document, not counting the index pages of directories."""
+
+    depth: int = 2
+    """Depth of the directory tree. With 0, all pages are placed directly in the root directory."""
+
+    fanout: int = 4
+    """Number of subdirectories in each directory, except the deepest ones."""
+
+    links: int = 3
+    """Number of links to other pages on each page."""
+
+    headers: int = 5
+    """Number of second-level headers on each page."""
+
+    code_blocks: int = 1
+    """Number of code blocks on each page."""
+
+    images: int = 0
+    """Number of images on each page. Each image is a separate file."""
+
+    languages: tuple[str, ...] = ('en',)
+    """A separate document is generated for each language."""
+
+    nav: bool = False
+    """Whether to order each directory with a `_nav.yaml` file instead of relying on file names."""
+
+    paragraphs: int = 2
+    """Number of paragraphs under each header."""
+
+    seed: int = 0
+
+    def files(self) -> PseudoFiles:
+        """
+        Generate all files of the project, including the `sobiraka.yaml` manifest.
+        """
+        files: PseudoFiles = {'sobiraka.yaml': yaml.safe_dump(self.manifest(), allow_unicode=True, sort_keys=False)}
+        for lang in self.languages:
+            _put(files, f'src/{lang}', self._document_files(lang))
+        if self.images:
+            _put(files, 'resources', {f'image-{p}-{i}.png': PNG
+                                      for p in range(self.pages) for i in range(self.images)})
+        return files
+
+    def manifest(self) -> dict:
+        def document(lang: str) -> dict:
+            return dict(title=f'Synthetic documentation ({lang})',
+                        paths=dict(root=f'src/{lang}', resources='resources'))
+
+        if len(self.languages) == 1:
+            return document(self.languages[0])
+        return dict(primary_language=self.languages[0],
+                    languages={lang: document(lang) for lang in self.languages})
+
+    def write(self, directory: AbsolutePath) -> AbsolutePath:
+        """
+        Write the project into the given directory and return the path to its manifest.
+        """
+        _write(directory, self.files())
+        return directory / 'sobiraka.yaml'
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Generating content
+
+    def _document_files(self, lang: str) -> PseudoFiles:
+        rng = random.Random(f'{self.seed}:{lang}')
+        paths = self._page_paths()
+
+        files: PseudoFiles = {'index.md': f'# Synthetic documentation ({lang})\n\n{self._paragraph(rng)}\n'}
+        for directory in self._directories():
+            if directory:
+                _put(files, f'{directory}/index.md', f'# Section {directory}\n\n{self._paragraph(rng)}\n')
+
+        for n, path in enumerate(paths):
+            _put(files, path, self._page_text(n, paths, rng))
+
+        if self.nav:
+            for directory in self._directories():
+                prefix = f'{directory}/' if directory else ''
+                children = sorted({p.removeprefix(prefix).split('/')[0] for p in paths if p.startswith(prefix)})
+                if children:
+                    _put(files, f'{prefix}_nav.yaml', yaml.safe_dump(dict(items=children)))
+
+        return files
+
+    def _directories(self) -> list[str]:
+        directories = ['']
+        level = ['']
+        for _ in range(self.depth):
+            level = [f'{parent}/d{i}'.lstrip('/') for parent in level for i in range(self.fanout)]
+            directories += level
+        return directories
+
+    def _page_paths(self) -> list[str]:
+        leaves = [d for d in self._directories() if d and d.count('/') + 1 == self.depth] if self.depth else ['']
+        return [f'{leaves[n % len(leaves)]}/page-{n}.md'.lstrip('/') for n in range(self.pages)]
+
+    def _page_text(self, n: int, paths: list[str], rng: random.Random) -> str:
+        sections: list[str] = [f'# Page {n}', self._paragraph(rng)]
+
+        links = [rng.choice(paths) for _ in range(self.links)]
+        images = [f'/image-{n}-{i}.png' for i in range(self.images)]
+        code_blocks = [self._code_block(rng) for _ in range(self.code_blocks)]
+
+        for h in range(max(self.headers, 1)):
+            if self.headers:
+                sections.append(f'## Section {n}.{h} {{#section-{h}}}')
+            for _ in range(self.paragraphs):
+                paragraph = self._paragraph(rng)
+                if links:
+                    paragraph += f' See [another page](/{links.pop()}).'
+                sections.append(paragraph)
+            if images:
+                sections.append(f'![Image]({images.pop()})')
+            if code_blocks:
+                sections.append(code_blocks.pop())
+
+        # If there were fewer headers than other elements, put the remaining elements at the end
+        sections += [f'See [another page](/{link}).' for link in links]
+        sections += [f'![Image]({image})' for image in images]
+        sections += code_blocks
+
+        return '\n\n'.join(sections) + '\n'
+
+    @staticmethod
+    def _paragraph(rng: random.Random) -> str:
+        words = rng.choices(WORDS, k=rng.randint(30, 80))
+        return ' '.join(words).capitalize() + '.'
+
+    @staticmethod
+    def _code_block(rng: random.Random) -> str:
+        name = rng.choice(WORDS)
+        return dedent(f'''
+            ```python
+            def {name}(items):
+                result = []
+                for item in items:
+                    if item.{rng.choice(WORDS)}:
+                        result.append(item)
+                return result
+            ```
+        ''').strip()
+
+    # endregion
+
+
+def _put(files: PseudoFiles, path: str, content: str | bytes | PseudoFiles):
+    *parents, name = path.split('/')
+    for parent in parents:
+        files = files.setdefault(parent, {})
+    if isinstance(content, dict):
+        files.setdefault(name, {}).update(content)
+    else:
+        files[name] = content
+
+
+def _write(directory: AbsolutePath, files: PseudoFiles):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in files.items():
+        match content:
+            case dict():
+                _write(directory / name, content)
+            case str():
+                (directory / name).write_text(content, encoding='utf-8')
+            case bytes():
+                (directory / name).write_bytes(content)
@@ -1,3 +1,5 @@
+import atexit
+import os
 import sys
 from argparse import ArgumentParser, Namespace
 from asyncio import run
@@ -5,13 +7,13 @@ from typing import Iterable
 
 from sobiraka.models import Document
 from sobiraka.models.load import load_project
-from sobiraka.processing.latex import LatexBuilder
-from sobiraka.processing.markdown import MarkdownBuilder
-from sobiraka.processing.weasyprint import WeasyPrintBuilder
-from sobiraka.processing.web import WebBuilder
+from sobiraka.pandoc import Pandoc
+from sobiraka.processing.build import DOCUMENT_FORMATS, FORMATS, build, build_documents
+from sobiraka.processing.web import Shard, WebBuilder, merge_shards
 from sobiraka.prover import Prover
 from sobiraka.report import run_beautifully
-from sobiraka.runtime import RT
+from sobiraka.runtime import RT, Scheduler
+from sobiraka.serving import serve
 from sobiraka.translating import check_translations
 from sobiraka.utils import AbsolutePath, DictionaryValidator, parse_vars
 
@@ -26,6 +28,10 @@ async def async_main():
     parser = ArgumentParser()
     parser.add_argument('--version', action='store_true')
     parser.add_argument('--tmpdir', type=AbsolutePath, default=AbsolutePath('build'))
+    parser.add_argument('--pandoc-workers', metavar='N', type=int, default=os.cpu_count() or 1,
+                        help='Number of long-lived Pandoc servers to use, or 0 to start Pandoc for each conversion.')
+    parser.add_argument('--trace', metavar='FILE', type=AbsolutePath,
+                        help='Save timings of the build stages as a Chrome trace (viewable in Perfetto).')
 
     commands = parser.add_subparsers(title='commands', dest='command')
 
@@ -33,21 +39,47 @@ async def async_main():
     cmd_web.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
     cmd_web.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/web'))
     cmd_web.add_argument('--hide-index-html', action='store_true', help='Remove the "index.html" part from links.')
+    cmd_web.add_argument('--jobs', metavar='N', type=int, help='Maximum number of heavy operations running at once.')
+    cmd_web.add_argument('--incremental', action='store_true',
+                         help='Still process and render every page, but do not rewrite unchanged HTML files.')
+    cmd_web.add_argument('--shard', metavar='K/N', type=Shard.parse,
+                         help='Only build the K-th of N parts of the documents, finish with "merge".')
+
+    cmd_merge = commands.add_parser('merge', help='Combine the outputs of sharded web builds.')
+    cmd_merge.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/web'))
+
+    cmd_build = commands.add_parser('build', help='Build documentation in several formats at once.')
+    cmd_build.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
+    cmd_build.add_argument('--formats', default='web,pdf', type=lambda x: x.split(','),
+                           help=f'Comma-separated list of formats: {", ".join(FORMATS)} (default: web,pdf).')
+    cmd_build.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build'),
+                           help='The directory in which a subdirectory for each format will be created.')
+    cmd_build.add_argument('--jobs', metavar='N', type=int, help='Maximum number of heavy operations running at once.')
+
+    cmd_serve = commands.add_parser('serve', help='Build web documentation, serve it and rebuild on changes.')
+    cmd_serve.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
+    cmd_serve.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/web'))
+    cmd_serve.add_argument('--host', default='127.0.0.1')
+    cmd_serve.add_argument('--port', type=int, default=8000)
+    cmd_serve.add_argument('--jobs', metavar='N', type=int, help='Maximum number of heavy operations running at once.')
 
     cmd_pdf = commands.add_parser('pdf', help='Build PDF file via WeasyPrint.')
     cmd_pdf.add_argument('document', nargs='?')
     cmd_pdf.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
     cmd_pdf.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/pdf'))
+    cmd_pdf.add_argument('--jobs', metavar='N', type=int, help='Maximum number of documents built at once.')
 
     cmd_latex = commands.add_parser('latex', help='Build PDF file fia LaTeX.')
     cmd_latex.add_argument('document', nargs='?')
     cmd_latex.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
     cmd_latex.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/pdf'))
+    cmd_latex.add_argument('--jobs', metavar='N', type=int, help='Maximum number of documents built at once.')
 
     cmd_markdown = commands.add_parser('markdown', help='Build Markdown file.')
     cmd_markdown.add_argument('document', nargs='?')
     cmd_markdown.add_argument('--config', metavar='CONFIG', type=AbsolutePath, default=SOBIRAKA_YAML)
     cmd_markdown.add_argument('--output', type=AbsolutePath, default=AbsolutePath('build/markdown'))
+    cmd_markdown.add_argument('--jobs', metavar='N', type=int, help='Maximum number of documents built at once.')
 
     cmd_prover = commands.add_parser('prover', help='Check a document for various issues.')
     cmd_prover.add_argument('document', nargs='?')
@@ -66,9 +98,14 @@ async def async_main():
 
     args = parser.parse_args()
     RT.TMP = args.tmpdir
+    RT.PANDOC = Pandoc(args.pandoc_workers)
+    if args.trace:
+        # Save the trace even if the build fails and exits early
+        RT.TRACER.start()
+        atexit.register(RT.TRACER.save, args.trace)
 
     if args.version:
-        print((AbsolutePath(__file__).parent / 'VERSION').read_text().strip())
+        print(RT.VERSION)
         exit_code = 0
 
     elif args.command is None:
@@ -80,33 +117,38 @@ async def async_main():
 
         if cmd is cmd_web:
             project = load_project(args.config)
-            builder = WebBuilder(project, args.output, hide_index_html=args.hide_index_html)
+            RT.SCHEDULER = Scheduler(args.jobs or project.jobs)
+            builder = WebBuilder(project, args.output,
+                                 hide_index_html=args.hide_index_html,
+                                 incremental=args.incremental,
+                                 shard=args.shard)
             with run_beautifully():
                 exit_code = await RT.run_isolated(builder.run())
 
-        elif cmd is cmd_latex:
-            for document, output in selected_documents(args, autosuffix='.pdf'):
-                builder = LatexBuilder(document, output)
-                with run_beautifully():
-                    exit_code = await RT.run_isolated(builder.run())
-                    if exit_code != 0:
-                        break
-
-        elif cmd is cmd_pdf:
-            for document, output in selected_documents(args, autosuffix='.pdf'):
-                builder = WeasyPrintBuilder(document, output)
-                with run_beautifully():
-                    exit_code = await RT.run_isolated(builder.run())
-                    if exit_code != 0:
-                        break
-
-        elif cmd is cmd_markdown:
-            for document, output in selected_documents(args):
-                builder = MarkdownBuilder(document, output)
-                with run_beautifully():
-                    exit_code = await RT.run_isolated(builder.run())
-                    if exit_code != 0:
-                        break
+        elif cmd is cmd_merge:
+            exit_code = await merge_shards(args.output)
+
+        elif cmd is cmd_build:
+            if unknown := sorted(set(args.formats) - set(FORMATS)):
+                cmd_build.error(f'Unknown formats: {", ".join(unknown)}')
+            with run_beautifully():
+                exit_code = await build(args.config, args.formats, args.output, jobs=args.jobs)
+
+        elif cmd is cmd_serve:
+            await serve(args.config, args.output, host=args.host, port=args.port, jobs=args.jobs)
+            exit_code = 0
+
+        elif cmd in (cmd_pdf, cmd_latex, cmd_markdown):
+            targets = list(selected_documents(args, autosuffix='' if cmd is cmd_markdown else '.pdf'))
+            if len(targets) > 1 and args.jobs != 1:
+                exit_code = await build_documents(args.command, args.config, targets, jobs=args.jobs)
+            else:
+                for document, output in targets:
+                    builder = DOCUMENT_FORMATS[args.command](document, output)
+                    with run_beautifully():
+                        exit_code = await RT.run_isolated(builder.run())
+                        if exit_code != 0:
+                            break
 
         elif cmd is cmd_prover:
             project = load_project(args.config)
@@ -128,6 +170,7 @@ async def async_main():
         else:
             raise NotImplementedError(args.command)
 
+    await RT.SCHEDULER.shutdown()
     sys.exit(exit_code or 0)
 
 
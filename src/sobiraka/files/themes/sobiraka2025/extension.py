@@ -2,7 +2,6 @@ import re
 from abc import ABCMeta
 from asyncio import create_task
 
-import PIL.Image
 from panflute import Caption, Div, Element, Figure, Header, Image, Link, Para, Plain, Space, Str, Table
 from typing_extensions import override
 
@@ -22,7 +21,7 @@ class Sobiraka2025_Processor(AbstractHtmlProcessor, metaclass=ABCMeta):
 
         if len(para.content) == 1 and isinstance(image := para.content[0], Image):
             if isinstance(self, WebProcessor):
-                self.autoscale_image(image, page)
+                await self.autoscale_image(image, page)
                 result = Link(image, url=image.url)
                 RT[page].links_that_follow_images.append((image, result))
             else:
@@ -35,16 +34,15 @@ class Sobiraka2025_Processor(AbstractHtmlProcessor, metaclass=ABCMeta):
 
         return para,
 
-    def autoscale_image(self, image: Image, page: Page):
+    async def autoscale_image(self, image: Image, page: Page):
         if 'width' in image.attributes and 'height' in image.attributes:
             return
 
         image_path = page.document.config.paths.resources / image.url
-        with page.project.fs.open_bytes(image_path) as image_file:
-            with PIL.Image.open(image_file) as pil:
-                true_width = pil.width
-                true_height = pil.height
-                ratio = true_width / true_height
+        info = await RT.IMAGES.get_info(page.project.fs, image_path)
+        true_width = info.width
+        true_height = info.height
+        ratio = info.ratio
 
         if width_spec := image.attributes.get('width'):
             width, unit = re.fullmatch(r'([\d.]+)(.*)', width_spec).groups()
@@ -100,8 +100,12 @@ class JavaScriptHighlighterLibraryConfig(JavaScriptLibraryConfig, metaclass=ABCM
     """
     Same as JavaScriptLibraryConfig, but with a `style` field.
     The way this field is used is implemented in the subclasses, though.
+
+    If `bundle` is set, the library and the languages used in the document are joined into a single script.
+    This requires the library to be loaded from a local directory.
     """
     style: str | None
+    bundle: bool = False
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -117,6 +121,7 @@ class Config_HighlightJS(Config_Web_Highlight, JavaScriptHighlighterLibraryConfi
                 package_unpkg='@highlightjs/cdn-assets',
             ),
             style=data.get('style', 'default'),
+            bundle=data.get('bundle', False),
         )
 
 
@@ -133,6 +138,7 @@ class Config_Prism(Config_Web_Highlight, JavaScriptHighlighterLibraryConfig):
                 package_unpkg='prismjs',
             ),
             style=data.get('style', 'default'),
+            bundle=data.get('bundle', False),
         )
 
 
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True, frozen=True)
+class Config_Web_Images:
+    """Settings for generating the responsive images, see :class:`.ResponsiveImages`."""
+
+    widths: tuple[int, ...] = (480, 960, 1920)
+    """The widths of the scaled down variants. Only the widths smaller than the original image's width are used."""
+
+    formats: tuple[str, ...] = ('webp',)
+    """The additional formats to encode each variant in, e.g., ``webp`` or ``avif``."""
+
+    quality: int = 80
+    """The quality of the lossy encoding, from 1 to 100."""
+
+    sizes: str = None
+    """The value for the ``sizes`` attribute, describing the image's width on the page at different viewport sizes."""
+
+    lazy: bool = True
+    """Whether to let the browser postpone loading the images until they are scrolled into view."""
@@ -6,6 +6,7 @@ from utilspie.collectionsutils import frozendict
 
 from sobiraka.utils import RelativePath
 from .config_highlight import Config_Web_Highlight
+from .config_images import Config_Web_Images
 from .config_search import Config_Web_Search
 from .config_utils import CombinedToc, Config_Theme
 
@@ -50,3 +51,15 @@ class Config_Web:
     search: Config_Web_Search = field(default_factory=Config_Web_Search)
 
     highlight: Config_Web_Highlight = None
+
+    images: Config_Web_Images = None
+    """Settings for generating the responsive images. If not set, the images are copied as is."""
+
+    minify: bool = False
+    """Whether to remove the comments and the extra whitespace from the generated HTML pages."""
+
+    precompress: bool = False
+    """Whether to save the gzip and Brotli copies of the text files next to them, see :func:`.precompress_files`."""
+
+    fingerprint: bool = False
+    """Whether to refer to the static assets by names that include their digests, see :class:`.AssetFingerprints`."""
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from functools import cached_property
 
-from sobiraka.utils import Location, RelativePath
+from more_itertools import unique_everseen
+
+from sobiraka.utils import Location, MISSING, RelativePath
 from .config import Config
 from .namingscheme import NamingScheme
 from .page import Page
@@ -22,6 +25,8 @@ class Document:
 
         self.project: Project = None
 
+        self._index: DocumentIndex | None = None
+
     def __hash__(self):
         return hash(id(self))
 
@@ -63,8 +68,66 @@ class Document:
     def root_page(self) -> Page:
         return self.get_page_by_location('/')
 
+    def all_pages(self) -> tuple[Page, ...]:
+        """
+        Return all pages of the document, in the same order as `root.all_pages()` does.
+        """
+        return self.index.pages
+
     def get_page_by_location(self, location: Location | str) -> Page:
-        for page in self.root.all_pages():
-            if str(page.location) == str(location):
-                return page
-        raise KeyError(location)
+        return self.index.pages_by_location[str(location)]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Index
+
+    @property
+    def index(self) -> DocumentIndex:
+        """
+        Lookup tables for the document's pages.
+
+        The index is only stored once all sources have been discovered.
+        Before that, it is rebuilt on each access and only includes the sources that have already been loaded.
+        """
+        if self._index is not None:
+            return self._index
+        index = DocumentIndex.build(self.root)
+        if index.complete:
+            self._index = index
+        return index
+
+    def invalidate_index(self):
+        """
+        Forget the stored index. Must be called whenever the document's sources or pages change.
+        """
+        self._index = None
+
+
+@dataclass(frozen=True)
+class DocumentIndex:
+    pages: tuple[Page, ...]
+    pages_by_location: dict[str, Page]
+    complete: bool
+
+    @staticmethod
+    def build(root: Source) -> DocumentIndex:
+        pages: list[Page] = []
+        complete = True
+
+        def visit(source: Source):
+            nonlocal complete
+            if source.pages is MISSING or source.child_sources is MISSING:
+                complete = False
+                return
+            pages.extend(source.pages)
+            for child in source.child_sources:
+                visit(child)
+
+        visit(root)
+        unique_pages = tuple(unique_everseen(pages))
+        pages_by_location: dict[str, Page] = {}
+        for page in unique_pages:
+            pages_by_location.setdefault(str(page.location), page)
+
+        return DocumentIndex(pages=unique_pages,
+                             pages_by_location=pages_by_location,
+                             complete=complete)
@@ -1,2 +1,2 @@
 from .load_document import load_document
-from .load_project import load_project, load_project_from_dict, load_project_from_str
+from .load_project import JobsInsideDocument, load_project, load_project_from_dict, load_project_from_str
@@ -7,8 +7,8 @@ from utilspie.collectionsutils import frozendict
 from sobiraka.utils import Apostrophe, QuotationMark, RelativePath, convert_or_none, expand_vars
 from ..config import CombinedToc, Config, Config_Content, Config_Latex, Config_Latex_HeadersTransform, Config_PDF, \
     Config_Pagefind_Translations, Config_Paths, Config_Pdf_Highlight, Config_Prover, Config_Prover_Dictionaries, \
-    Config_Search_LinkTarget, Config_Theme, Config_Web, Config_Web_Highlight, Config_Web_Search, SearchIndexerName, \
-    find_theme_dir
+    Config_Search_LinkTarget, Config_Theme, Config_Web, Config_Web_Highlight, Config_Web_Images, Config_Web_Search, \
+    SearchIndexerName, find_theme_dir
 from ..document import Document
 from ..filesystem import FileSystem
 from ..namingscheme import NamingScheme
@@ -74,6 +74,16 @@ def load_document(lang: str | None, codename: str, document_data: dict, fs: File
                 translations=Config_Pagefind_Translations(**_('web.search.translations', {})),
             ),
             highlight=convert_or_none(Config_Web_Highlight.load, _('web.highlight')),
+            images=None if _('web.images') is None else Config_Web_Images(
+                widths=tuple(_('web.images.widths', (480, 960, 1920))),
+                formats=tuple(_('web.images.formats', ('webp',))),
+                quality=_('web.images.quality', 80),
+                sizes=_('web.images.sizes'),
+                lazy=_('web.images.lazy', True),
+            ),
+            minify=_('web.minify', False),
+            precompress=_('web.precompress', False),
+            fingerprint=_('web.fingerprint', False),
         ),
         latex=Config_Latex(
             header=convert_or_none(RelativePath, _expand(_('latex.header'))),
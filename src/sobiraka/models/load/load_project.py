@@ -36,11 +36,15 @@ def load_project_from_dict(manifest: dict, *, fs: FileSystem) -> Project:
     documents: list[Document] = []
     for lang, language_data in _normalized_and_merged(manifest, 'languages'):
         for codename, document_data in _normalized_and_merged(language_data, 'documents'):
+            # The limit is global, so it can only be set on the top level
+            if 'jobs' in document_data and document_data is not manifest:
+                raise JobsInsideDocument()
             documents.append(load_document(lang, codename, document_data, fs))
 
     primary_language = manifest.get('primary_language') or documents[0].lang
+    jobs = manifest.get('jobs')
 
-    return Project(fs, tuple(documents), primary_language)
+    return Project(fs, tuple(documents), primary_language, jobs)
 
 
 def _normalized_and_merged(data: dict, key: str) -> Iterable[tuple[str | None, dict]]:
@@ -55,3 +59,8 @@ def _normalized_and_merged(data: dict, key: str) -> Iterable[tuple[str | None, d
             yield k, v
     else:
         yield from data[key].items()
+
+
+class JobsInsideDocument(Exception):
+    def __init__(self):
+        super().__init__("The 'jobs' option can only be set on the top level of the manifest")
@@ -16,13 +16,15 @@ class Project:
     A single documentation project that needs to be processed and rendered.
     """
 
-    def __init__(self, fs: FileSystem, documents: tuple[Document, ...], primary_language: str = None):
+    def __init__(self, fs: FileSystem, documents: tuple[Document, ...], primary_language: str = None,
+                 jobs: int = None):
         self.fs: FileSystem = fs
         self.documents: tuple[Document, ...] = documents
         for document in self.documents:
             document.project = self
 
         self.primary_language: str | None = primary_language
+        self.jobs: int | None = jobs
 
     def __repr__(self):
         return f'<{self.__class__.__name__}: {self.fs}>'
@@ -0,0 +1 @@
+from .pandoc import Pandoc, PandocFailure
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import atexit
+import json
+import socket
+import sys
+from asyncio import AbstractEventLoop, Queue, create_subprocess_exec, get_running_loop, open_connection, sleep
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
+
+
+class Pandoc:
+    """
+    The single entry point for all conversions performed by Pandoc.
+
+    With zero `workers`, each conversion launches a new `pandoc` process.
+    With a positive number of `workers`, conversions are sent to a bounded pool of long-lived `pandoc server` processes,
+    so that Pandoc's startup cost is paid once per worker instead of once per conversion.
+    The servers are only started on the first conversion, so a command that never converts anything starts no servers.
+    If the servers cannot be started (e.g., because Pandoc is older than 3.0),
+    the class prints a warning and falls back to launching a process per conversion.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers: int = workers
+
+        self._version: str | None = None
+        self._servers: list[PandocServer] | None = None
+        self._idle_servers: Queue[PandocServer] | None = None
+        self._idle_servers_loop: AbstractEventLoop | None = None
+
+        # Do not leave the servers running after Sobiraka exits
+        atexit.register(self.close)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.workers} workers>'
+
+    async def convert(self,
+                      data: bytes,
+                      *,
+                      source_format: str,
+                      target_format: str,
+                      wrap: str | None = None,
+                      highlight: bool = True) -> bytes:
+        """
+        Convert `data` from `source_format` to `target_format`.
+
+        The `wrap` and `highlight` arguments correspond to Pandoc's `--wrap` and `--no-highlight` options.
+        """
+        if self.workers > 0:
+            try:
+                return await self._convert_with_server(data, source_format=source_format, target_format=target_format,
+                                                       wrap=wrap, highlight=highlight)
+            except PandocServerUnavailable as exc:
+                print(f'Cannot use Pandoc server, falling back to separate processes. {exc}', file=sys.stderr)
+                self.close()
+                self.workers = 0
+
+        return await self._convert_with_process(data, source_format=source_format, target_format=target_format,
+                                                wrap=wrap, highlight=highlight)
+
+    async def version(self) -> str:
+        """
+        The first line of `pandoc --version`, e.g., 'pandoc 3.1.11'.
+        Useful as a part of cache keys, because a different Pandoc may produce a different output.
+        """
+        if self._version is None:
+            pandoc = await create_subprocess_exec('pandoc', '--version', stdout=PIPE)
+            output, _ = await pandoc.communicate()
+            if pandoc.returncode != 0:
+                raise PandocFailure(f'Pandoc exited with code {pandoc.returncode}.')
+            self._version = output.decode('utf-8').splitlines()[0].strip()
+        return self._version
+
+    def close(self):
+        """
+        Stop all running Pandoc servers, if any.
+        It is safe to call `convert()` again after this, the servers will be restarted on demand.
+        """
+        for server in self._servers or ():
+            server.terminate()
+        self._servers = None
+        self._idle_servers = None
+        self._idle_servers_loop = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Implementations
+
+    @staticmethod
+    async def _convert_with_process(data: bytes, *, source_format: str, target_format: str,
+                                    wrap: str | None, highlight: bool) -> bytes:
+        command = ['pandoc', '--from', source_format, '--to', target_format]
+        if wrap is not None:
+            command += '--wrap', wrap
+        if not highlight:
+            command += '--no-highlight',
+
+        pandoc = await create_subprocess_exec(*command, stdin=PIPE, stdout=PIPE)
+        output, _ = await pandoc.communicate(data)
+        if pandoc.returncode != 0:
+            raise PandocFailure(f'Pandoc exited with code {pandoc.returncode}.')
+        return output
+
+    async def _convert_with_server(self, data: bytes, *, source_format: str, target_format: str,
+                                   wrap: str | None, highlight: bool) -> bytes:
+        params = {
+            'text': data.decode('utf-8'),
+            'from': source_format,
+            'to': target_format,
+        }
+        if wrap is not None:
+            params['wrap'] = wrap
+        # Like in a defaults file, a null style is the equivalent of `--no-highlight`,
+        # while omitting the style altogether would mean the default style, not no highlighting
+        params['highlight-style'] = 'pygments' if highlight else None
+
+        idle_servers = self._get_idle_servers()
+        server = await idle_servers.get()
+        try:
+            output = await server.convert(params)
+        finally:
+            idle_servers.put_nowait(server)
+
+        # Unlike the server, the command-line Pandoc always ends its output with a newline
+        if not output.endswith(b'\n'):
+            output += b'\n'
+        return output
+
+    def _get_idle_servers(self) -> Queue[PandocServer]:
+        """
+        Start the servers, if not started yet, and return the queue of servers that are not busy at the moment.
+
+        The servers themselves are shared by all event loops,
+        but the queue is recreated for each new loop, because asyncio queues cannot be shared between loops.
+        """
+        if self._servers is None:
+            self._servers = [PandocServer() for _ in range(self.workers)]
+
+        loop = get_running_loop()
+        if self._idle_servers_loop is not loop:
+            self._idle_servers = Queue()
+            self._idle_servers_loop = loop
+            for server in self._servers:
+                self._idle_servers.put_nowait(server)
+
+        return self._idle_servers
+
+    # endregion
+
+
+class PandocServer:
+    """
+    A long-lived `pandoc server` process that accepts conversion requests over HTTP.
+    See https://pandoc.org/pandoc-server.html for the API.
+
+    The process is started via `Popen`, not via asyncio, so that it does not belong to any particular event loop.
+    Each request uses a new HTTP/1.0 connection, which is cheap compared to starting a new Pandoc process.
+    """
+
+    STARTUP_TIMEOUT: float = 10
+    """How long to wait for the server to start accepting connections, in seconds."""
+
+    REQUEST_TIMEOUT: int = 600
+    """The server-side limit for a single conversion, in seconds. Pandoc's own default is only 2 seconds."""
+
+    def __init__(self):
+        self.port: int = _find_free_port()
+        try:
+            # pylint: disable=consider-using-with
+            self.process: Popen = Popen(('pandoc', 'server',
+                                         '--port', str(self.port),
+                                         '--timeout', str(self.REQUEST_TIMEOUT)),
+                                        stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL)
+        except OSError as exc:
+            raise PandocServerUnavailable(str(exc)) from exc
+        self.ready: bool = False
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: port {self.port}>'
+
+    async def convert(self, params: dict) -> bytes:
+        if not self.ready:
+            await self._wait_ready()
+
+        body = json.dumps(params).encode('utf-8')
+        request = b'POST / HTTP/1.0\r\n' \
+                  b'Host: 127.0.0.1\r\n' \
+                  b'Content-Type: application/json\r\n' \
+                  b'Accept: application/json\r\n' \
+                  + f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') \
+                  + body
+
+        reader, writer = await open_connection('127.0.0.1', self.port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        head, _, payload = response.partition(b'\r\n\r\n')
+        if head.split(b' ')[1:2] != [b'200']:
+            raise PandocFailure(payload.decode('utf-8', errors='replace').strip())
+
+        result = json.loads(payload)
+        return result['output'].encode('utf-8')
+
+    def terminate(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except TimeoutExpired:
+                self.process.kill()
+
+    async def _wait_ready(self):
+        delay = 0.05
+        for _ in range(int(self.STARTUP_TIMEOUT / delay)):
+            if self.process.poll() is not None:
+                raise PandocServerUnavailable(f'The server exited with code {self.process.returncode}.')
+            try:
+                _, writer = await open_connection('127.0.0.1', self.port)
+                writer.close()
+                await writer.wait_closed()
+                self.ready = True
+                return
+            except OSError:
+                await sleep(delay)
+        raise PandocServerUnavailable(f'The server did not start listening on port {self.port}.')
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class PandocFailure(Exception):
+    pass
+
+
+class PandocServerUnavailable(Exception):
+    pass
@@ -1,4 +1,5 @@
 from .builder import Builder
+from .buildcache import BuildCache
 from .dispatcher import Dispatcher
 from .documentbuilder import DocumentBuilder, ThemeableDocumentBuilder
 from .processor import Processor
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from contextlib import suppress
+
+from sobiraka.models import Page
+from sobiraka.utils import AbsolutePath
+
+
+class BuildCache:
+    """
+    Remembers the rendering digests of the pages from the previous build,
+    so that an incremental build can skip decorating and writing the final HTML for the pages
+    whose rendering inputs have not changed.
+
+    This is the only thing an incremental build skips.
+    All pages are still parsed, go through all the processing stages and are rendered to HTML,
+    because there is no record of which pages depend on which.
+    (Parsing itself is cached separately and safely, by the text that Pandoc receives, see `Builder.parse()`.)
+
+    The digests are stored in a JSON file between builds.
+    The `fingerprint` describes everything that affects all pages at once, such as the config and the theme.
+    If it differs from the stored one, the stored data is ignored and all pages are written again.
+    """
+
+    def __init__(self, path: AbsolutePath, fingerprint: str):
+        self.path: AbsolutePath = path
+        self.fingerprint: str = fingerprint
+
+        self.old: dict[str, str] = {}
+        self.new: dict[str, str] = {}
+
+        with suppress(OSError, ValueError, KeyError, TypeError):
+            data = json.loads(self.path.read_text())
+            if data['fingerprint'] == self.fingerprint:
+                self.old = dict(data['pages'])
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.path}>'
+
+    def save(self):
+        data = dict(fingerprint=self.fingerprint, pages=dict(sorted(self.new.items())))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        temp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1))
+        temp_path.replace(self.path)
+
+    def is_rendered(self, page: Page, rendered: str) -> bool:
+        """
+        Remember the digest of the page's rendering inputs.
+        Return True if it is the same as in the previous build, i.e., the output would be the same, too.
+        """
+        key = f'{page.source.path_in_project}:{page.location}'
+        self.new[key] = rendered
+        return self.old.get(key) == rendered
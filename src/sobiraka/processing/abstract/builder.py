@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import os
 from abc import ABCMeta, abstractmethod
-from asyncio import Task, create_subprocess_exec, wait
+from asyncio import Task, wait
 from collections import defaultdict
 from io import BytesIO
-from subprocess import PIPE
-from typing import Generic, TYPE_CHECKING, TypeVar, final
+from typing import Generic, Hashable, TYPE_CHECKING, TypeVar, final
 
 import jinja2
 import panflute
@@ -15,7 +14,9 @@ from jinja2 import StrictUndefined
 from sobiraka.models import Document, FileSystem, Page, PageHref, Project, Source
 from sobiraka.models.config import Config
 from sobiraka.runtime import RT
-from sobiraka.utils import replace_element
+from sobiraka.utils import JinjaBytecodeCache, convert_or_none, digest, panflute_to_bytes, render_string_async, \
+    replace_element
+from .buildcache import BuildCache
 from .waiter import Waiter
 from ..directive import parse_directives
 from ..numerate import numerate
@@ -26,6 +27,8 @@ if TYPE_CHECKING:
 
 P = TypeVar('P', bound='Processor')
 
+RENDER_CACHE_SIZE = 256 * 1024 * 1024
+
 
 class Builder(Generic[P], metaclass=ABCMeta):
     def __init__(self):
@@ -35,6 +38,8 @@ class Builder(Generic[P], metaclass=ABCMeta):
         self.process3_tasks: dict[Document, list[Task]] = defaultdict(list)
         self.process4_tasks: dict[Page, list[Task]] = defaultdict(list)
 
+        self.build_cache: BuildCache | None = None
+
     def __repr__(self):
         return f'<{self.__class__.__name__} at {hex(id(self))}>'
 
@@ -103,19 +108,73 @@ class Builder(Generic[P], metaclass=ABCMeta):
                 undefined=StrictUndefined,
                 enable_async=True,
                 loader=config.paths.partials and jinja2.FileSystemLoader(fs.resolve(config.paths.partials)),
+                bytecode_cache=convert_or_none(JinjaBytecodeCache, RT.cache('jinja')),
             )
-        page_text = await self.jinja[document].from_string(page_text).render_async(variables)
 
-        pandoc = await create_subprocess_exec(
-            'pandoc',
-            '--from', page.syntax.as_pandoc_format(),
-            '--to', 'json',
-            stdin=PIPE,
-            stdout=PIPE)
-        json_bytes, _ = await pandoc.communicate(page_text.encode('utf-8'))
-        assert pandoc.returncode == 0
+        async with RT.SCHEDULER.slot(page):
+            with RT.TRACER.span('jinja', 'jinja', page=page):
+                page_text = await render_string_async(self.jinja[document], page_text, variables)
+            json_bytes = await self.parse(page_text, page.syntax.as_pandoc_format(), consumer=type(self))
+            RT[page].doc = panflute.load(BytesIO(json_bytes))
+
+    @staticmethod
+    async def parse(text: str, source_format: str, *, consumer: Hashable = None) -> bytes:
+        """
+        Convert the text to Pandoc's JSON AST.
+
+        The results are stored in a persistent content-addressed cache,
+        so a page whose rendered text did not change since the previous build is not parsed again.
+        The cache key includes the Pandoc and Sobiraka versions, since any of them may affect the result.
 
-        RT[page].doc = panflute.load(BytesIO(json_bytes))
+        When several builders run together (see `RT.SHARED_ASTS`), each text is only parsed once for all of them.
+        The `consumer` identifies the builder's format there.
+        """
+        async def convert() -> bytes:
+            with RT.TRACER.span('pandoc', 'process', source_format=source_format, target_format='json'):
+                return await RT.PANDOC.convert(text.encode('utf-8'), source_format=source_format, target_format='json')
+
+        async def convert_with_cache() -> bytes:
+            cache = RT.cache('ast')
+            if cache is None:
+                return await convert()
+
+            json_bytes = cache.get(key)
+            if json_bytes is None:
+                json_bytes = await convert()
+                cache.set(key, json_bytes)
+            return json_bytes
+
+        key = digest(text, source_format, await RT.PANDOC.version(), RT.VERSION)
+        if RT.SHARED_ASTS is not None:
+            return await RT.SHARED_ASTS.get(key, convert_with_cache, consumer=consumer)
+        return await convert_with_cache()
+
+    @staticmethod
+    async def render(doc: panflute.Doc, target_format: str, **flags) -> bytes:
+        """
+        Convert the syntax tree to the target format.
+        The `flags` are passed to :meth:`Pandoc.convert()`.
+
+        Most pages end up with exactly the same syntax tree as in the previous build,
+        so the results are stored in a persistent cache, keyed by the tree itself, the format and the flags.
+        Unlike the AST cache, this one is limited in size and evicts the least recently used entries.
+        """
+        data = panflute_to_bytes(doc)
+
+        async def convert() -> bytes:
+            with RT.TRACER.span('pandoc', 'process', source_format='json', target_format=target_format):
+                return await RT.PANDOC.convert(data, source_format='json', target_format=target_format, **flags)
+
+        cache = RT.cache('render', size_limit=RENDER_CACHE_SIZE, eviction_policy='least-recently-used')
+        if cache is None:
+            return await convert()
+
+        key = digest(data, target_format, repr(sorted(flags.items())), await RT.PANDOC.version(), RT.VERSION)
+        output = cache.get(key)
+        if output is None:
+            output = await convert()
+            cache.set(key, output)
+        return output
 
     async def do_process1(self, page: Page) -> Page:
         """
@@ -145,7 +204,7 @@ class Builder(Generic[P], metaclass=ABCMeta):
         if document.config.content.numeration:
             numerate(document)
 
-        for page in document.root.all_pages():
+        for page in document.all_pages():
             processor = self.get_processor_for_page(page)
             for directive in processor.directives[page]:
                 replace_element(directive, directive.postprocess())
@@ -163,3 +222,12 @@ class Builder(Generic[P], metaclass=ABCMeta):
     @abstractmethod
     def make_internal_url(self, href: PageHref, *, page: Page = None) -> str:
         ...
+
+    def get_url_base(self, page: Page) -> Hashable:
+        """
+        Return a key that is shared by all pages from which `make_internal_url()` generates the same URLs,
+        except for the URLs of the page itself. This allows generating a URL once for all such pages.
+
+        By default, every page is considered to be different.
+        """
+        return page
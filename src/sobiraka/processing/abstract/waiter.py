@@ -1,22 +1,25 @@
 from asyncio import Task, create_task, get_event_loop, sleep, wait
 from collections import defaultdict
-from itertools import chain
-from typing import Coroutine, Sequence, TYPE_CHECKING, overload
+from typing import Any, Coroutine, Sequence, TYPE_CHECKING, TypeVar, overload
 
 from sobiraka.models import AggregationPolicy, Document, Issue, Page, Source, Status
 from sobiraka.report import Reporter
-from sobiraka.utils import KeyDefaultDict, MISSING, RelativePath, consume_task_silently, print_colorful_exc, sorted_dict
+from sobiraka.runtime import RT
+from sobiraka.utils import KeyDefaultDict, MISSING, RelativePath, consume_task_silently, print_colorful_exc
 from .events import AggregatingEvent, PreventableEvent, ProductiveEvent
 
 if TYPE_CHECKING:
     from .builder import Builder
 
+T = TypeVar('T')
+
 
 class Waiter:
     """
     This class is the most important part of the implementation of Builder.
     It manages RelativePaths, Sources, Pages, and the asynchronous tasks and events for processing them.
     When initialized, a Waiter is given the status which all pages are expected to get eventually.
+    Some documents may be given a lower target status via `target_statuses`, see `get_target_status()`.
 
     As far as any other code is concerned, there are just two methods here:
       - `start()` for launching the tasks,
@@ -27,6 +30,7 @@ class Waiter:
     def __init__(self, builder: 'Builder', target_status: Status = Status.PROCESS4):
         self.builder: Builder = builder
         self.target_status: Status = target_status
+        self.target_statuses: dict[Document, Status] = {}
 
         self.tasks: dict[Source | Page, dict[Status, Task]] = defaultdict(dict)
         self.tasks_p3: dict[Document, Task] = {}
@@ -38,19 +42,32 @@ class Waiter:
 
         self.done = PreventableEvent()
 
+        # Instead of checking the whole tree after each status change,
+        # we keep track of what is not finished yet and what has failed, updating it on each transition.
+        # See `notice()` and `maybe_done_impl()`.
+        self.unloaded_sources: set[Source] = set()
+        self.unfinished_pages: set[Page] = set()
+        self.unfinished_tasks: set[Task] = set()
+        self.unresolved_paths: set[RelativePath] = set()
+        self.failed: set[Source | Page] = set()
+        self.failed_tasks: list[Task] = []
+
     # ------------------------------------------------------------------------------------------------------------------
     # region Public interface
 
     def start(self):
         for root in self.builder.get_roots():
             Reporter.register_document(root.document)
-            self.schedule_tasks(root, self.target_status)
+            self.schedule_tasks(root, self.get_target_status(root.document))
         assert self.tasks
 
-    def add_task(self, coro: Coroutine):
+    def add_task(self, coro: Coroutine[Any, Any, T]) -> Task[T]:
         task = create_task(coro, name=coro.__name__)
+        task.add_done_callback(self.notice_task)
         task.add_done_callback(self.maybe_done)
         self.additional_tasks.append(task)
+        self.unfinished_tasks.add(task)
+        return task
 
     async def wait_all(self):
         if not self.tasks:
@@ -74,12 +91,29 @@ class Waiter:
         Perform all yet unperformed operations until the `page` reaches the given status.
         """
         if isinstance(obj, RelativePath):
+            if not self.path_events[obj].is_set():
+                # If all sources are already loaded, this will fail the event right away
+                self.unresolved_paths.add(obj)
+                self.maybe_done()
             obj = await self.path_events[obj].wait()
 
+        # Someone is blocked until this page is ready, so let its heavy operations skip the queue
+        if isinstance(obj, Page):
+            RT.SCHEDULER.prioritize(obj)
+
         self.schedule_tasks(obj, status)
         await self.tasks[obj][status]
         return obj
 
+    def get_target_status(self, document: Document) -> Status:
+        """
+        Get the status which the document's pages are expected to get eventually.
+
+        A builder may lower it for some documents, e.g., to only discover their pages.
+        Any of their pages can still get a higher status if some other page waits for it via `wait()`.
+        """
+        return self.target_statuses.get(document, self.target_status)
+
     # endregion
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -107,6 +141,9 @@ class Waiter:
         Ensures that all necessary tasks are created to get the Source to target_status.
         If a task already exists for a certain status, its creation will be skipped.
         """
+        if source not in self.tasks:
+            self.unloaded_sources.add(source)
+
         for status in Status.range(Status.DISCOVER, target_status):
             if status in self.tasks[source]:
                 continue
@@ -130,6 +167,9 @@ class Waiter:
         Ensures that all necessary tasks are created to get the Page to target_status.
         If a task already exists for a certain status, its creation will be skipped.
         """
+        if page not in self.tasks:
+            self.unfinished_pages.add(page)
+
         for status in Status.range(Status.DISCOVER, target_status):
             if status in self.tasks[page]:
                 continue
@@ -173,7 +213,9 @@ class Waiter:
         """
         try:
             # Let the source populate its child_sources list
-            await source.generate_child_sources()
+            with RT.TRACER.span('LOAD SOURCE', 'waiter',
+                                path=str(source.path_in_project), document=source.document.autoprefix):
+                await source.generate_child_sources()
             assert source.child_sources is not MISSING, \
                 f'Source {source.path_in_project} failed to generate child sources.'
             Reporter.register_child_sources(source)
@@ -183,7 +225,7 @@ class Waiter:
             # To avoid any weird behavior, it is important to finish setting the dependencies
             # before any child tasks actually start: notice the lack of `await` keywords here.
             for child in source.child_sources:
-                self.schedule_tasks(child, self.target_status)
+                self.schedule_tasks(child, self.get_target_status(child.document))
 
                 if AggregationPolicy.WAIT_FOR_CHILDREN in source.aggregation_policy:
                     self.aggregating[source].add_dependency(self.tasks[child][Status.LOAD])
@@ -198,7 +240,9 @@ class Waiter:
             await self.aggregating[source].wait()
 
             # Let the source populate its pages list
-            await source.generate_pages()
+            with RT.TRACER.span('LOAD SOURCE', 'waiter',
+                                path=str(source.path_in_project), document=source.document.autoprefix):
+                await source.generate_pages()
             assert source.pages is not MISSING, f'Source {source.path_in_project} failed to generate pages.'
             for page in source.pages:
                 assert page.children is not MISSING, f'Page {page.location} does not have a children list.'
@@ -208,10 +252,11 @@ class Waiter:
             for page in source.pages:
                 assert page.children is not MISSING, \
                     f'Page {page.location} has empty children list.'
-                self.schedule_tasks(page, self.target_status)
+                self.schedule_tasks(page, self.get_target_status(page.document))
 
             # Loading this source is complete
             source.status = Status.LOAD
+            source.document.invalidate_index()
 
             # Notify others about whether this source has generated any pages.
             # This event may be awaited by other sources' AggregatingEvents.
@@ -222,6 +267,7 @@ class Waiter:
 
             # If anyone was looking for this source by its path, they may now proceed
             self.path_events[source.path_in_project].set_result(source)
+            self.unresolved_paths.discard(source.path_in_project)
 
         except DependencyFailed:
             source.status = Status.DEP_FAILURE
@@ -234,6 +280,7 @@ class Waiter:
             raise DependencyFailed(exc) from exc
 
         finally:
+            self.notice(source)
             self.maybe_done()
 
     async def do_process1_source(self, source: Source, status: Status):
@@ -283,7 +330,8 @@ class Waiter:
 
         try:
             # Run the selected function
-            await coro
+            with RT.TRACER.span(f'{status.name} PAGE', 'waiter', page=page):
+                await coro
 
             if page.issues:
                 raise IssuesOccurred(page.source.path_in_project, page.issues)
@@ -307,6 +355,7 @@ class Waiter:
             raise DependencyFailed(exc) from exc
 
         finally:
+            self.notice(page)
             self.maybe_done()
 
     async def do_process3_document(self, document: Document):
@@ -318,7 +367,8 @@ class Waiter:
         """
         try:
             await self.wait_recursively(document.root, Status.PROCESS2)
-            await self.builder.do_process3(document)
+            with RT.TRACER.span('PROCESS3 DOCUMENT', 'waiter', document=document.autoprefix):
+                await self.builder.do_process3(document)
             self.set_status_recursively(document, Status.PROCESS3)
 
         except DependencyFailed:
@@ -341,7 +391,7 @@ class Waiter:
 
     def maybe_done(self, _: Task = None):
         """
-        Check the statuses of all sources and pages.
+        Check whether there are any unfinished sources, pages or additional tasks.
         The purpose of this function is to be called after each status change,
         i.e., at the end of every `do_*()` function.
 
@@ -354,52 +404,8 @@ class Waiter:
         get_event_loop().call_soon(self.maybe_done_impl)
 
     def maybe_done_impl(self):
-        # pylint: disable=too-many-branches
-        still_loading = False
-        still_processing = False
-        excs: dict[RelativePath | None, list[BaseException]] = defaultdict(list)
-
-        # We start by iterating over just the roots,
-        # but we will be adding all children to the queue as we go
-        queue: list[Source] = list(self.builder.get_roots())
-        while queue:
-            source = queue.pop(0)
-            if source.child_sources is not MISSING:
-                queue += source.child_sources
-
-            # If the source has not yet generated its children and pages, do nothing
-            if source.status == Status.DISCOVER:
-                still_loading = True
-                still_processing = True
-                continue
-
-            # If we have a failure, remember this fact
-            if source.exception:
-                excs[source.path_in_project].append(source.exception)
-            elif source.issues:
-                excs[source.path_in_project].append(IssuesOccurred(source.path_in_project, source.issues))
-            elif source.status.is_failed():
-                excs[source.path_in_project].append(RuntimeError(f'Source status: {source.status.name}.'))
-
-            # Check if the source's pages are ready
-            if source.pages is not MISSING:
-                for page in source.pages:
-                    if page.status < self.target_status:
-                        still_processing = True
-                    elif page.exception:
-                        excs[source.path_in_project].append(page.exception)
-                    elif page.issues:
-                        excs[source.path_in_project].append(IssuesOccurred(page.source.path_in_project, page.issues))
-                    elif page.status.is_failed():
-                        excs[source.path_in_project].append(RuntimeError(f'Page status: {page.status.name}.'))
-
-        if not still_processing:
-            for task in self.additional_tasks:
-                if not task.done():
-                    still_processing = True
-                    break
-                if task.exception() is not None:
-                    excs[None].append(task.exception())
+        still_loading = bool(self.unloaded_sources)
+        still_processing = still_loading or bool(self.unfinished_pages) or bool(self.unfinished_tasks)
 
         Reporter.refresh()
 
@@ -407,24 +413,70 @@ class Waiter:
         # it means that everyone who waited with a Path should have received a Source now.
         # If anyone hasn't, they apparently have an incorrect Path, so raise exceptions for them.
         if not still_loading:
-            for path, event in self.path_events.items():
-                if not event.is_set():
-                    event.fail(NoSourceCreatedForPath(path))
+            for path in self.unresolved_paths:
+                self.path_events[path].fail(NoSourceCreatedForPath(path))
+            self.unresolved_paths.clear()
 
         # If nothing is processing anymore, cancel any unused tasks and trigger the event
-        if not still_processing:
+        if not still_processing and not self.done.is_set():
             for subdict in self.tasks.values():
                 for task in subdict.values():
                     if not task.done():
                         task.cancel()
 
-            if excs:
-                excs = sorted_dict(excs, key=lambda k: (k is None, k))
-                sorted_exceptions = list(chain(*excs.values()))
-                self.done.fail(BuildFailure('Build failure', sorted_exceptions))
+            if exceptions := self.collect_exceptions():
+                self.done.fail(BuildFailure('Build failure', exceptions))
             else:
                 self.done.set()
 
+    def notice(self, obj: Source | Page):
+        """
+        Update the information about unfinished and failed objects after the given object's status changed.
+        The purpose of this function is to be called after each status change, right before `maybe_done()`.
+        """
+        if obj.exception or obj.issues or obj.status.is_failed():
+            self.failed.add(obj)
+
+        match obj:
+            case Source():
+                if obj.status is not Status.DISCOVER:
+                    self.unloaded_sources.discard(obj)
+            case Page():
+                if self.get_target_status(obj.document) <= obj.status:
+                    self.unfinished_pages.discard(obj)
+
+    def notice_task(self, task: Task):
+        self.unfinished_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed_tasks.append(task)
+
+    def collect_exceptions(self) -> list[BaseException]:
+        """
+        Get the exceptions for all failed sources, pages and additional tasks.
+        The sources and pages are sorted by their paths, the additional tasks go last.
+        """
+        def sort_key(obj: Source | Page) -> tuple:
+            match obj:
+                case Source():
+                    return obj.path_in_project, 0
+                case Page():
+                    return obj.source.path_in_project, 1, obj.source.pages.index(obj)
+
+        excs: list[BaseException] = []
+        for obj in sorted(self.failed, key=sort_key):
+            path = obj.source.path_in_project if isinstance(obj, Page) else obj.path_in_project
+            if obj.exception:
+                excs.append(obj.exception)
+            elif obj.issues:
+                excs.append(IssuesOccurred(path, obj.issues))
+            elif isinstance(obj, Page):
+                excs.append(RuntimeError(f'Page status: {obj.status.name}.'))
+            else:
+                excs.append(RuntimeError(f'Source status: {obj.status.name}.'))
+        for task in self.failed_tasks:
+            excs.append(task.exception())
+        return excs
+
     # endregion
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -464,14 +516,17 @@ class Waiter:
         Set the given status to all sources and pages in the document.
         """
         document.root.status = status
+        self.notice(document.root)
 
         for child in document.root.all_child_sources():
             if not child.status.is_failed():
                 child.status = status
+                self.notice(child)
 
-        for page in document.root.all_pages():
+        for page in document.all_pages():
             if not page.status.is_failed():
                 page.status = status
+                self.notice(page)
 
     # endregion
 
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+import sys
+from asyncio import gather, get_running_loop, run, to_thread
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr
+from functools import partial
+from io import StringIO
+from multiprocessing import get_context
+from traceback import print_exception
+from typing import Callable, Iterable, Sequence
+
+from sobiraka.models import Document, Project
+from sobiraka.models.load import load_project
+from sobiraka.pandoc import Pandoc
+from sobiraka.runtime import RT, Scheduler, SharedAsts
+from sobiraka.utils import AbsolutePath, print_colorful_exc
+from .abstract import Builder
+from .abstract.waiter import BuildFailure, IssuesOccurred
+
+
+def _weasyprint_builder(document: Document, output: AbsolutePath) -> Builder:
+    from .weasyprint import WeasyPrintBuilder
+    return WeasyPrintBuilder(document, output)
+
+
+def _latex_builder(document: Document, output: AbsolutePath) -> Builder:
+    from .latex import LatexBuilder
+    return LatexBuilder(document, output)
+
+
+def _markdown_builder(document: Document, output: AbsolutePath) -> Builder:
+    from .markdown import MarkdownBuilder
+    return MarkdownBuilder(document, output)
+
+
+DOCUMENT_FORMATS: dict[str, Callable[[Document, AbsolutePath], Builder]] = {
+    'pdf': _weasyprint_builder,
+    'latex': _latex_builder,
+    'markdown': _markdown_builder,
+}
+
+
+def _web(project: Project, output: AbsolutePath) -> Iterable[Builder]:
+    from .web import WebBuilder
+    yield WebBuilder(project, output / 'web')
+
+
+def _pdf(project: Project, output: AbsolutePath) -> Iterable[Builder]:
+    for document, output_file in _per_document(project, output / 'pdf', suffix='.pdf'):
+        yield _weasyprint_builder(document, output_file)
+
+
+def _latex(project: Project, output: AbsolutePath) -> Iterable[Builder]:
+    for document, output_file in _per_document(project, output / 'latex', suffix='.pdf'):
+        yield _latex_builder(document, output_file)
+
+
+def _markdown(project: Project, output: AbsolutePath) -> Iterable[Builder]:
+    for document, output_dir in _per_document(project, output / 'markdown'):
+        yield _markdown_builder(document, output_dir)
+
+
+def _per_document(project: Project, output: AbsolutePath, *, suffix: str = ''):
+    if len(project.documents) == 1:
+        document = project.documents[0]
+        yield document, output / (document.config.title + suffix) if suffix else output
+    else:
+        for document in project.documents:
+            yield document, output / (document.config.title + suffix)
+
+
+FORMATS: dict[str, Callable[[Project, AbsolutePath], Iterable[Builder]]] = {
+    'web': _web,
+    'pdf': _pdf,
+    'latex': _latex,
+    'markdown': _markdown,
+}
+
+
+async def build(manifest_path: AbsolutePath, formats: Sequence[str], output: AbsolutePath, *,
+                jobs: int = None) -> int:
+    """
+    Build the project in several formats at once, e.g., web, WeasyPrint PDF and Markdown.
+
+    All builders run concurrently and share the results of parsing (see `SharedAsts`),
+    so each page is parsed by Pandoc only once, unless its text depends on the format-specific variables
+    (e.g., `{% if WEB %}`), in which case each distinct text is parsed separately.
+    Each builder then loads its own copy of the syntax tree and processes it independently.
+
+    Each format gets its own copy of the project, because the builders track the progress in the project's objects.
+    """
+    formats = tuple(dict.fromkeys(formats))
+
+    builders: list[Builder] = []
+    for fmt in formats:
+        project = load_project(manifest_path)
+        builders += FORMATS[fmt](project, output)
+
+    RT.SCHEDULER = Scheduler(jobs or builders[0].get_project().jobs)
+    # Each format has its own builder class, and its builders process each page exactly once
+    shared_asts = RT.SHARED_ASTS = SharedAsts(type(builder) for builder in builders)
+    unfinished = Counter(type(builder) for builder in builders)
+
+    async def run_builder(builder: Builder) -> int:
+        try:
+            return await RT.run_isolated(builder.run())
+        finally:
+            # This format will not take any more texts, so do not keep any texts for it
+            unfinished[type(builder)] -= 1
+            if unfinished[type(builder)] == 0:
+                shared_asts.finished(type(builder))
+
+    try:
+        print(f'Building {", ".join(formats)}...', file=sys.stderr)
+        results = await gather(*map(run_builder, builders), return_exceptions=True)
+    finally:
+        RT.SHARED_ASTS = None
+
+    # Only report the first failure, after all builders have finished
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return max((result or 0 for result in results), default=0)
+
+
+async def build_documents(fmt: str, manifest_path: AbsolutePath, targets: Sequence[tuple[Document, AbsolutePath]], *,
+                          jobs: int = None) -> int:
+    """
+    Build several documents in the given format (see `DOCUMENT_FORMATS`) concurrently.
+
+    The heavy parts of these builds (WeasyPrint, xelatex) are CPU-bound,
+    so each document is built in a separate process, with at most `jobs` processes running at once.
+    Each process gets its share of the Pandoc workers and the scheduler slots.
+
+    The output of each build is collected and printed when the build finishes,
+    in the same order as the documents were given, so the logs of different documents never mix.
+    Similarly, if the tracer is running, the spans recorded by each process are added to it when the build finishes.
+    Returns the first non-zero exit code, or zero if all builds succeeded.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(targets))
+    share = max(1, (os.cpu_count() or 1) // jobs)
+
+    loop = get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn'),
+                               initializer=_init_process,
+                               initargs=(RT.TMP, min(RT.PANDOC.workers, share),
+                                         RT.TRACER.origin if RT.TRACER.enabled else None))
+    try:
+        futures = [loop.run_in_executor(pool, partial(_build_document_in_process,
+                                                      fmt, manifest_path, document.autoprefix, output, jobs=share))
+                   for document, output in targets]
+
+        exit_code = 0
+        for (_, output), future in zip(targets, futures):
+            document_exit_code, log, events = await future
+            sys.stderr.write(log)
+            RT.TRACER.add_events(events)
+            status = 'done' if document_exit_code == 0 else f'failed with exit code {document_exit_code}'
+            print(f'{output.name!r}: {status}.', file=sys.stderr)
+            exit_code = exit_code or document_exit_code
+
+    finally:
+        # Waiting for the processes to stop takes a while, do not block the event loop
+        await to_thread(pool.shutdown, cancel_futures=True)
+
+    return exit_code
+
+
+def _init_process(tmpdir: AbsolutePath | None, pandoc_workers: int, trace_origin: int | None):
+    RT.TMP = tmpdir
+    RT.PANDOC = Pandoc(pandoc_workers)
+    if trace_origin is not None:
+        # The monotonic clock is shared by all processes, so the timestamps will match the parent's ones
+        RT.TRACER.start(trace_origin)
+
+
+def _build_document_in_process(fmt: str, manifest_path: AbsolutePath, autoprefix: str | None, output: AbsolutePath,
+                               *, jobs: int) -> tuple[int, str, list[dict]]:
+    async def build_document() -> int:
+        project = load_project(manifest_path)
+        RT.SCHEDULER = Scheduler(jobs)
+        builder = DOCUMENT_FORMATS[fmt](project.get_document(autoprefix), output)
+        return await RT.run_isolated(builder.run()) or 0
+
+    log = StringIO()
+    with redirect_stderr(log):
+        try:
+            exit_code = run(build_document())
+        except BuildFailure as failure:
+            # There is no report tree in a separate process, so print the problems right into the log
+            _print_build_failure(failure)
+            exit_code = 1
+        except Exception:  # pylint: disable=broad-exception-caught
+            print_colorful_exc()
+            exit_code = 1
+
+    # The same process may build another document later, so only return the spans of this one
+    events, RT.TRACER.events = RT.TRACER.events, []
+    return exit_code, log.getvalue(), events
+
+
+def _print_build_failure(failure: BuildFailure):
+    for exc in failure.exceptions:
+        if isinstance(exc, IssuesOccurred):
+            print(exc, file=sys.stderr)
+        else:
+            print_exception(exc, file=sys.stderr)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import re
 from abc import ABCMeta, abstractmethod
-from asyncio import Task, TaskGroup, create_subprocess_exec
+from asyncio import Task, TaskGroup, create_subprocess_exec, create_task, to_thread
 from collections import defaultdict
-from os.path import dirname
+from os.path import dirname, normpath
 from subprocess import PIPE
-from typing import Generic, TypeVar, final
+from typing import Awaitable, Callable, Generic, TypeVar, final
 
 from panflute import CodeBlock, Element, Header, Image
 from typing_extensions import override
@@ -13,12 +14,16 @@ from typing_extensions import override
 from sobiraka.models import Document, Page, Status
 from sobiraka.models.config import Config, Config_Theme
 from sobiraka.runtime import RT
-from sobiraka.utils import AbsolutePath, RelativePath, configured_jinja, first_existing_path, panflute_to_bytes
+from sobiraka.utils import AbsolutePath, JinjaBytecodeCache, RelativePath, configured_jinja, convert_or_none, digest, \
+    first_existing_path
 from .head import Head, HeadCssFile
 from .highlight import Highlighter
 from ..abstract import Builder, Processor, Theme
 
 
+_SASS_IMPORT = re.compile(r'@(?:import|use|forward)\s+([^;\n]+)')
+
+
 class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
 
     def __init__(self, **kwargs):
@@ -27,6 +32,7 @@ class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
         self._html_builder_tasks: list[Task] = []
         self._results: set[AbsolutePath] = set()
         self.heads: dict[Document, Head] = defaultdict(Head)
+        self._sass_tasks: dict[str, Task[bytes]] = {}
 
     @final
     async def compile_theme_sass(self, theme: AbstractHtmlTheme, document: Document, *, pdf: bool = False):
@@ -36,21 +42,36 @@ class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
         - the theme's main style,
         - the theme's flavor (if provided),
         - the project's customization (if provided).
+
+        The documents that share the theme, the flavor and the customization get the same CSS,
+        so it is compiled only once and then kept in the persistent cache until any of these files change.
         """
         if not theme.sass_main:
             return
 
+        customization = convert_or_none(document.project.fs.resolve, theme.sass_customization)
         command = ['node', f'{dirname(__file__)}/compile_sass.js', '--source', str(theme.sass_main)]
         if pdf:
             command += '--pdf',
         if theme.sass_flavor:
             command += '--flavor', str(theme.sass_flavor)
-        if theme.sass_customization:
-            command += '--customization', str(document.project.fs.resolve(theme.sass_customization))
+        if customization:
+            command += '--customization', str(customization)
+
+        # The theme's main style can only import the files from the theme's own directory,
+        # while the flavor and the customization are loaded as is, without any further imports
+        key = await to_thread(_sass_digest, AbsolutePath(__file__).parent / 'compile_sass.js',
+                              theme.sass_main.parent, customization, *command[2:])
 
-        process = await create_subprocess_exec(*command, stdout=PIPE)
-        css, _ = await process.communicate()
-        assert process.returncode == 0
+        async def _compile() -> bytes:
+            async with RT.SCHEDULER.slot():
+                with RT.TRACER.span('node compile_sass.js', 'process', document=document.autoprefix):
+                    process = await create_subprocess_exec(*command, stdout=PIPE)
+                    result, _ = await process.communicate()
+                    assert process.returncode == 0
+                    return result
+
+        css = await self._compile_sass_once(key, _compile)
 
         target = RelativePath() / '_static' / 'theme.css'
         self.add_file_from_data(target, css)
@@ -58,6 +79,43 @@ class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
 
     @final
     async def compile_sass(self, source: AbsolutePath | bytes) -> bytes:
+        if isinstance(source, AbsolutePath):
+            key = await to_thread(lambda: _sass_digest(*_sass_imports(source)))
+        else:
+            key = digest(RT.VERSION, source)
+
+        async def _compile() -> bytes:
+            async with RT.SCHEDULER.slot():
+                with RT.TRACER.span('sass', 'process'):
+                    return await self._compile_sass(source)
+
+        return await self._compile_sass_once(key, _compile)
+
+    async def _compile_sass_once(self, key: str, compile_func: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Run the compilation, unless the same compilation is already running in this build
+        or its result is already in the persistent cache (see `RT.cache()`).
+        The `key` must be a digest of everything that affects the result.
+        """
+        if key not in self._sass_tasks:
+            self._sass_tasks[key] = create_task(self._do_compile_sass_once(key, compile_func))
+        return await self._sass_tasks[key]
+
+    @staticmethod
+    async def _do_compile_sass_once(key: str, compile_func: Callable[[], Awaitable[bytes]]) -> bytes:
+        cache = RT.cache('sass')
+        if cache is not None:
+            css = cache.get(key)
+            if css is not None:
+                return css
+
+        css = await compile_func()
+        if cache is not None:
+            cache.set(key, css)
+        return css
+
+    @staticmethod
+    async def _compile_sass(source: AbsolutePath | bytes) -> bytes:
         match source:
             case AbsolutePath() as source_path:
                 process = await create_subprocess_exec('sass', '--style=compressed', source_path.name,
@@ -69,7 +127,7 @@ class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
             case bytes() as source_content:
                 process = await create_subprocess_exec('sass', '--style=compressed', '--stdin', stdout=PIPE)
                 sass, _ = await process.communicate(source_content)
-                assert process.returncode
+                assert process.returncode == 0
                 return sass
 
             case _:
@@ -92,18 +150,8 @@ class AbstractHtmlBuilder(Builder, metaclass=ABCMeta):
 
     @final
     async def render_html(self, page: Page) -> bytes:
-        pandoc = await create_subprocess_exec(
-            'pandoc',
-            '--from', 'json',
-            '--to', 'html',
-            '--wrap', 'none',
-            '--no-highlight',
-            stdin=PIPE,
-            stdout=PIPE)
-        html, _ = await pandoc.communicate(panflute_to_bytes(RT[page].doc))
-        assert pandoc.returncode == 0
-
-        return html
+        async with RT.SCHEDULER.slot(page):
+            return await self.render(RT[page].doc, 'html', wrap='none', highlight=False)
 
     @abstractmethod
     def get_root_prefix(self, page: Page) -> str:
@@ -162,7 +210,7 @@ class AbstractHtmlProcessor(Processor[B], Generic[B], metaclass=ABCMeta):
         # Use the Highlighter implementation to process the code block and produce head tags
         highlighter = self.get_highlighter(page.document)
         if highlighter is not None:
-            block, head_tags = highlighter.highlight(block)
+            block, head_tags = await highlighter.highlight(block)
             self.builder.heads[page.document] += head_tags
         return block,
 
@@ -219,7 +267,9 @@ class AbstractHtmlTheme(Theme, metaclass=ABCMeta):
 
     def __init__(self, config: Config_Theme):
         super().__init__(config.path)
-        self.page_template = configured_jinja(self.theme_dir).get_template(f'{self.TYPE}.html')
+        jinja = configured_jinja(self.theme_dir,
+                                 bytecode_cache=convert_or_none(JinjaBytecodeCache, RT.cache('jinja')))
+        self.page_template = jinja.get_template(f'{self.TYPE}.html')
         self.sass_main = first_existing_path(
             self.theme_dir / 'sass' / f'{self.TYPE}.scss',
             self.theme_dir / 'sass' / f'{self.TYPE}.sass')
@@ -230,3 +280,46 @@ class AbstractHtmlTheme(Theme, metaclass=ABCMeta):
 
     def __repr__(self):
         return f'<{self.__class__.__name__}: {str(self.sass_main)!r}>'
+
+
+def _sass_digest(*parts: AbsolutePath | str | None) -> str:
+    """
+    Calculate a digest of the given strings and the contents of the given files.
+    For a directory, all its style files are included, with their relative paths.
+    """
+    data: list[str | bytes] = [RT.VERSION]
+    for part in parts:
+        match part:
+            case AbsolutePath() if part.is_dir():
+                for path in sorted(part.walk_all()):
+                    if path.suffix in ('.sass', '.scss', '.css') and path.is_file():
+                        data += str(path.relative_to(part)), path.read_bytes()
+            case AbsolutePath():
+                data += str(part), part.read_bytes()
+            case _:
+                data.append(str(part))
+    return digest(*data)
+
+
+def _sass_imports(source: AbsolutePath) -> list[AbsolutePath]:
+    """
+    Find the style file and all files that it imports, directly or indirectly.
+    Every file that Sass might choose for an import is included, even if it is not the one Sass actually uses.
+    """
+    result: list[AbsolutePath] = []
+    queue = [source]
+    while queue:
+        path = queue.pop()
+        if path in result or not path.is_file():
+            continue
+        result.append(path)
+
+        for statement in _SASS_IMPORT.findall(path.read_text(errors='replace')):
+            for url in re.findall(r'''["']([^"']+)["']''', statement) or statement.split()[:1]:
+                if ':' in url:
+                    continue
+                base = AbsolutePath(normpath(path.parent / url.rstrip(',')))
+                queue += (base.parent / f'{prefix}{base.name}{suffix}'
+                          for prefix in ('', '_') for suffix in ('', '.scss', '.sass', '.css'))
+                queue += (base / f'{prefix}index{suffix}' for prefix in ('', '_') for suffix in ('.scss', '.sass'))
+    return sorted(result)
@@ -1,4 +1,5 @@
-from .abstract import Highlighter, JavaScriptHighlighterLibrary, LanguageCannotBeHighlighted
+from .abstract import BundleRequiresLocalLibrary, Highlighter, JavaScriptHighlighterLibrary, \
+    LanguageCannotBeHighlighted
 from .highlightjs import HighlightJs
 from .prism import Prism
 from .pygments import Pygments
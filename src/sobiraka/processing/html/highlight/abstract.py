@@ -1,3 +1,4 @@
+import re
 from abc import ABCMeta, abstractmethod
 from typing import Generic, Iterable, TYPE_CHECKING, TypeVar
 
@@ -5,7 +6,7 @@ from panflute import Block, CodeBlock
 
 from sobiraka.models import FileSystem
 from sobiraka.models.config import JavaScriptHighlighterLibraryConfig
-from sobiraka.utils import RelativePath
+from sobiraka.utils import RelativePath, digest
 from ..head import HeadCssFile, HeadCssUrl, HeadJsFile, HeadJsUrl, HeadTag
 
 if TYPE_CHECKING:
@@ -18,7 +19,7 @@ class Highlighter(metaclass=ABCMeta):
     """
 
     @abstractmethod
-    def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
+    async def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
         """
         Given a code block, return:
 
@@ -27,6 +28,8 @@ class Highlighter(metaclass=ABCMeta):
         """
 
 
+_SOURCE_MAP_COMMENT = re.compile(r'^//# sourceMappingURL=.*$', flags=re.MULTILINE)
+
 JSHLC = TypeVar('JSHLC', bound=JavaScriptHighlighterLibraryConfig)
 
 
@@ -46,22 +49,42 @@ class JavaScriptHighlighterLibrary(Highlighter, Generic[JSHLC], metaclass=ABCMet
     def get_style_subpath(style: str) -> str:
         """The subpath to the CSS file of the given highlighting style."""
 
+    def get_bundle_scripts(self) -> Iterable[str]:
+        """
+        Subpaths to the JS files that must be included in the bundle, in the order of loading.
+        Must be called after all the document's code blocks are highlighted.
+        By default, these are the core scripts only.
+        """
+        return self.get_core_scripts()
+
+    def get_bundle_code(self) -> str:
+        """Additional code to put at the end of the bundle, e.g., the library's initialization."""
+        return ''
+
     def __init__(self, config: JSHLC, builder: 'WebBuilder'):
         super().__init__()
         self.config: JSHLC = config
         self.builder: WebBuilder = builder
         self.head: list[HeadTag] = []
 
+        self.languages: set[str] = set()
+        """The languages of all highlighted code blocks. Only collected when making a bundle."""
+
+        if config.bundle and not isinstance(config.location, RelativePath):
+            raise BundleRequiresLocalLibrary(config.location)
+
         # If the location is a path, check that the necessary files exist
         if isinstance(config.location, RelativePath):
             fs: FileSystem = builder.project.fs
 
             # Check that the JS files exist locally
+            # (with a bundle, the scripts will be referenced from the head when the bundle is ready)
             for core_script in self.get_core_scripts():
                 script_path = config.location / core_script
                 if not fs.exists(script_path):
                     raise FileNotFoundError(script_path)
-                self.head.append(HeadJsFile(script_path))
+                if not config.bundle:
+                    self.head.append(HeadJsFile(script_path))
 
             # If a style is defined, check that the CSS file exists locally
             # (if not, assume that the designer took care of the styles manually)
@@ -80,6 +103,29 @@ class JavaScriptHighlighterLibrary(Highlighter, Generic[JSHLC], metaclass=ABCMet
                 style_url = config.location + '/' + self.get_style_subpath(config.style)
                 self.head.append(HeadCssUrl(style_url))
 
+    def make_bundle(self) -> tuple[RelativePath, bytes]:
+        """
+        Join the library's scripts and the scripts for the collected languages into a single file.
+        Return the path for the file in the output directory and its content.
+        The file name includes the content's digest, so the browsers can cache it forever.
+        """
+        fs: FileSystem = self.builder.project.fs
+
+        code = ''
+        for subpath in self.get_bundle_scripts():
+            script = fs.read_text(self.config.location / subpath)
+            script = _SOURCE_MAP_COMMENT.sub('', script).strip()
+            code += script + ('' if script.endswith(';') else ';') + '\n'
+        code += self.get_bundle_code()
+
+        data = code.encode('utf-8')
+        name = f'{self.__class__.__name__.lower()}-bundle.{digest(data)[:10]}.js'
+        return RelativePath() / '_static' / 'js' / name, data
+
 
 class LanguageCannotBeHighlighted(Exception):
     pass
+
+
+class BundleRequiresLocalLibrary(Exception):
+    pass
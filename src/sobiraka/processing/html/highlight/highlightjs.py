@@ -197,6 +197,14 @@ SUPPORTED_LANGUAGES_AND_ALIASES = {
 }
 
 
+INIT_SCRIPT = dedent('''
+    document.addEventListener('DOMContentLoaded', (event) => {
+        hljs.configure({languages: []});
+        hljs.initHighlightingOnLoad();
+    });
+''').lstrip()
+
+
 class HighlightJs(JavaScriptHighlighterLibrary[Config_HighlightJS]):
     """
     HighlightJS aka highlight.js aka hljs.
@@ -213,17 +221,24 @@ class HighlightJs(JavaScriptHighlighterLibrary[Config_HighlightJS]):
     def get_style_subpath(style: str) -> str:
         return f'styles/{style}.min.css'
 
+    @override
+    def get_bundle_scripts(self) -> Iterable[str]:
+        yield from self.get_core_scripts()
+        for language in sorted(self.languages - COMMON_LANGUAGES):
+            yield f'languages/{language}.min.js'
+
+    @override
+    def get_bundle_code(self) -> str:
+        return INIT_SCRIPT
+
     def __init__(self, config: Config_HighlightJS, builder: 'WebBuilder'):
         super().__init__(config, builder)
 
-        script_path = RelativePath() / '_static' / 'js' / 'init-highlight.js'
-        builder.add_file_from_data(script_path, dedent('''
-            document.addEventListener('DOMContentLoaded', (event) => {
-                hljs.configure({languages: []});
-                hljs.initHighlightingOnLoad();
-            });
-        ''').lstrip())
-        self.head.append(HeadJsFile(script_path))
+        # With a bundle, the initialization code is included in it
+        if not config.bundle:
+            script_path = RelativePath() / '_static' / 'js' / 'init-highlight.js'
+            builder.add_file_from_data(script_path, INIT_SCRIPT)
+            self.head.append(HeadJsFile(script_path))
 
     @staticmethod
     def normalize_language_name(shortcode: str) -> str:
@@ -233,12 +248,14 @@ class HighlightJs(JavaScriptHighlighterLibrary[Config_HighlightJS]):
         raise LanguageCannotBeHighlighted(shortcode)
 
     @override
-    def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
+    async def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
         language = block.classes[0] if len(block.classes) > 0 else 'plaintext'
         language = self.normalize_language_name(language)
 
         head = self.head.copy()
-        if language not in COMMON_LANGUAGES:
+        if self.config.bundle:
+            self.languages.add(language)
+        elif language not in COMMON_LANGUAGES:
             if isinstance(self.config.location, RelativePath):
                 fs: FileSystem = self.builder.project.fs
                 language_file = self.config.location / 'languages' / f'{language}.min.js'
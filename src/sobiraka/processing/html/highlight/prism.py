@@ -1,9 +1,11 @@
+import json
 from typing import Iterable
 
 import yattag
 from panflute import Block, CodeBlock, RawBlock
 from typing_extensions import override
 
+from sobiraka.models import FileSystem
 from sobiraka.models.config import Config_Prism
 from .abstract import JavaScriptHighlighterLibrary
 from ..head import HeadTag
@@ -71,8 +73,59 @@ class Prism(JavaScriptHighlighterLibrary[Config_Prism]):
         return f'themes/prism-{style}.min.css'
 
     @override
-    def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
+    def get_bundle_scripts(self) -> Iterable[str]:
+        """
+        The core script and the scripts for the collected languages, including the languages they depend on.
+        The dependencies are read from `components.json`, which is distributed with the library.
+        The autoloader is not needed, since all the necessary languages are already in the bundle.
+        """
+        fs: FileSystem = self.builder.project.fs
+        components: dict[str, dict] = json.loads(fs.read_text(self.config.location / 'components.json'))['languages']
+        components.pop('meta', None)
+
+        def as_list(value: str | list[str] | None) -> list[str]:
+            return [value] if isinstance(value, str) else value or []
+
+        names: dict[str, str] = {}
+        for name, component in components.items():
+            names[name] = name
+            for alias in as_list(component.get('alias')):
+                names[alias] = name
+
+        # Select the languages and everything they require
+        selected: set[str] = set()
+        queue = [names[language] for language in self.languages if language in names]
+        while queue:
+            name = queue.pop()
+            if name not in selected:
+                selected.add(name)
+                queue += as_list(components[name].get('require'))
+
+        # Put the languages in the loading order,
+        # so that each one comes after the languages it requires or optionally modifies
+        ordered: list[str] = []
+        visited: set[str] = set()
+
+        def visit(name: str):
+            if name not in visited:
+                visited.add(name)
+                for dependency in as_list(components[name].get('require')) + as_list(components[name].get('optional')):
+                    if dependency in selected:
+                        visit(dependency)
+                ordered.append(name)
+
+        for name in sorted(selected):
+            visit(name)
+
+        yield 'components/prism-core.min.js'
+        for name in ordered:
+            yield f'components/prism-{name}.min.js'
+
+    @override
+    async def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
         language = block.classes[0] if len(block.classes) > 0 else 'plaintext'
+        if self.config.bundle:
+            self.languages.add(language)
 
         html = yattag.Doc()
         with html.tag('pre'):
@@ -1,12 +1,13 @@
 from typing import Iterable, TYPE_CHECKING
 
-import yaml
 import yattag
 from panflute import Block, CodeBlock, RawBlock
 from typing_extensions import override
 
 from sobiraka.models.config import Config_Pygments
-from sobiraka.utils import RelativePath
+from sobiraka.runtime import RT
+from sobiraka.utils import RelativePath, digest, highlight_code
+from sobiraka.utils.highlight_code import get_formatter
 from .abstract import Highlighter
 from ..head import HeadCssFile, HeadTag
 
@@ -18,41 +19,35 @@ class Pygments(Highlighter):
     """
     Website: https://pygments.org/
     List of lexers and their supported options: https://pygments.org/docs/lexers/
+
+    The lexers are reused for the blocks with the same language and options.
+    The highlighted code is saved in a persistent cache (see `RT.cache()`),
+    and the blocks longer than `PROCESS_THRESHOLD` characters are highlighted in separate processes.
     """
 
-    def __init__(self, config: Config_Pygments, builder: 'AbstractHtmlBuilder'):
-        from pygments.formatters.html import HtmlFormatter
-        from pygments.styles import get_style_by_name
+    PROCESS_THRESHOLD = 20_000
 
+    def __init__(self, config: Config_Pygments, builder: 'AbstractHtmlBuilder'):
         super().__init__()
         self.config: Config_Pygments = config
         self.builder: AbstractHtmlBuilder = builder
 
-        self.formatter: HtmlFormatter
         self.head: list[HeadCssFile] = []
 
         # If a style is selected, use Pygments to generate the corresponding CSS code
         if config.style is not None:
-            pygments_style = get_style_by_name(config.style)
-            self.formatter = HtmlFormatter(nowrap=True, wrapcode=True, style=pygments_style)
             style_path = RelativePath() / '_static' / 'css' / f'pygments-{config.style}.css'
-            builder.add_file_from_data(style_path, self.formatter.get_style_defs('pre code.pygments'))
+            builder.add_file_from_data(style_path, get_formatter(config.style).get_style_defs('pre code.pygments'))
             self.head.append(HeadCssFile(style_path))
-        else:
-            self.formatter = HtmlFormatter(nowrap=True, wrapcode=True)
 
     @override
-    def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
-        from pygments.lexers import get_lexer_by_name
-        from pygments import highlight
-
-        # Initialize lexer based on block.classes and block.attributes
+    async def highlight(self, block: CodeBlock) -> tuple[Block, Iterable[HeadTag]]:
+        # The lexer is chosen based on block.classes and configured with block.attributes
         language = block.classes[0] if len(block.classes) > 0 else 'text'
-        options = {k: yaml.safe_load(v) for k, v in block.attributes.items()}
-        lexer = get_lexer_by_name(language, **options)
+        attributes = tuple(sorted(block.attributes.items()))
 
         # Highlight the code
-        output = highlight(block.text, lexer, self.formatter).rstrip()
+        output = await self._highlight(block.text, language, attributes)
 
         pre_attributes = dict(klass=self.config.pre_class) if self.config.pre_class else {}
         code_attributes = dict(klass=self.config.code_class) if self.config.code_class else {}
@@ -64,3 +59,22 @@ class Pygments(Highlighter):
         block = RawBlock(html.getvalue())
 
         return block, self.head
+
+    async def _highlight(self, code: str, language: str, attributes: tuple[tuple[str, str], ...]) -> str:
+        from pygments import __version__ as pygments_version
+
+        key = digest(RT.VERSION, pygments_version, code, language, repr(attributes), str(self.config.style))
+        cache = RT.cache('pygments')
+        output: str | None = cache.get(key) if cache is not None else None
+
+        if output is None:
+            if len(code) >= self.PROCESS_THRESHOLD:
+                with RT.TRACER.span('highlight', 'process', language=language, length=len(code)):
+                    output = await RT.SCHEDULER.run_in_process(highlight_code, code, language, attributes,
+                                                               self.config.style)
+            else:
+                output = highlight_code(code, language, attributes, self.config.style)
+            if cache is not None:
+                cache.set(key, output)
+
+        return output
@@ -8,7 +8,7 @@ from abc import ABCMeta
 from asyncio import create_subprocess_exec
 from contextlib import suppress
 from shutil import copyfile
-from subprocess import DEVNULL, PIPE
+from subprocess import DEVNULL
 from typing import BinaryIO, final
 
 from panflute import Element, Header, Str, stringify
@@ -17,7 +17,7 @@ from typing_extensions import override
 from sobiraka.models import DirPage, Document, FileSystem, Page, PageHref, Status
 from sobiraka.models.config import Config
 from sobiraka.runtime import RT
-from sobiraka.utils import AbsolutePath, LatexInline, convert_or_none, panflute_to_bytes
+from sobiraka.utils import AbsolutePath, LatexInline, convert_or_none
 from ..abstract import Processor, Theme, ThemeableDocumentBuilder
 from ..abstract.processor import DisableLink
 from ..load_processor import load_processor
@@ -50,24 +50,26 @@ class LatexBuilder(ThemeableDocumentBuilder['LatexProcessor', 'LatexTheme']):
     async def run(self):
         self.waiter.start()
 
-        xelatex_workdir = RT.TMP / 'tex'
+        # Each document gets its own directory, so that several documents can be built at once
+        xelatex_workdir = RT.TMP / 'tex' / (self.document.autoprefix or '')
         xelatex_workdir.mkdir(parents=True, exist_ok=True)
         with open(xelatex_workdir / 'build.tex', 'wb') as latex_output:
             await self.generate_latex(latex_output)
 
         resources_dir = self.document.project.fs.resolve(self.document.config.paths.resources)
         total_runs = 3
-        for _ in range(1, total_runs + 1):
-            xelatex = await create_subprocess_exec(
-                'xelatex',
-                '-shell-escape',
-                '-halt-on-error',
-                'build.tex',
-                cwd=xelatex_workdir,
-                env=os.environ | {'TEXINPUTS': f'{resources_dir}:'},
-                stdin=DEVNULL,
-                stdout=DEVNULL)
-            await xelatex.wait()
+        for run in range(1, total_runs + 1):
+            with RT.TRACER.span('xelatex', 'process', document=self.document.autoprefix, run=run):
+                xelatex = await create_subprocess_exec(
+                    'xelatex',
+                    '-shell-escape',
+                    '-halt-on-error',
+                    'build.tex',
+                    cwd=xelatex_workdir,
+                    env=os.environ | {'TEXINPUTS': f'{resources_dir}:'},
+                    stdin=DEVNULL,
+                    stdout=DEVNULL)
+                await xelatex.wait()
             if xelatex.returncode != 0:
                 self.print_xelatex_error(xelatex_workdir / 'build.log')
                 return 1
@@ -130,7 +132,7 @@ class LatexBuilder(ThemeableDocumentBuilder['LatexProcessor', 'LatexTheme']):
             latex_output.write(self.theme.toc.read_bytes())
 
         await self.waiter.wait_all()
-        for page in document.root.all_pages():
+        for page in document.all_pages():
             if page.location.is_root and isinstance(page, DirPage):
                 continue
             await self.waiter.wait(page, Status.PROCESS4)
@@ -149,18 +151,8 @@ class LatexBuilder(ThemeableDocumentBuilder['LatexProcessor', 'LatexTheme']):
             RT[page].bytes = b''
 
         else:
-            pandoc = await create_subprocess_exec(
-                'pandoc',
-                '--from', 'json',
-                '--to', 'latex-smart',
-                '--wrap', 'none',
-                stdin=PIPE,
-                stdout=PIPE)
-            pandoc.stdin.write(panflute_to_bytes(RT[page].doc))
-            pandoc.stdin.close()
-            await pandoc.wait()
-            assert pandoc.returncode == 0
-            RT[page].bytes = await pandoc.stdout.read()
+            async with RT.SCHEDULER.slot(page):
+                RT[page].bytes = await self.render(RT[page].doc, 'latex-smart', wrap='none')
 
             # When a LatexTheme prepends or appends some code to a Para,
             # it may leave the 'BEGIN STRIP'/'END STRIP' notes,
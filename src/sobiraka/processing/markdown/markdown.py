@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-from asyncio import create_subprocess_exec, create_task, to_thread
-from subprocess import PIPE
+from asyncio import create_task, to_thread
 from typing import final
 
 from panflute import Element, Header, Image
@@ -12,7 +11,7 @@ from sobiraka.models.config import Config
 from sobiraka.processing.abstract import DocumentBuilder, Processor
 from sobiraka.processing.abstract.processor import DisableLink
 from sobiraka.runtime import RT
-from sobiraka.utils import AbsolutePath, RelativePath, delete_extra_files, panflute_to_bytes
+from sobiraka.utils import AbsolutePath, RelativePath, delete_extra_files
 
 
 @final
@@ -45,7 +44,7 @@ class MarkdownBuilder(DocumentBuilder['MarkdownProcessor']):
         self._results.add(markdown_path)
         with markdown_path.open('w') as markdown:
             markdown.write(f'---\ntitle: {document.config.title}\n---')
-            for page in document.root.all_pages():
+            for page in document.all_pages():
                 markdown.write('\n\n' + RT[page].bytes.decode('utf-8'))
 
         delete_extra_files(self.output, self._results)
@@ -58,19 +57,8 @@ class MarkdownBuilder(DocumentBuilder['MarkdownProcessor']):
             RT[page].bytes = b''
 
         else:
-            pandoc = await create_subprocess_exec(
-                'pandoc',
-                # '--shift-heading-level-by', '1',
-                '--from', 'json',
-                '--to', 'markdown-multiline_tables',
-                '--wrap', 'none',
-                stdin=PIPE,
-                stdout=PIPE)
-            pandoc.stdin.write(panflute_to_bytes(RT[page].doc))
-            pandoc.stdin.close()
-            await pandoc.wait()
-            assert pandoc.returncode == 0
-            RT[page].bytes = await pandoc.stdout.read()
+            async with RT.SCHEDULER.slot(page):
+                RT[page].bytes = await self.render(RT[page].doc, 'markdown-multiline_tables', wrap='none')
 
     @override
     def additional_variables(self) -> dict:
@@ -90,7 +78,8 @@ class MarkdownBuilder(DocumentBuilder['MarkdownProcessor']):
 
     async def add_file_from_project(self, source: RelativePath, target: RelativePath):
         target = self.output / target
-        await to_thread(self.document.project.fs.copy, source, target)
+        with RT.TRACER.span('copy', 'io', source=str(source), target=str(target)):
+            await to_thread(self.document.project.fs.copy, source, target)
         self._results.add(target)
 
 
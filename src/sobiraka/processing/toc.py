@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from functools import cache
 from math import inf
 from textwrap import dedent, indent
-from typing import Iterable, TYPE_CHECKING
+from typing import Hashable, Iterable, TYPE_CHECKING
 
 import jinja2
 from panflute import Header
@@ -80,6 +81,17 @@ class TocItem:
 
         return f'<{self.__class__.__name__}: {", ".join(parts)}>'
 
+    def state(self, current: str, breadcrumb: str, other: str = '') -> str:
+        """
+        Return one of the given strings, depending on whether the item is current, selected, or neither.
+        Templates rendered via `nav_fragment()` must use this instead of checking `is_current` and `is_breadcrumb`.
+        """
+        if self.is_current:
+            return current
+        if self.is_breadcrumb:
+            return breadcrumb
+        return other
+
     def walk(self) -> Iterable[TocItem]:
         for subitem in self.children:
             yield subitem
@@ -104,30 +116,7 @@ class Toc(list[TocItem]):
         super().__init__(items)
 
     def __str__(self):
-        jinja = jinja2.Environment(
-            trim_blocks=True,
-            lstrip_blocks=True,
-            undefined=jinja2.StrictUndefined,
-        )
-        template = jinja.from_string(dedent('''
-            <ul>
-              {% for item in toc recursive %}
-                <li>
-                  {% if item.is_current %}
-                    <strong>{{ item.title }}</strong>
-                  {% else %}
-                    <a href="{{ item.url }}">{{ item.title }}</a>
-                  {% endif %}
-                  {% if item.children %}
-                    <ul>
-                      {{ loop(item.children) | indent(10) }}
-                    </ul>
-                  {% endif %}
-                </li>
-              {% endfor %}
-            </ul>
-            '''.rstrip()))
-        return template.render(toc=self)
+        return _toc_template().render(toc=self)
 
     def walk(self) -> Iterable[TocItem]:
         for item in self:
@@ -146,6 +135,90 @@ class CollapsedToc(tuple):
     """A value that indicates that some items would be here but were collapsed due to a depth limit."""
 
 
+@cache
+def _toc_template() -> jinja2.Template:
+    jinja = jinja2.Environment(
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=jinja2.StrictUndefined,
+    )
+    return jinja.from_string(dedent('''
+        <ul>
+          {% for item in toc recursive %}
+            <li>
+              {% if item.is_current %}
+                <strong>{{ item.title }}</strong>
+              {% else %}
+                <a href="{{ item.url }}">{{ item.title }}</a>
+              {% endif %}
+              {% if item.children %}
+                <ul>
+                  {{ loop(item.children) | indent(10) }}
+                </ul>
+              {% endif %}
+            </li>
+          {% endfor %}
+        </ul>
+        '''.rstrip()))
+
+
+@dataclass(frozen=True, slots=True)
+class TocNode:
+    """
+    The part of a `TocItem` that does not depend on the page where the TOC is displayed.
+
+    The nodes are built once per page (see `toc_node()`) and then reused by every `toc()` and `local_toc()` call,
+    which only have to mark the current page and the breadcrumbs.
+    The URLs are generated once per builder and URL base (see `Builder.get_url_base()`) and stored in `urls`.
+    """
+    title: str
+    href: PageHref
+    origin: Page | Anchor
+    number: TocNumber
+    level: int = 0
+    collapse: bool = False
+    children: tuple[TocNode, ...] = ()
+    anchors: tuple[TocNode, ...] = ()
+    urls: dict[tuple[Builder, Hashable], str] = field(default_factory=dict, compare=False, repr=False)
+
+    def url(self, builder: Builder, current_page: Page | None) -> str:
+        """
+        Return the node's URL, as seen from the `current_page`.
+        """
+        # The URL of the current page itself is special, e.g., it may be empty
+        if current_page is None or self.href.target is current_page:
+            return builder.make_internal_url(self.href, page=current_page)
+
+        key = builder, builder.get_url_base(current_page)
+        url = self.urls.get(key)
+        if url is None:
+            url = self.urls[key] = builder.make_internal_url(self.href, page=current_page)
+        return url
+
+
+def toc_node(page: Page) -> TocNode:
+    """
+    Return the precomputed TOC node of the page, building it (and the nodes of all its child pages) if necessary.
+    Like `toc()`, this must only be called after the `do_process3()` has been done for the document.
+    """
+    node = RT[page].toc_node
+    if node is None:
+        node = RT[page].toc_node = TocNode(
+            title=page.meta.toc_title or page.meta.title or page.location.name or page.document.codename or '',
+            href=PageHref(page),
+            origin=page,
+            number=RT[page].number,
+            collapse=bool(page.meta.toc_collapse),
+            children=tuple(map(toc_node, page.children)),
+            anchors=tuple(TocNode(title=anchor.label,
+                                  href=PageHref(page, anchor.identifier),
+                                  origin=anchor,
+                                  number=RT[anchor].number,
+                                  level=anchor.level)
+                          for anchor in RT[page].anchors))
+    return node
+
+
 def toc(
         base: Page,
         *,
@@ -177,32 +250,39 @@ def toc(
     The `combined_toc` argument indicates whether to include local TOCs as subtrees of the TOC items.
     You may choose to always include them, never include them, or only include the current page's local TOC.
     """
+    breadcrumbs = frozenset(current_page.breadcrumbs) if current_page is not None else frozenset()
+    return _project_toc(toc_node(base), builder=builder, toc_depth=toc_depth, combined_toc=combined_toc,
+                        current_page=current_page, breadcrumbs=breadcrumbs)
+
+
+def _project_toc(
+        node: TocNode,
+        *,
+        builder: Builder,
+        toc_depth: int | float,
+        combined_toc: CombinedToc,
+        current_page: Page | None,
+        breadcrumbs: frozenset[Page],
+) -> Toc:
     tree = Toc()
 
-    if combined_toc is CombinedToc.ALWAYS or (combined_toc is CombinedToc.CURRENT and base is current_page):
-        tree += local_toc(base,
-                          builder=builder,
-                          toc_depth=toc_depth,
-                          current_page=current_page)
-
-    for page in base.children:
-        item_title = page.meta.toc_title or page.meta.title or page.location.name or page.document.codename or ''
-        href = PageHref(page)
-        url = builder.make_internal_url(href, page=current_page)
-        item = TocItem(title=item_title, url=url, href=href, origin=page,
-                       number=RT[page].number, is_current=page is current_page)
-
-        if current_page is not None:
-            if page in current_page.breadcrumbs:
-                item.is_breadcrumb = True
-
-        if len(RT[page].anchors) > 0 or len(page.children) > 0:
-            if (toc_depth > 1 and not page.meta.toc_collapse) or item.is_breadcrumb:
-                item.children = toc(page,
-                                    builder=builder,
-                                    current_page=current_page,
-                                    toc_depth=toc_depth - 1,
-                                    combined_toc=combined_toc)
+    if combined_toc is CombinedToc.ALWAYS or (combined_toc is CombinedToc.CURRENT and node.origin is current_page):
+        tree += _project_local_toc(node, builder=builder, toc_depth=toc_depth, current_page=current_page)
+
+    for child in node.children:
+        item = TocItem(title=child.title, url=child.url(builder, current_page),
+                       href=child.href, origin=child.origin, number=child.number,
+                       is_current=child.origin is current_page,
+                       is_breadcrumb=child.origin in breadcrumbs)
+
+        if child.anchors or child.children:
+            if (toc_depth > 1 and not child.collapse) or item.is_breadcrumb:
+                item.children = _project_toc(child,
+                                             builder=builder,
+                                             toc_depth=toc_depth - 1,
+                                             combined_toc=combined_toc,
+                                             current_page=current_page,
+                                             breadcrumbs=breadcrumbs)
             else:
                 item.children = CollapsedToc()
 
@@ -224,16 +304,25 @@ def local_toc(
     When called from within `toc()`, it is given a `href_prefix` which is prepended to each URL,
     thus creating a full URL that will lead a user to a specific section of a specific page.
     """
+    return _project_local_toc(toc_node(page), builder=builder, toc_depth=toc_depth, current_page=current_page)
+
+
+def _project_local_toc(
+        node: TocNode,
+        *,
+        builder: Builder,
+        toc_depth: int | float,
+        current_page: Page | None,
+) -> Toc:
     breadcrumbs: list[Toc] = [Toc()]
     current_level: int = 0
 
-    for anchor in RT[page].anchors:
+    for anchor in node.anchors:
         if anchor.level > toc_depth + 1:
             continue
 
-        href = PageHref(page, anchor.identifier)
-        url = builder.make_internal_url(href, page=current_page)
-        item = TocItem(anchor.label, url, href=href, origin=anchor, number=RT[anchor].number)
+        url = anchor.url(builder, current_page)
+        item = TocItem(anchor.title, url, href=anchor.href, origin=anchor.origin, number=anchor.number)
 
         if anchor.level == current_level:
             breadcrumbs[-2].append(item)
@@ -67,7 +67,7 @@ class WeasyPrintBuilder(ThemeableDocumentBuilder['WeasyPrintProcessor', 'WeasyPr
 
         # Combine rendered pages into a single page
         content: list[tuple[Page, TocNumber, str, str]] = []
-        for page in document.root.all_pages():
+        for page in document.all_pages():
             if page.location.is_root and isinstance(page, DirPage):
                 continue
             content.append((page, RT[page].number, page.meta.title, RT[page].bytes.decode('utf-8')))
@@ -75,27 +75,29 @@ class WeasyPrintBuilder(ThemeableDocumentBuilder['WeasyPrintProcessor', 'WeasyPr
         head = self.heads[document].render('')
 
         # Apply the rendering template
-        html = await self.theme.page_template.render_async(
-            builder=self,
+        with RT.TRACER.span('page template', 'jinja', document=document.autoprefix):
+            html = await self.theme.page_template.render_async(
+                builder=self,
 
-            project=document.project,
-            document=document,
-            config=document.config,
+                project=document.project,
+                document=document,
+                config=document.config,
 
-            head=head,
-            now=datetime.now(),
-            toc=lambda **kwargs: toc(document.root_page,
-                                     builder=self,
-                                     toc_depth=document.config.pdf.toc_depth,
-                                     combined_toc=CombinedToc.from_bool(document.config.pdf.combined_toc),
-                                     **kwargs),
+                head=head,
+                now=datetime.now(),
+                toc=lambda **kwargs: toc(document.root_page,
+                                         builder=self,
+                                         toc_depth=document.config.pdf.toc_depth,
+                                         combined_toc=CombinedToc.from_bool(document.config.pdf.combined_toc),
+                                         **kwargs),
 
-            content=content,
+                content=content,
 
-            **document.config.variables,
-        )
+                **document.config.variables,
+            )
 
-        self.render_pdf(html)
+        with RT.TRACER.span('weasyprint', 'weasyprint', document=document.autoprefix):
+            self.render_pdf(html)
 
     def render_pdf(self, html: str):
         messages = ''
@@ -1 +1,5 @@
 from .web import WebBuilder, WebProcessor, WebTheme
+from .fingerprints import AssetFingerprints
+from .outputmanifest import OutputManifest
+from .precompression import precompress_files
+from .shards import IncompleteShards, Shard, ShardManifest, merge_shards
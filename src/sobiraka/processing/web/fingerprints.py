@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import posixpath
+import re
+from asyncio import gather, to_thread
+from hashlib import sha256
+from typing import Iterable
+
+from sobiraka.utils import AbsolutePath, RelativePath
+from .outputmanifest import OutputManifest
+
+_URL_ATTRIBUTE = re.compile(r'''\b(href|src)=(["'])(.*?)\2''')
+_CSS_URL = re.compile(r'''\burl\(\s*(["']?)(.*?)\1\s*\)''', flags=re.DOTALL)
+
+
+class AssetFingerprints:
+    """
+    Gives the static assets (styles, scripts, theme files) additional names that include their content digests,
+    e.g., `_static/theme.0123456789.css` for `_static/theme.css`,
+    so that a web server or a CDN can let the browsers cache them forever.
+
+    The pages refer to the fingerprinted names (see `rewrite()`).
+    Inside the fingerprinted copies of the styles, the `url(...)` references to other assets,
+    such as fonts and images, are replaced with the fingerprinted names, too,
+    so the digest of a style changes whenever any of the files it loads changes.
+    The references between the styles themselves (e.g., `@import`) and the references from scripts are not rewritten,
+    so the original files stay in place for them.
+
+    The list of all fingerprinted files is saved in the output directory (see `save()`),
+    so that the deployment tools can mark them as immutable.
+    """
+
+    FILENAME = '.sobiraka-assets.json'
+
+    DIGEST_LENGTH = 10
+
+    def __init__(self, output_manifest: OutputManifest):
+        self.output_manifest: OutputManifest = output_manifest
+        self.mapping: dict[RelativePath, RelativePath] = {}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.mapping)} assets>'
+
+    async def add(self, paths: Iterable[RelativePath]) -> set[AbsolutePath]:
+        """
+        Create the fingerprinted copies of the given files, which must already be in the output directory.
+        Return the paths of the copies.
+        """
+        output = self.output_manifest.output
+        paths = sorted(set(paths) - self.mapping.keys())
+
+        # The styles refer to other assets, so their copies are created when the other assets' names are known
+        new_paths: dict[RelativePath, RelativePath] = {}
+        for path in paths:
+            file_digest = self.output_manifest.get_digest(output / path)
+            if file_digest is not None and path.suffix != '.css':
+                new_paths[path] = self._fingerprinted_name(path, file_digest)
+        await gather(*(to_thread(self.output_manifest.copy, output / path, output / fingerprinted)
+                       for path, fingerprinted in new_paths.items()))
+        self.mapping |= new_paths
+
+        styles = [path for path in paths if path.suffix == '.css' and self.output_manifest.get_digest(output / path)]
+        new_styles = dict(zip(styles, await gather(*(to_thread(self._add_style, path) for path in styles))))
+        self.mapping |= new_styles
+
+        return {output / fingerprinted for fingerprinted in (new_paths | new_styles).values()}
+
+    def _add_style(self, path: RelativePath) -> RelativePath:
+        """
+        Create the fingerprinted copy of a style, with the `url(...)` references pointing to the fingerprinted assets.
+        The digest in the name is calculated from the rewritten content.
+        """
+        output = self.output_manifest.output
+        css = (output / path).read_bytes().decode('utf-8', errors='surrogateescape')
+        data = self.rewrite_css(css, path.parent).encode('utf-8', errors='surrogateescape')
+        fingerprinted = self._fingerprinted_name(path, sha256(data).hexdigest())
+        self.output_manifest.write_bytes(output / fingerprinted, data)
+        return fingerprinted
+
+    def _fingerprinted_name(self, path: RelativePath, digest: str) -> RelativePath:
+        return path.with_name(f'{path.stem}.{digest[:self.DIGEST_LENGTH]}{path.suffix}')
+
+    def rewrite(self, html: str, start: RelativePath) -> str:
+        """
+        Replace the references to the assets in the `href` and `src` attributes with the fingerprinted names.
+        The `start` is the directory of the page, relative to the output directory.
+        """
+        def _replace(m: re.Match) -> str:
+            attribute, quote, url = m.groups()
+            new_url = self._rewrite_url(url, start)
+            return m.group() if new_url == url else f'{attribute}={quote}{new_url}{quote}'
+
+        return _URL_ATTRIBUTE.sub(_replace, html)
+
+    def rewrite_css(self, css: str, start: RelativePath) -> str:
+        """
+        Replace the references to the assets in the `url(...)` expressions with the fingerprinted names.
+        The `start` is the directory of the style, relative to the output directory.
+        """
+        def _replace(m: re.Match) -> str:
+            quote, url = m.groups()
+            new_url = self._rewrite_url(url, start)
+            return m.group() if new_url == url else f'url({quote}{new_url}{quote})'
+
+        return _CSS_URL.sub(_replace, css)
+
+    def _rewrite_url(self, url: str, start: RelativePath) -> str:
+        path, rest = re.fullmatch(r'([^?#]*)(.*)', url, flags=re.DOTALL).groups()
+        if not path or re.match(r'^(\w+:|/)', path):
+            return url
+
+        target = posixpath.normpath(posixpath.join(str(start), path))
+        if target.startswith('..') or (fingerprinted := self.mapping.get(RelativePath(target))) is None:
+            return url
+
+        path = posixpath.join(posixpath.dirname(path), fingerprinted.name)
+        return f'{path}{rest}'
+
+    def save(self, path: AbsolutePath):
+        """
+        Save the list of the assets and their fingerprinted names, relative to the output directory.
+        """
+        data = {str(k): str(v) for k, v in sorted(self.mapping.items())}
+        self.output_manifest.write_bytes(path, json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    def update(self, path: AbsolutePath):
+        """
+        Include the assets listed in another saved list, e.g., in the list of one of the shards.
+        """
+        data = json.loads(path.read_text())
+        self.mapping |= {RelativePath(k): RelativePath(v) for k, v in data.items()}
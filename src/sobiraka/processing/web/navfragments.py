@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import re
+from asyncio import Task, create_task
+from typing import Hashable, TYPE_CHECKING
+
+from sobiraka.models import Page, PageHref
+from sobiraka.models.config import CombinedToc
+from sobiraka.runtime import RT
+from ..toc import CollapsedToc, Toc, TocItem, toc
+
+if TYPE_CHECKING:
+    from .web import WebBuilder
+
+
+class NavFragments:
+    """
+    A cache of pre-rendered navigation fragments for `WebBuilder`.
+
+    The navigation is usually the biggest part of each page, and it is almost the same on all pages.
+    A theme can opt in by moving its navigation into a separate template
+    and inserting it into the page template via `{{ nav_fragment('nav.html') }}`.
+
+    Such a template is rendered only once for all pages that have the same root prefix
+    (i.e., that are placed at the same depth in the output directory).
+    For this to work, everything that depends on the current page must be generated by calling `item.state()`
+    instead of checking `item.is_current` or `item.is_breadcrumb` directly:
+
+        <a{{ item.state(current=" class='current'", breadcrumb=" class='selected'") }} href='{{ item.url }}'>
+
+    When rendering the fragment, both `item.state()` and `item.url` are placeholders,
+    which are then replaced with the correct values for each page.
+    The URLs are generated once per output directory, except for the links to the current page itself.
+    """
+
+    def __init__(self, builder: WebBuilder):
+        self.builder: WebBuilder = builder
+        self._fragments: dict[Hashable, Task[_Fragment]] = {}
+
+    async def render(self, template_name: str, page: Page) -> str:
+        key = self._key(template_name, page)
+        if key not in self._fragments:
+            self._fragments[key] = create_task(self._render(template_name, page))
+        fragment = await self._fragments[key]
+        return fragment.patch(page)
+
+    def _key(self, template_name: str, page: Page) -> Hashable:
+        """
+        Describe everything that makes the fragment for this page different from fragments for other pages,
+        except for the things that `item.state()` takes care of.
+        """
+        document = page.document
+        config = document.config.web
+
+        # Pages whose items would be collapsed if not for being the current page's breadcrumbs
+        expanded: list[Page] = []
+        for depth, breadcrumb in enumerate(page.breadcrumbs[1:], start=1):
+            if config.toc_depth <= depth or breadcrumb.meta.toc_collapse:
+                expanded.append(breadcrumb)
+
+        # The current page's local TOC may be included into the TOC
+        current: Page | None = page if config.combined_toc is CombinedToc.CURRENT else None
+
+        return document, template_name, _document_root_prefix(page), tuple(expanded), current
+
+    async def _render(self, template_name: str, page: Page) -> _Fragment:
+        document = page.document
+        config = document.config
+        theme = self.builder.themes[document]
+
+        fragment = _Fragment(self.builder)
+        tree = fragment.convert(toc(document.root_page,
+                                    builder=self.builder,
+                                    toc_depth=config.web.toc_depth,
+                                    combined_toc=config.web.combined_toc,
+                                    current_page=page))
+
+        with RT.TRACER.span('nav fragment', 'jinja', page=page):
+            template = theme.page_template.environment.get_template(template_name)
+            fragment.html = await template.render_async(
+                builder=self.builder,
+                project=document.project,
+                document=document,
+                config=config,
+                toc=lambda: tree,
+                ROOT=self.builder.get_root_prefix(page),
+                STATIC=self.builder.get_path_to_static(page),
+                RESOURCES=self.builder.get_path_to_resources(page),
+                theme_data=config.web.theme_data,
+                **config.variables,
+            )
+        return fragment
+
+
+def _document_root_prefix(page: Page) -> str:
+    location = page.meta.permalink or page.location
+    directory = location if location.is_dir else location.parent
+    return '../' * (str(directory).count('/') - 1)
+
+
+class _FragmentTocItem(TocItem):
+    """A `TocItem` whose `state()` and `url` are placeholders that are filled in separately for each page."""
+
+    fragment: _Fragment
+
+    def state(self, current: str, breadcrumb: str, other: str = '') -> str:
+        return self.fragment.placeholder(self.origin, current, breadcrumb, other)
+
+
+class _Fragment:
+    _PLACEHOLDER = re.compile(r'\x00(\d+)\x00')
+    _URL_PLACEHOLDER = re.compile(r'\x01(\d+)\x01')
+
+    def __init__(self, builder: WebBuilder):
+        self.builder: WebBuilder = builder
+        self.html: str = ''
+        self._states: list[tuple[object, str, str, str]] = []
+        self._hrefs: list[PageHref] = []
+        self._urls: dict[Hashable, dict[int, str]] = {}
+
+    def convert(self, tree: Toc) -> Toc:
+        """
+        Make a copy of a TOC with placeholder URLs and without any current or selected items.
+        """
+        result = Toc()
+        for item in tree:
+            self._hrefs.append(item.href)
+            new_item = _FragmentTocItem(item.title, f'\x01{len(self._hrefs) - 1}\x01',
+                                        number=item.number, href=item.href, origin=item.origin)
+            new_item.fragment = self
+            if item.is_collapsed:
+                new_item.children = CollapsedToc()
+            elif item.children:
+                new_item.children = self.convert(item.children)
+            result.append(new_item)
+        return result
+
+    def placeholder(self, origin: object, current: str, breadcrumb: str, other: str) -> str:
+        self._states.append((origin, current, breadcrumb, other))
+        return f'\x00{len(self._states) - 1}\x00'
+
+    def patch(self, page: Page) -> str:
+        breadcrumbs = frozenset(page.breadcrumbs)
+        urls = self._urls.setdefault(self.builder.get_url_base(page), {})
+
+        def replace(match: re.Match) -> str:
+            origin, current, breadcrumb, other = self._states[int(match.group(1))]
+            if origin is page:
+                return current
+            if isinstance(origin, Page) and origin in breadcrumbs:
+                return breadcrumb
+            return other
+
+        def replace_url(match: re.Match) -> str:
+            index = int(match.group(1))
+            href = self._hrefs[index]
+
+            # The URL of the current page itself is special, e.g., it may be empty
+            if href.target is page:
+                return self.builder.make_internal_url(href, page=page)
+
+            if index not in urls:
+                urls[index] = self.builder.make_internal_url(href, page=page)
+            return urls[index]
+
+        html = self._PLACEHOLDER.sub(replace, self.html)
+        return self._URL_PLACEHOLDER.sub(replace_url, html)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+from contextlib import suppress
+from hashlib import file_digest, sha256
+
+from sobiraka.utils import AbsolutePath, copy_file
+
+
+class OutputManifest:
+    """
+    Remembers the digests of all files in the output directory,
+    so that the files whose content has not changed since the previous build are not written again.
+    This keeps their modification times intact, which lets rsync and similar tools skip them.
+
+    The manifest is stored in the output directory itself.
+    Besides the digests, it lists the files that were changed or deleted by the latest build,
+    so that the deployment tools can upload only those.
+
+    For the files copied from elsewhere, the manifest also remembers the sizes and modification times of the sources,
+    so that the sources that did not change are not even read.
+    For the files derived from other output files (e.g., the compressed copies), it remembers the sources' digests,
+    so that the files are not derived again from the same content.
+    """
+
+    FILENAME = '.sobiraka-output.json'
+
+    def __init__(self, output: AbsolutePath, path: AbsolutePath = None):
+        self.output: AbsolutePath = output
+        self.path: AbsolutePath = path or output / self.FILENAME
+
+        self.old: dict[str, str] = {}
+        self.new: dict[str, str] = {}
+        self.old_sources: dict[str, str] = {}
+        self.new_sources: dict[str, str] = {}
+        self.changed: set[str] = set()
+
+        with suppress(OSError, ValueError, KeyError, TypeError):
+            data = json.loads(self.path.read_text())
+            self.old = dict(data['files'])
+            self.old_sources = dict(data['sources'])
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.path}>'
+
+    @property
+    def deleted(self) -> set[str]:
+        return self.old.keys() - self.new.keys()
+
+    def get_digest(self, target: AbsolutePath) -> str | None:
+        """
+        Get the digest of a file that was written or kept by the current build.
+        """
+        return self.new.get(self._key(target))
+
+    def write_bytes(self, target: AbsolutePath, data: bytes, *, derived_from: str = None):
+        """
+        Write the data to the target file, unless the file already contains exactly this data.
+
+        If the data was derived from another output file, pass that file's digest as `derived_from`,
+        so that the next build can use `keep_derived()`.
+        """
+        key = self._key(target)
+        if derived_from is not None:
+            self.new_sources[key] = derived_from
+        self.new[key] = sha256(data).hexdigest()
+        if self.old.get(key) == self.new[key] and _has_size(target, len(data)):
+            return
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        self.changed.add(key)
+
+    def copy(self, source: AbsolutePath, target: AbsolutePath):
+        """
+        Copy the source file to the target file, unless the target file already contains exactly the same data.
+        """
+        key = self._key(target)
+        stat = source.stat()
+        self.new_sources[key] = f'{stat.st_size}:{stat.st_mtime_ns}:{source}'
+
+        if self.old_sources.get(key) == self.new_sources[key] and key in self.old:
+            self.new[key] = self.old[key]
+        else:
+            with source.open('rb') as file:
+                self.new[key] = file_digest(file, 'sha256').hexdigest()
+        if self.old.get(key) == self.new[key] and _has_size(target, stat.st_size):
+            return
+
+        copy_file(source, target)
+        self.changed.add(key)
+
+    def keep(self, target: AbsolutePath):
+        """
+        Remember a file that is already in the output directory and must stay as it is,
+        e.g., a page that an incremental build decided not to render again, or a file generated by an external tool.
+        """
+        key = self._key(target)
+        with target.open('rb') as file:
+            self.new[key] = file_digest(file, 'sha256').hexdigest()
+        if self.old.get(key) != self.new[key]:
+            self.changed.add(key)
+
+    def keep_derived(self, target: AbsolutePath, derived_from: str) -> bool:
+        """
+        Keep a file that the previous build derived from the content with the given digest, if it is still there.
+        Return False if the file must be derived again.
+        """
+        key = self._key(target)
+        if self.old_sources.get(key) != derived_from or key not in self.old or not target.exists():
+            return False
+        self.new[key] = self.old[key]
+        self.new_sources[key] = derived_from
+        return True
+
+    def update(self, path: AbsolutePath):
+        """
+        Include the files listed in another saved manifest, e.g., in the manifest of one of the shards.
+        """
+        data = json.loads(path.read_text())
+        self.new_sources.update(data['sources'])
+        for key, value in data['files'].items():
+            self.new[key] = value
+            if self.old.get(key) != value:
+                self.changed.add(key)
+
+    def save(self):
+        data = dict(files=dict(sorted(self.new.items())),
+                    sources=dict(sorted(self.new_sources.items())),
+                    changed=sorted(self.changed),
+                    deleted=sorted(self.deleted))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, ensure_ascii=False, indent=1))
+
+    def _key(self, target: AbsolutePath) -> str:
+        return str(target.relative_to(self.output))
+
+
+def _has_size(path: AbsolutePath, size: int) -> bool:
+    try:
+        return path.stat().st_size == size
+    except OSError:
+        return False
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from asyncio import gather, to_thread
+from typing import Iterable
+
+from sobiraka.runtime import RT
+from sobiraka.utils import AbsolutePath, precompress
+from .outputmanifest import OutputManifest
+
+PRECOMPRESSED_SUFFIXES = '.html', '.css', '.js', '.mjs', '.json', '.svg', '.xml', '.txt'
+
+
+async def precompress_files(files: Iterable[AbsolutePath], output_manifest: OutputManifest) -> set[AbsolutePath]:
+    """
+    Save the gzip and Brotli copies next to the text files in the output directory,
+    e.g., `index.html.gz` and `index.html.br` next to `index.html`,
+    so that a web server can send them as is, without compressing anything on the fly
+    (see `gzip_static` and `brotli_static` in nginx).
+
+    Only the files tracked by the `output_manifest` are compressed.
+    The copies are only created again if the file's content has changed since the previous build.
+    The compression itself runs in separate processes (see `Scheduler.run_in_process()`).
+
+    Returns the paths of all copies.
+    """
+    files = sorted(file for file in files
+                   if file.suffix in PRECOMPRESSED_SUFFIXES and output_manifest.get_digest(file) is not None)
+    await gather(*(_precompress_file(file, output_manifest) for file in files))
+    return {copy for file in files for copy in _copies(file)}
+
+
+async def _precompress_file(file: AbsolutePath, output_manifest: OutputManifest):
+    source_digest = output_manifest.get_digest(file)
+    gz, br = _copies(file)
+    if output_manifest.keep_derived(gz, source_digest) and output_manifest.keep_derived(br, source_digest):
+        return
+
+    data = await to_thread(file.read_bytes)
+    with RT.TRACER.span('precompress', 'process', file=str(file)):
+        gz_data, br_data = await RT.SCHEDULER.run_in_process(precompress, data)
+    await to_thread(output_manifest.write_bytes, gz, gz_data, derived_from=source_digest)
+    await to_thread(output_manifest.write_bytes, br, br_data, derived_from=source_digest)
+
+
+def _copies(file: AbsolutePath) -> tuple[AbsolutePath, AbsolutePath]:
+    return file.with_name(f'{file.name}.gz'), file.with_name(f'{file.name}.br')
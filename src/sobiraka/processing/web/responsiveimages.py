@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import posixpath
+from asyncio import Task, gather, to_thread
+from dataclasses import dataclass
+from hashlib import sha256
+from html import escape
+from typing import Awaitable, TYPE_CHECKING
+
+import PIL.Image
+from panflute import Image
+
+from sobiraka.models import Page
+from sobiraka.models.config import Config_Web_Images
+from sobiraka.runtime import RT
+from sobiraka.utils import HtmlInline, RelativePath, digest, insert_after, resize_image
+
+if TYPE_CHECKING:
+    from .web import WebBuilder
+
+SOURCE_FORMATS = 'PNG', 'JPEG', 'WEBP'
+"""The formats of the images that can be scaled down. Other images, as well as animated ones, are left as is."""
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    target: RelativePath
+    """The variant's path, relative to the output directory."""
+
+    width: int
+
+    mime_type: str
+
+
+class ResponsiveImages:
+    """
+    Generates scaled down variants of the project's images, as configured in `web.images`,
+    and lets the browser choose the most suitable variant via the `srcset` attribute and the `<picture>` element.
+
+    Each image file is processed at most once per build, no matter how many pages use it.
+    The encoding is done in separate processes (see `Scheduler.run_in_process()`).
+    The encoded variants are saved in a persistent cache (see `RT.cache()`),
+    keyed by the source's content and the encoding settings, so the next builds only encode the changed images.
+    """
+
+    def __init__(self, builder: WebBuilder):
+        self.builder: WebBuilder = builder
+        self._tasks: dict[RelativePath, Task[tuple[ImageVariant, ...]]] = {}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self._tasks)} images>'
+
+    def get_variants(self, source: RelativePath, target: RelativePath,
+                     config: Config_Web_Images) -> Task[tuple[ImageVariant, ...]]:
+        """
+        Start generating the variants of the `source` image, which is copied to `target` in the output directory,
+        unless it is already being done.
+
+        The task's result includes the original image as the first variant.
+        """
+        if target not in self._tasks:
+            self._tasks[target] = self.builder.waiter.add_task(self._generate(source, target, config))
+        return self._tasks[target]
+
+    async def apply(self, image: Image, page: Page, variants: Awaitable[tuple[ImageVariant, ...]]):
+        """
+        Reference the image's variants from the element, wrapping it into `<picture>` if there are other formats.
+        Must be done before `apply_postponed_image_changes()`.
+        """
+        config: Config_Web_Images = page.document.config.web.images
+        base_url = posixpath.dirname(self.builder.get_relative_image_url(image, page))
+
+        if config.lazy:
+            image.attributes['loading'] = 'lazy'
+            image.attributes['decoding'] = 'async'
+
+        variants = await variants
+        if len(variants) == 0:
+            return
+        original_mime_type = variants[0].mime_type
+
+        candidates: dict[str, list[str]] = {}
+        for variant in sorted(variants, key=lambda v: v.width):
+            url = posixpath.join(base_url, variant.target.name)
+            candidates.setdefault(variant.mime_type, []).append(f'{url} {variant.width}w')
+        srcsets = {mime_type: ', '.join(urls) for mime_type, urls in candidates.items()}
+
+        if len(candidates[original_mime_type]) > 1:
+            image.attributes['srcset'] = srcsets[original_mime_type]
+            if config.sizes:
+                image.attributes['sizes'] = config.sizes
+
+        sources = ''
+        for mime_type, srcset in srcsets.items():
+            if mime_type != original_mime_type:
+                sources += f'<source type="{mime_type}" srcset="{escape(srcset)}"'
+                if config.sizes:
+                    sources += f' sizes="{escape(config.sizes)}"'
+                sources += '>'
+        if sources:
+            image.container.insert(image.container.list.index(image), HtmlInline(f'<picture>{sources}'))
+            insert_after(image, HtmlInline('</picture>'))
+
+    async def _generate(self, source: RelativePath, target: RelativePath,
+                        config: Config_Web_Images) -> tuple[ImageVariant, ...]:
+        fs = self.builder.project.fs
+        info = await RT.IMAGES.get_info(fs, source)
+        if info.format not in SOURCE_FORMATS or info.frames > 1:
+            return ()
+
+        # The original image stays as is, the smaller ones are encoded in its format and in all configured formats
+        widths = sorted(w for w in set(config.widths) if w < info.width)
+        variants = [ImageVariant(target, info.width, PIL.Image.MIME[info.format])]
+        jobs: list[tuple[ImageVariant, str]] = []
+        for width in widths:
+            jobs.append((ImageVariant(_variant_path(target, width, target.suffix), width, variants[0].mime_type),
+                         info.format))
+        for name in config.formats:
+            image_format = name.upper()
+            if image_format == info.format:
+                continue
+            PIL.Image.init()
+            if image_format not in PIL.Image.SAVE:
+                raise UnsupportedImageFormat(f'The installed Pillow cannot encode {image_format} images')
+            for width in widths + [info.width]:
+                jobs.append((ImageVariant(_variant_path(target, width, f'.{name}'), width, f'image/{name}'),
+                             image_format))
+        if not jobs:
+            return tuple(variants)
+
+        data = await to_thread(fs.read_bytes, source)
+        source_digest = sha256(data).hexdigest()
+        await gather(*(self._encode(data, source_digest, variant, image_format, config.quality)
+                       for variant, image_format in jobs))
+        return tuple(variants + [variant for variant, _ in jobs])
+
+    async def _encode(self, data: bytes, source_digest: str, variant: ImageVariant, image_format: str, quality: int):
+        key = digest(source_digest, str(variant.width), image_format, str(quality))
+        cache = RT.cache('responsive-images')
+        result: bytes | None = cache.get(key) if cache is not None else None
+
+        if result is None:
+            with RT.TRACER.span('resize image', 'process', target=str(variant.target)):
+                result = await RT.SCHEDULER.run_in_process(resize_image, data, variant.width, image_format, quality)
+            if cache is not None:
+                cache.set(key, result)
+
+        await to_thread(self.builder.add_file_from_data, variant.target, result)
+
+
+def _variant_path(target: RelativePath, width: int, suffix: str) -> RelativePath:
+    return target.with_name(f'{target.stem}-{width}w{suffix}')
+
+
+class UnsupportedImageFormat(Exception):
+    pass
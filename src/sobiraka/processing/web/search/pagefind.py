@@ -3,7 +3,7 @@ from asyncio.subprocess import Process, create_subprocess_exec
 from os.path import dirname
 from subprocess import PIPE
 from textwrap import dedent
-from typing import Iterable
+from typing import BinaryIO, Iterable
 
 from panflute import Element, Header, stringify
 from typing_extensions import override
@@ -24,18 +24,31 @@ class PagefindIndexer(SearchIndexer, PlainTextDispatcher):
     """
 
     node_process: Process = None
+    records_file: BinaryIO = None
 
     def default_index_path(self, document: Document) -> RelativePath:
         return RelativePath('_pagefind')
 
     async def initialize(self):
-        self.node_process = await create_subprocess_exec('node',
-                                                         f'{dirname(__file__)}/run_pagefind.js',
-                                                         '--indexPath', str(self.index_path),
-                                                         stdin=PIPE)
+        if self.records_path is not None:
+            self.records_path.parent.mkdir(parents=True, exist_ok=True)
+            self.records_file = self.records_path.open('wb')
+        else:
+            self.node_process = await _run_pagefind(self.index_path)
+
+    @staticmethod
+    async def merge(index_path: AbsolutePath, records_paths: Iterable[AbsolutePath]):
+        node_process = await _run_pagefind(index_path)
+        for records_path in records_paths:
+            node_process.stdin.write(records_path.read_bytes())
+            await node_process.stdin.drain()
+        node_process.stdin.close()
+        with RT.TRACER.span('node run_pagefind.js', 'process'):
+            await node_process.wait()
+        assert node_process.returncode == 0, 'Pagefind failure'
 
     def _add_record(self, *, url: str, title: str, content: str):
-        self.node_process.stdin.write(json.dumps(dict(
+        (self.records_file or self.node_process.stdin).write(json.dumps(dict(
             url=url,
             content=content,
             language=self.document.lang or 'en',
@@ -63,11 +76,18 @@ class PagefindIndexer(SearchIndexer, PlainTextDispatcher):
                                          content=fragment.text)
 
     async def finalize(self):
+        if self.records_file is not None:
+            self.records_file.close()
+            return
+
         self.node_process.stdin.close()
-        await self.node_process.wait()
+        with RT.TRACER.span('node run_pagefind.js', 'process', document=self.document.autoprefix):
+            await self.node_process.wait()
         assert self.node_process.returncode == 0, 'Pagefind failure'
 
     def results(self) -> set[AbsolutePath]:
+        if self.records_path is not None:
+            return {self.records_path}
         return set(self.index_path.walk_all())
 
     def head_tags(self) -> Iterable[HeadTag]:
@@ -90,3 +110,10 @@ class PagefindIndexer(SearchIndexer, PlainTextDispatcher):
     async def process_header(self, header: Header, page: Page):
         if header.level != 1:
             await super().process_header(header, page)
+
+
+async def _run_pagefind(index_path: AbsolutePath) -> Process:
+    return await create_subprocess_exec('node',
+                                        f'{dirname(__file__)}/run_pagefind.js',
+                                        '--indexPath', str(index_path),
+                                        stdin=PIPE)
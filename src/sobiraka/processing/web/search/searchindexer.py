@@ -21,6 +21,11 @@ class SearchIndexer(metaclass=ABCMeta):
         self.index_path_relative: RelativePath = index_path or self.default_index_path(document)
         self.index_path: AbsolutePath = builder.output / self.index_path_relative
 
+        # In a sharded build, the indexer only saves the records, and the index is created later by `merge()`
+        self.records_path: AbsolutePath | None = None
+        if builder.shard_dir is not None:
+            self.records_path = builder.shard_dir / 'search' / f'{document.autoprefix or "index"}.jsonl'
+
     def __repr__(self):
         return f'<{self.__class__.__name__}: {self.index_path_relative}>'
 
@@ -38,6 +43,13 @@ class SearchIndexer(metaclass=ABCMeta):
     async def finalize(self):
         pass
 
+    @staticmethod
+    @abstractmethod
+    async def merge(index_path: AbsolutePath, records_paths: Iterable[AbsolutePath]):
+        """
+        Create an index from the records saved by the indexers of several shards.
+        """
+
     @abstractmethod
     def results(self) -> set[AbsolutePath]:
         """
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Iterable
+
+from sobiraka.models import Document
+from sobiraka.models.config import SearchIndexerName
+from sobiraka.utils import AbsolutePath, RelativePath, delete_extra_files
+from .fingerprints import AssetFingerprints
+from .outputmanifest import OutputManifest
+from .precompression import precompress_files
+from .search import PagefindIndexer
+
+SHARDS_DIR = RelativePath('_shards')
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    One of the `count` parts of a web build, numbered starting from 1.
+
+    Each shard builds a subset of the project's documents.
+    The documents are distributed by their autoprefixes, so the same shard always gets the same documents,
+    no matter on which machine it is built.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if not 1 <= self.index <= self.count:
+            raise ValueError(f'Invalid shard: {self}')
+
+    def __str__(self):
+        return f'{self.index}/{self.count}'
+
+    @classmethod
+    def parse(cls, text: str) -> Shard:
+        m = re.fullmatch(r'(\d+)/(\d+)', text)
+        if m is None:
+            raise ValueError(f'Invalid shard: {text!r}')
+        return cls(int(m.group(1)), int(m.group(2)))
+
+    @property
+    def dirname(self) -> str:
+        return f'{self.index}-of-{self.count}'
+
+    def select(self, documents: Iterable[Document]) -> tuple[Document, ...]:
+        documents = sorted(documents, key=lambda d: d.autoprefix or '')
+        return tuple(d for i, d in enumerate(documents) if i % self.count == self.index - 1)
+
+
+@dataclass
+class SearchRecords:
+    engine: str
+    """The search engine name, as in `SearchIndexerName`."""
+
+    index_path: str
+    """Where the index must be created, relative to the output directory."""
+
+    records: str
+    """The file with the records, relative to the output directory."""
+
+
+@dataclass
+class ShardManifest:
+    """
+    Describes the partial output of a shard, so that `merge_shards()` can combine it with the outputs of other shards.
+
+    The manifest is stored in `_shards/K-of-N/manifest.json` inside the output directory.
+    """
+
+    shard: str
+    documents: list[str] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+    search: list[SearchRecords] = field(default_factory=list)
+    precompress: bool = False
+    """Whether the shard's documents have precompression enabled, see `precompress_files()`."""
+
+    @staticmethod
+    def path(output: AbsolutePath, shard: Shard) -> AbsolutePath:
+        return output / SHARDS_DIR / shard.dirname / 'manifest.json'
+
+    @classmethod
+    def load(cls, path: AbsolutePath) -> ShardManifest:
+        data = json.loads(path.read_text())
+        data['search'] = [SearchRecords(**s) for s in data['search']]
+        return cls(**data)
+
+    def save(self, path: AbsolutePath):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=1))
+
+
+async def merge_shards(output: AbsolutePath) -> int:
+    """
+    Finish a web build that was split into shards (see `Shard`).
+
+    The output directory must contain the partial outputs of all shards, including their manifests.
+    The search indexes are created from the records saved by all shards,
+    and precompressed if any shard had the precompression enabled,
+    then all files that none of the shards have generated are deleted, including the manifests.
+    The shards' output manifests are combined into one (see `OutputManifest`), as are the lists of fingerprinted assets.
+
+    Returns the exit code for the command line, which is always 0, because all problems are raised as exceptions.
+    """
+    paths = sorted((output / SHARDS_DIR).glob('*/manifest.json'))
+    manifests = [ShardManifest.load(path) for path in paths]
+    _check_complete(output, {Shard.parse(manifest.shard) for manifest in manifests})
+
+    output_manifest = OutputManifest(output)
+    fingerprints = AssetFingerprints(output_manifest)
+    results: set[AbsolutePath] = {output_manifest.path}
+    records: dict[tuple[SearchIndexerName, str], list[AbsolutePath]] = defaultdict(list)
+    for path, manifest in zip(paths, manifests):
+        results |= {output / file for file in manifest.files}
+        output_manifest.update(path.parent / OutputManifest.FILENAME)
+        if (path.parent / AssetFingerprints.FILENAME).exists():
+            fingerprints.update(path.parent / AssetFingerprints.FILENAME)
+        for search in manifest.search:
+            records[SearchIndexerName(search.engine), search.index_path].append(output / search.records)
+
+    index_files = await _merge_search_indexes(output, records, output_manifest)
+    results |= index_files
+
+    # The shards could not precompress the search indexes, because the indexes did not exist yet
+    if any(manifest.precompress for manifest in manifests):
+        results |= await precompress_files(index_files, output_manifest)
+
+    if fingerprints.mapping:
+        fingerprints.save(output / AssetFingerprints.FILENAME)
+        results.add(output / AssetFingerprints.FILENAME)
+
+    delete_extra_files(output, results)
+    output_manifest.save()
+    return 0
+
+
+async def _merge_search_indexes(
+        output: AbsolutePath,
+        records: dict[tuple[SearchIndexerName, str], list[AbsolutePath]],
+        output_manifest: OutputManifest,
+) -> set[AbsolutePath]:
+    index_files: set[AbsolutePath] = set()
+    for (engine, index_path), records_files in records.items():
+        indexer_class = {
+            SearchIndexerName.PAGEFIND: PagefindIndexer,
+        }[engine]
+        await indexer_class.merge(output / index_path, records_files)
+        for file in (output / index_path).walk_all():
+            index_files.add(file)
+            if file.is_file():
+                output_manifest.keep(file)
+    return index_files
+
+
+def _check_complete(output: AbsolutePath, shards: set[Shard]):
+    if not shards:
+        raise IncompleteShards(f'No shard manifests found in {output}')
+    count = max(shard.count for shard in shards)
+    if shards != {Shard(i, count) for i in range(1, count + 1)}:
+        raise IncompleteShards(f'Expected shards 1/{count}...{count}/{count}, '
+                               f'found: {", ".join(sorted(map(str, shards)))}')
+
+
+class IncompleteShards(Exception):
+    pass
@@ -1,39 +1,75 @@
 from __future__ import annotations
 
-from asyncio import create_task, to_thread
+from asyncio import Task, create_task, to_thread, wait
 from datetime import datetime
 from functools import lru_cache
 from os.path import relpath
-from shutil import copyfile
 from typing import final
 
 import iso639
 from panflute import Image
 from typing_extensions import override
 
-from sobiraka.models import Document, FileSystem, Page, PageHref, Project
+from sobiraka.models import Document, FileSystem, Page, PageHref, Project, RealFileSystem, Status
 from sobiraka.models.config import Config, Config_HighlightJS, Config_Prism, Config_Pygments, SearchIndexerName
 from sobiraka.processing.html import AbstractHtmlBuilder, AbstractHtmlProcessor, AbstractHtmlTheme, HeadCssFile, \
     HeadJsFile
-from sobiraka.processing.html.highlight import HighlightJs, Highlighter, Prism, Pygments
+from sobiraka.processing.html.highlight import HighlightJs, Highlighter, JavaScriptHighlighterLibrary, Prism, \
+    Pygments
 from sobiraka.runtime import RT
-from sobiraka.utils import AbsolutePath, RelativePath, convert_or_none, delete_extra_files, expand_vars
+from sobiraka.utils import AbsolutePath, RelativePath, convert_or_none, delete_extra_files, digest, expand_vars, \
+    minify_html
+from .fingerprints import AssetFingerprints
+from .navfragments import NavFragments
+from .outputmanifest import OutputManifest
+from .precompression import precompress_files
+from .responsiveimages import ResponsiveImages
 from .search import PagefindIndexer, SearchIndexer
-from ..abstract import ThemeableProjectBuilder
+from .shards import SHARDS_DIR, SearchRecords, Shard, ShardManifest
+from ..abstract import BuildCache, ThemeableProjectBuilder
 from ..load_processor import load_processor
 
 
 @final
 class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHtmlBuilder):
+    # pylint: disable=too-many-public-methods
 
-    def __init__(self, project: Project, output: AbsolutePath, *, hide_index_html: bool = False):
+    def __init__(self, project: Project, output: AbsolutePath, *,
+                 hide_index_html: bool = False,
+                 incremental: bool = False,
+                 shard: Shard = None):
         ThemeableProjectBuilder.__init__(self, project)
         AbstractHtmlBuilder.__init__(self)
 
         self.output: AbsolutePath = output
         self.hide_index_html: bool = hide_index_html
+        self.incremental: bool = incremental
+
+        # In a sharded build, the pages of other shards' documents are only discovered,
+        # so that the links to them can be resolved. If a page links to such a page, it is also parsed, not rendered.
+        self.shard: Shard | None = shard
+        self.shard_dir: AbsolutePath | None = None
+        self._built_documents: tuple[Document, ...] = self.get_documents()
+        if shard is not None:
+            self.shard_dir = output / SHARDS_DIR / shard.dirname
+            self._built_documents = shard.select(self.get_documents())
+            for document in self.get_documents():
+                if document not in self._built_documents:
+                    self.waiter.target_statuses[document] = Status.LOAD
+
+        # Files whose content did not change since the previous build are not written again
+        self.output_manifest = OutputManifest(output, self.shard_dir and self.shard_dir / OutputManifest.FILENAME)
+        self.fingerprints = AssetFingerprints(self.output_manifest)
+
+        self.nav_fragments = NavFragments(self)
+        self.responsive_images = ResponsiveImages(self)
 
         self._indexers: dict[Document, SearchIndexer] = {}
+        self._copy_tasks: dict[tuple[AbsolutePath | RelativePath, AbsolutePath], Task] = {}
+        self._last_copy_tasks: dict[AbsolutePath, Task] = {}
+        self._static_tasks: list[Task] = []
+        self._structure_digests: dict[Document, Task[str]] = {}
+        self._fingerprints: Task | None = None
 
     def init_processor(self, document: Document) -> WebProcessor:
         fs: FileSystem = self.project.fs
@@ -54,14 +90,24 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
     async def run(self):
         self.output.mkdir(parents=True, exist_ok=True)
 
-        for document in self.get_documents():
+        if self.incremental:
+            cache_name = 'web.json' if self.shard is None else f'web-{self.shard.dirname}.json'
+            self.build_cache = BuildCache(RT.TMP / 'incremental' / cache_name, self.get_fingerprint())
+
+        static_dirs: set[AbsolutePath] = set()
+        for document in self.get_built_documents():
             theme = self.themes[document]
 
             # Prepare non-page processing tasks
-            self.waiter.add_task(self.add_directory_from_location(theme.static_dir, RelativePath('_static')))
+            # (many documents usually share the same theme, so each static directory is only copied once)
+            if theme.static_dir not in static_dirs:
+                static_dirs.add(theme.static_dir)
+                self._static_tasks.append(self.waiter.add_task(
+                    self.add_directory_from_location(theme.static_dir, RelativePath('_static'))))
             self.process3_tasks[document].append(create_task(self.add_custom_files(document)))
             self.process3_tasks[document].append(create_task(self.compile_theme_sass(theme, document)))
             self.process3_tasks[document].append(create_task(self.prepare_search_indexer(document)))
+            self.process3_tasks[document].append(create_task(self._bundle_highlighter(document)))
 
         # Wait until all pages will be generated and all additional files will be copied to the output directory
         # This may include tasks that started as a side effect of generating the HTML pages
@@ -71,8 +117,50 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
         for indexer in self._indexers.values():
             await indexer.finalize()
             self._results |= indexer.results()
-
-        delete_extra_files(self.output, self._results)
+            if self.shard is None:
+                for file in indexer.results():
+                    if file.is_file():
+                        self.output_manifest.keep(file)
+
+        if any(document.config.web.fingerprint for document in self.get_built_documents()):
+            # Even if no page was rendered in an incremental build, the kept pages still refer to the assets
+            await self._fingerprint_assets()
+            fingerprints_path = (self.shard_dir or self.output) / AssetFingerprints.FILENAME
+            self.fingerprints.save(fingerprints_path)
+            self._results.add(fingerprints_path)
+
+        if any(document.config.web.precompress for document in self.get_built_documents()):
+            self._results |= await precompress_files(self._results, self.output_manifest)
+
+        if self.shard is None:
+            self._results.add(self.output_manifest.path)
+            delete_extra_files(self.output, self._results)
+        else:
+            # Other shards may be writing into the same directory, so leave the cleanup to `merge_shards()`
+            self._save_shard_manifest()
+        self.output_manifest.save()
+
+        if self.build_cache is not None:
+            self.build_cache.save()
+
+    def get_built_documents(self) -> tuple[Document, ...]:
+        """
+        The documents for which this builder generates the output.
+        These are all documents of the project, unless the build is sharded.
+        """
+        return self._built_documents
+
+    def _save_shard_manifest(self):
+        manifest = ShardManifest(str(self.shard))
+        manifest.documents = [document.autoprefix for document in self.get_built_documents()]
+        manifest.precompress = any(document.config.web.precompress for document in self.get_built_documents())
+        manifest.files = sorted(str(file.relative_to(self.output)) for file in self._results
+                                if not file.is_relative_to(self.shard_dir))
+        for indexer in self._indexers.values():
+            manifest.search.append(SearchRecords(engine=indexer.document.config.web.search.engine.value,
+                                                 index_path=str(indexer.index_path_relative),
+                                                 records=str(indexer.records_path.relative_to(self.output))))
+        manifest.save(ShardManifest.path(self.output, self.shard))
 
     @override
     async def do_process4(self, page: Page):
@@ -80,13 +168,27 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
             await indexer.add_page(page)
 
         await super().do_process4(page)
-        await self.decorate_html(page)
 
         target_file = self.output / self.get_target_path(page)
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-        target_file.write_bytes(RT[page].bytes)
         self._results.add(target_file)
 
+        # In an incremental build, keep the previous output if nothing that affects it has changed
+        if self.build_cache is not None:
+            if self.build_cache.is_rendered(page, await self.get_rendering_digest(page)):
+                if target_file.exists():
+                    self.output_manifest.keep(target_file)
+                    return
+
+        await self.decorate_html(page)
+        if page.document.config.web.fingerprint:
+            await self._fingerprint_assets()
+            html = self.fingerprints.rewrite(RT[page].bytes.decode('utf-8'), self.get_target_path(page).parent)
+            RT[page].bytes = html.encode('utf-8')
+        if page.document.config.web.minify:
+            RT[page].bytes = minify_html(RT[page].bytes.decode('utf-8')).encode('utf-8')
+
+        self.output_manifest.write_bytes(target_file, RT[page].bytes)
+
     async def decorate_html(self, page: Page):
         from ..toc import local_toc, toc
 
@@ -98,39 +200,148 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
         root_prefix = self.get_root_prefix(page)
         head = self.heads[document].render(root_prefix)
 
-        html = await theme.page_template.render_async(
-            builder=self,
-
-            project=project,
-            document=document,
-            config=config,
-            page=page,
-
-            number=RT[page].number,
-            title=page.meta.title,
-            body=RT[page].bytes.decode('utf-8').strip(),
-
-            head=head,
-            now=datetime.now(),
-            toc=lambda **kwargs: toc(document.root_page,
-                                     builder=self,
-                                     toc_depth=document.config.web.toc_depth,
-                                     combined_toc=document.config.web.combined_toc,
-                                     current_page=page,
-                                     **kwargs),
-            local_toc=lambda: local_toc(page, builder=self, current_page=page),
-            Language=iso639.Language,
-
-            ROOT=root_prefix,
-            ROOT_PAGE=self.make_internal_url(PageHref(document.root_page), page=page),
-            STATIC=self.get_path_to_static(page),
-            RESOURCES=self.get_path_to_resources(page),
-            theme_data=document.config.web.theme_data,
-            **document.config.variables,
-        )
+        with RT.TRACER.span('page template', 'jinja', page=page):
+            html = await theme.page_template.render_async(
+                builder=self,
+
+                project=project,
+                document=document,
+                config=config,
+                page=page,
+
+                number=RT[page].number,
+                title=page.meta.title,
+                body=RT[page].bytes.decode('utf-8').strip(),
+
+                head=head,
+                now=datetime.now(),
+                toc=lambda **kwargs: toc(document.root_page,
+                                         builder=self,
+                                         toc_depth=document.config.web.toc_depth,
+                                         combined_toc=document.config.web.combined_toc,
+                                         current_page=page,
+                                         **kwargs),
+                local_toc=lambda: local_toc(page, builder=self, current_page=page),
+                nav_fragment=lambda template_name: self.nav_fragments.render(template_name, page),
+                Language=iso639.Language,
+
+                ROOT=root_prefix,
+                ROOT_PAGE=self.make_internal_url(PageHref(document.root_page), page=page),
+                STATIC=self.get_path_to_static(page),
+                RESOURCES=self.get_path_to_resources(page),
+                theme_data=document.config.web.theme_data,
+                **document.config.variables,
+            )
 
         RT[page].bytes = html.encode('utf-8')
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Incremental builds
+
+    def get_fingerprint(self) -> str:
+        """
+        Calculate a digest of everything that affects all pages at once:
+        the project config, the themes, the custom processors and the builder's own options.
+        If any of these change, an incremental build turns into a full one.
+        """
+        parts: list[str | bytes] = [RT.VERSION, str(self.output), str(self.hide_index_html)]
+
+        if manifest_path := getattr(self.project, 'manifest_path', None):
+            parts.append(manifest_path.read_bytes())
+
+        theme_dirs: set[AbsolutePath] = set()
+        for document in self.get_documents():
+            theme_dirs.add(self.themes[document].theme_dir)
+            if document.config.web.processor:
+                parts.append(self.project.fs.read_bytes(document.config.web.processor))
+        for theme_dir in sorted(theme_dirs):
+            for path in sorted(theme_dir.walk_all()):
+                if path.is_file():
+                    parts += str(path), path.read_bytes()
+
+        return digest(*parts)
+
+    async def get_rendering_digest(self, page: Page) -> str:
+        """
+        Calculate a digest of everything that `decorate_html()` uses for the given page.
+        Must be called after the page's body is rendered.
+        """
+        if page.document not in self._structure_digests:
+            self._structure_digests[page.document] = create_task(self._get_structure_digest(page.document))
+
+        fingerprints = ''
+        if page.document.config.web.fingerprint:
+            await self._fingerprint_assets()
+            fingerprints = repr(sorted(self.fingerprints.mapping.items()))
+
+        return digest(RT[page].bytes,
+                      repr(page.meta),
+                      str(RT[page].number),
+                      str(self.get_target_path(page)),
+                      self.heads[page.document].render(self.get_root_prefix(page)),
+                      fingerprints,
+                      await self._structure_digests[page.document])
+
+    async def _get_structure_digest(self, document: Document) -> str:
+        """
+        Calculate a digest of the document's pages' locations, metadata and numbers,
+        which are used by the navigation elements present on every page of the document.
+        Must be called after the document's third stage, which is always the case for its pages' fourth stage.
+
+        Other documents can only affect a page via its translations (see `Project.get_all_translations()`),
+        which are found by their locations and linked by their permalinks.
+        These are known as soon as the pages are discovered, so there is no need to wait for their processing.
+        """
+        await self.waiter.wait_recursively(document.root, Status.PROCESS3)
+        parts: list[str] = []
+        for page in document.all_pages():
+            parts += str(page.location), repr(page.meta), str(RT[page].number)
+        for other in self.get_documents():
+            if other is not document:
+                await self.waiter.wait_recursively(other.root, Status.LOAD)
+                for page in other.all_pages():
+                    parts += str(page.location), str(page.meta.permalink)
+        return digest(*parts)
+
+    # endregion
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Asset fingerprints
+
+    async def _fingerprint_assets(self):
+        if self._fingerprints is None:
+            self._fingerprints = create_task(self._do_fingerprint_assets())
+        await self._fingerprints
+
+    async def _do_fingerprint_assets(self):
+        """
+        Wait until all static assets are in the output directory, then create their fingerprinted copies.
+
+        The assets are the files in `_static` and all styles and scripts linked from the pages' heads.
+        They are produced by copying the themes' static directories and by the documents' third stage
+        (the custom files, the theme styles, the highlighters' files).
+        """
+        for document in self.get_built_documents():
+            await self.waiter.wait_recursively(document.root, Status.PROCESS3)
+        if self._static_tasks:
+            await wait(self._static_tasks)
+
+        paths: set[RelativePath] = set()
+        for head in self.heads.values():
+            paths |= {tag.path for tag in head if isinstance(tag, (HeadCssFile, HeadJsFile))}
+        static_dir = self.output / '_static'
+        # Other tasks may still be adding files, so iterate over a copy
+        paths |= {file.relative_to(self.output) for file in list(self._results) if file.is_relative_to(static_dir)}
+
+        copy_tasks = [self._last_copy_tasks[self.output / path] for path in paths
+                      if self.output / path in self._last_copy_tasks]
+        if copy_tasks:
+            await wait(copy_tasks)
+
+        self._results |= await self.fingerprints.add(paths)
+
+    # endregion
+
     def get_target_path(self, page: Page) -> RelativePath:
         document: Document = page.document
         config: Config = page.document.config
@@ -166,6 +377,12 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
             result += '#' + href.anchor
         return result
 
+    @override
+    def get_url_base(self, page: Page) -> str:
+        # The relative URLs only depend on the directory that the page's file is in
+        location = page.meta.permalink or page.location
+        return str(location if location.is_dir else location.parent)
+
     def get_root_prefix(self, page: Page) -> str:
         start = self.output / self.get_target_path(page)
         root_prefix = self.output.relative_to(start.parent)
@@ -204,7 +421,7 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
             match source.suffix:
                 case '.css':
                     target = RelativePath() / source.name
-                    self.waiter.add_task(self.add_file_from_project(source, target))
+                    await self.add_file_from_project(source, target)
                     self.heads[document].append(HeadCssFile(target))
 
                 case '.sass' | '.scss':
@@ -217,6 +434,28 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
                 case _:
                     raise ValueError(source)
 
+    async def _bundle_highlighter(self, document: Document):
+        """
+        If the document's JavaScript highlighter is configured to make a bundle,
+        wait until all code blocks in the document are highlighted, then write the bundle and add it to the head.
+        """
+        config = document.config.web.highlight
+        if not isinstance(config, (Config_HighlightJS, Config_Prism)) or not config.bundle:
+            return
+
+        await self.waiter.wait_recursively(document.root, Status.PROCESS2)
+        highlighter = self.processors[document].get_highlighter(document)
+        assert isinstance(highlighter, JavaScriptHighlighterLibrary)
+        if not highlighter.languages:
+            return
+
+        target, data = await to_thread(highlighter.make_bundle)
+        self.add_file_from_data(target, data)
+        self.heads[document].append(HeadJsFile(target))
+
+        # The bundle's name already includes its digest, so it needs no fingerprinted copy
+        self.fingerprints.mapping[target] = target
+
     async def prepare_search_indexer(self, document: Document):
         config: Config = document.config
         if config.web.search.engine is None:
@@ -244,25 +483,44 @@ class WebBuilder(ThemeableProjectBuilder['WebProcessor', 'WebTheme'], AbstractHt
     @override
     def add_file_from_data(self, target: RelativePath, data: str | bytes):
         target = self.output / target
-        target.parent.mkdir(parents=True, exist_ok=True)
         if isinstance(data, str):
-            target.write_text(data)
-        else:
-            target.write_bytes(data)
+            data = data.encode('utf-8')
+        self.output_manifest.write_bytes(target, data)
         self._results.add(target)
 
     @override
     async def add_file_from_location(self, source: AbsolutePath, target: RelativePath):
-        target = self.output / target
-        target.parent.mkdir(parents=True, exist_ok=True)
-        await to_thread(copyfile, source, target)
-        self._results.add(target)
+        await self._copy_once(source, self.output / target)
 
     @override
     async def add_file_from_project(self, source: RelativePath, target: RelativePath):
-        target = self.output / target
-        await to_thread(self.project.fs.copy, source, target)
+        fs: FileSystem = self.project.fs
+        if isinstance(fs, RealFileSystem):
+            await self._copy_once(fs.resolve(source), self.output / target)
+        else:
+            await self._copy_once(source, self.output / target)
+
+    async def _copy_once(self, source: AbsolutePath | RelativePath, target: AbsolutePath):
+        """
+        Copy a file to the output directory, unless it is already copied or being copied.
+        The same image is often used on many pages, but there is no need to copy it more than once.
+
+        If different files are copied to the same target, they are all copied, one after another.
+        """
         self._results.add(target)
+        if (source, target) not in self._copy_tasks:
+            task = create_task(self._copy(source, target, after=self._last_copy_tasks.get(target)))
+            self._copy_tasks[source, target] = self._last_copy_tasks[target] = task
+        await self._copy_tasks[source, target]
+
+    async def _copy(self, source: AbsolutePath | RelativePath, target: AbsolutePath, *, after: Task = None):
+        if after is not None:
+            await wait([after])
+        with RT.TRACER.span('copy', 'io', source=str(source), target=str(target)):
+            if isinstance(source, AbsolutePath):
+                await to_thread(self.output_manifest.copy, source, target)
+            else:
+                await to_thread(lambda: self.output_manifest.write_bytes(target, self.project.fs.read_bytes(source)))
 
 
 class WebProcessor(AbstractHtmlProcessor[WebBuilder]):
@@ -278,6 +536,24 @@ class WebProcessor(AbstractHtmlProcessor[WebBuilder]):
             case Config_Pygments() as config_pygments:
                 return Pygments(config_pygments, self.builder)
 
+    @override
+    async def process_image(self, image: Image, page: Page) -> tuple[Image, ...]:
+        config: Config = page.document.config
+
+        image, = await super().process_image(image, page)
+        assert isinstance(image, Image)
+
+        # Generate the smaller variants of the image and let the browser choose between them
+        if image.url is not None and config.web.images is not None:
+            variants = self.builder.responsive_images.get_variants(
+                config.paths.resources / image.url,
+                RelativePath(config.web.resources_prefix) / image.url,
+                config.web.images)
+            self.builder.process4_tasks[page].append(create_task(
+                self.builder.responsive_images.apply(image, page, variants)))
+
+        return image,
+
 
 @final
 class WebTheme(AbstractHtmlTheme):
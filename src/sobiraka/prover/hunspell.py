@@ -8,6 +8,7 @@ from tempfile import TemporaryDirectory
 from typing import Generator, Sequence
 
 from sobiraka.models import FileSystem, RealFileSystem
+from sobiraka.runtime import RT
 from sobiraka.utils import AbsolutePath, RelativePath
 
 
@@ -69,6 +70,16 @@ async def run_hunspell(words: Sequence[str], fs: FileSystem, dictionaries: Seque
     if not words:
         return ()
 
+    async with RT.SCHEDULER.slot():
+        with RT.TRACER.span('hunspell', 'process', words=len(words)):
+            return await _run_hunspell(words, fs, dictionaries)
+
+
+async def _run_hunspell(
+        words: Sequence[str],
+        fs: FileSystem,
+        dictionaries: Sequence[str | RelativePath],
+) -> Sequence[str]:
     with _prepare_hunspell_environ(fs, dictionaries) as environ:
         hunspell = await create_subprocess_exec('hunspell', env=environ, stdin=PIPE, stdout=PIPE)
 
@@ -1,3 +1,7 @@
 from .anchorruntime import AnchorRuntime
+from .images import ImageInfo, Images
 from .pageruntime import PageRuntime
 from .runtime import RT, Runtime
+from .scheduler import Scheduler
+from .sharedasts import SharedAsts
+from .tracer import Tracer
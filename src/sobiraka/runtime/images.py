@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from asyncio import Task, create_task, to_thread
+from dataclasses import dataclass
+from typing import Hashable, TYPE_CHECKING
+
+import PIL.Image
+
+from ..utils import RelativePath
+
+if TYPE_CHECKING:
+    from sobiraka.models import FileSystem
+    from .runtime import Runtime
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    width: int
+    height: int
+    format: str | None
+    """The file format, as detected by Pillow, e.g., `PNG` or `JPEG`."""
+
+    mode: str | None = None
+    """The pixel format, as detected by Pillow, e.g., `RGB` or `RGBA`."""
+
+    frames: int = 1
+    """The number of frames in an animated image."""
+
+    @property
+    def ratio(self) -> float:
+        return self.width / self.height
+
+
+class Images:
+    """
+    Reads basic information about the project's image files, such as their dimensions.
+    Any theme, processor or builder can use it via `RT.IMAGES`.
+
+    Only the image headers are read, in a separate thread, and each file is read at most once per build.
+    The results for the files on a real filesystem are also saved in a persistent cache (see `RT.cache()`),
+    keyed by the file's path, size and modification time, so the next builds do not read the unchanged files at all.
+    """
+
+    def __init__(self, runtime: Runtime):
+        self.runtime: Runtime = runtime
+        self._tasks: dict[Hashable, Task[ImageInfo]] = {}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self._tasks)} images>'
+
+    async def get_info(self, fs: FileSystem, path: RelativePath) -> ImageInfo:
+        from sobiraka.models import RealFileSystem
+
+        key: Hashable
+        if isinstance(fs, RealFileSystem):
+            real_path = fs.resolve(path)
+            stat = await to_thread(real_path.stat)
+            key = f'{real_path}:{stat.st_size}:{stat.st_mtime_ns}'
+        else:
+            key = fs, path
+
+        if key not in self._tasks:
+            self._tasks[key] = create_task(self._get_info(key, fs, path))
+        return await self._tasks[key]
+
+    async def _get_info(self, key: Hashable, fs: FileSystem, path: RelativePath) -> ImageInfo:
+        cache = self.runtime.cache('images') if isinstance(key, str) else None
+        if cache is not None:
+            info = cache.get(key)
+            if info is not None:
+                return info
+
+        with self.runtime.TRACER.span('image info', 'io', path=str(path)):
+            info = await to_thread(_read_info, fs, path)
+
+        if cache is not None:
+            cache.set(key, info)
+        return info
+
+
+def _read_info(fs: FileSystem, path: RelativePath) -> ImageInfo:
+    with fs.open_bytes(path) as file:
+        with PIL.Image.open(file) as pil:
+            return ImageInfo(width=pil.width,
+                             height=pil.height,
+                             format=pil.format,
+                             mode=pil.mode,
+                             frames=getattr(pil, 'n_frames', 1))
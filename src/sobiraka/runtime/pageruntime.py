@@ -1,10 +1,14 @@
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 from panflute import Doc, Image, Link
 
 from sobiraka.models import Anchors, Href
 from sobiraka.utils import TocNumber, Unnumbered
 
+if TYPE_CHECKING:
+    from sobiraka.processing.toc import TocNode
+
 
 @dataclass
 class PageRuntime:
@@ -39,3 +43,10 @@ class PageRuntime:
 
     converted_image_urls: list[tuple[Image, str]] = field(default_factory=list)
     links_that_follow_images: list[tuple[Image, Link]] = field(default_factory=list)
+
+    toc_node: 'TocNode' = None
+    """
+    The page's precomputed part of the TOC, shared by all TOCs that include this page.
+    
+    Built by `toc_node()` on the first `toc()` call after the `do_process3()`.
+    """
@@ -5,8 +5,15 @@ from collections import defaultdict
 from contextvars import ContextVar, copy_context
 from typing import Coroutine, TYPE_CHECKING, overload
 
+from diskcache import Cache
+
 from .anchorruntime import AnchorRuntime
+from .images import Images
 from .pageruntime import PageRuntime
+from .scheduler import Scheduler
+from .sharedasts import SharedAsts
+from .tracer import Tracer
+from ..pandoc import Pandoc
 from ..utils import AbsolutePath
 
 if TYPE_CHECKING:
@@ -22,6 +29,14 @@ class Runtime:
         self.TMP: AbsolutePath | None = None
         self.DEBUG: bool = bool(os.environ.get('SOBIRAKA_DEBUG'))
         self.CLASSES: dict[int, str] = {}
+        self.IMAGES: Images = Images(self)
+        self.PANDOC: Pandoc = Pandoc()
+        self.SCHEDULER: Scheduler = Scheduler()
+        self.SHARED_ASTS: SharedAsts | None = None
+        self.TRACER: Tracer = Tracer()
+        self.VERSION: str = (AbsolutePath(__file__).parent.parent / 'VERSION').read_text().strip()
+
+        self._caches: dict[AbsolutePath, Cache] = {}
 
     @classmethod
     def init_context_vars(cls):
@@ -37,6 +52,30 @@ class Runtime:
         ctx = copy_context()
         return await ctx.run(wrapped_func)
 
+    def cache(self, name: str, **settings) -> Cache | None:
+        """
+        Get a persistent cache that lives in a subdirectory of `TMP` and survives between runs.
+        If `TMP` is not set, return `None`, and the caller is expected to work without caching.
+
+        The `settings` are passed to `diskcache.Cache` when the cache is opened for the first time,
+        e.g., `size_limit` and `eviction_policy`.
+        """
+        if self.TMP is None:
+            return None
+        directory = self.TMP / 'cache' / name
+        if directory not in self._caches:
+            self._caches[directory] = Cache(directory, **settings)
+        return self._caches[directory]
+
+    def close_caches(self):
+        """
+        Close all persistent caches opened by `cache()`.
+        Useful before `TMP` is changed or deleted, because otherwise the caches would keep their files open.
+        """
+        for cache in self._caches.values():
+            cache.close()
+        self._caches.clear()
+
     @overload
     def __getitem__(self, page: Anchor) -> AnchorRuntime:
         ...
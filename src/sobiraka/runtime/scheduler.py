@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from asyncio import CancelledError, Future, get_running_loop, to_thread
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from multiprocessing import get_context
+from typing import AsyncIterator, Callable, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class Scheduler:
+    """
+    A global limit on how many heavy operations (external processes, CPU-bound rendering) may run at once.
+
+    Each operation is wrapped in `async with RT.SCHEDULER.slot(key)`.
+    When all slots are busy, the operations wait in a queue.
+    Normally, the queue is first-in-first-out, but the operations whose key was passed to `prioritize()`
+    (usually pages that somebody is explicitly waiting for) jump to the front of the queue.
+    A key stops being prioritized as soon as an operation with that key gets a slot.
+
+    CPU-bound Python functions can be run in a pool of processes via `run_in_process()`, also one per slot.
+    """
+
+    def __init__(self, jobs: int | None = None):
+        self.jobs: int = jobs or os.cpu_count() or 1
+        self.running: int = 0
+        self.waiting: int = 0
+        self._waiters: deque[tuple[Hashable, Future]] = deque()
+        self._urgent_waiters: deque[tuple[Hashable, Future]] = deque()
+        self._waiters_by_key: dict[Hashable, list[tuple[Hashable, Future]]] = {}
+        self._urgent: set[Hashable] = set()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.running}/{self.jobs} running, {self.waiting} waiting>'
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable = None) -> AsyncIterator[None]:
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._wake_up()
+
+    async def run_in_process(self, func: Callable[..., T], *args, key: Hashable = None) -> T:
+        """
+        Run the function in a separate process, as soon as a slot is available.
+
+        The processes are started from scratch, not forked, so the function and its arguments must be picklable,
+        and the function's module should be cheap to import.
+        """
+        async with self.slot(key):
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.jobs, mp_context=get_context('spawn'))
+            return await get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def shutdown(self):
+        """
+        Stop the processes started by `run_in_process()`, if any.
+        """
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await to_thread(pool.shutdown)
+
+    def prioritize(self, key: Hashable):
+        """
+        Let the operations with the given key skip ahead of other waiting operations,
+        including those that are already in the queue.
+        """
+        if key in self._urgent:
+            return
+        self._urgent.add(key)
+
+        # Copy the already waiting operations to the urgent queue
+        # (the copies left in the regular queue will be skipped, because their futures will be done by then)
+        self._urgent_waiters.extend(self._waiters_by_key.get(key, ()))
+
+    async def _acquire(self, key: Hashable):
+        if self.running < self.jobs and not self.waiting:
+            self.running += 1
+            self._urgent.discard(key)
+            return
+
+        waiter = key, get_running_loop().create_future()
+        if key in self._urgent:
+            self._urgent_waiters.append(waiter)
+        self._waiters.append(waiter)
+        self._waiters_by_key.setdefault(key, []).append(waiter)
+        self.waiting += 1
+        try:
+            await waiter[1]
+        except CancelledError:
+            # A cancelled waiter is left in the queues and skipped later
+            if waiter[1].cancelled():
+                self._forget(waiter)
+            else:
+                # The slot was given to us right before the cancellation, pass it to someone else
+                self.running -= 1
+                self._wake_up()
+            raise
+
+    def _wake_up(self):
+        while self.running < self.jobs and (self._urgent_waiters or self._waiters):
+            waiter = (self._urgent_waiters or self._waiters).popleft()
+            key, future = waiter
+            if future.done():
+                continue
+            self.running += 1
+            self._forget(waiter)
+            self._urgent.discard(key)
+            future.set_result(None)
+
+    def _forget(self, waiter: tuple[Hashable, Future]):
+        self.waiting -= 1
+        key = waiter[0]
+        self._waiters_by_key[key].remove(waiter)
+        if not self._waiters_by_key[key]:
+            del self._waiters_by_key[key]
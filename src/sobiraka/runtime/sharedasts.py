@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from asyncio import Task, create_task
+from typing import Awaitable, Callable, Hashable, Iterable
+
+
+class SharedAsts:
+    """
+    Lets several builders running in the same process (see `sobiraka build`) parse each text only once.
+
+    The first builder that needs to parse a text starts the parsing,
+    and all other builders that need the same text reuse its result, even while it is still running.
+    Each builder loads its own syntax tree from the result, so the builders never share any mutable objects.
+
+    The `consumers` identify the formats, e.g., by their builder classes.
+    A result is forgotten as soon as all consumers took it, so the memory usage does not grow with the project size.
+    Since some texts are only produced for some of the formats (e.g., via `{% if WEB %}`),
+    a consumer that will not take anything else should be marked as `finished()`.
+    """
+
+    def __init__(self, consumers: Iterable[Hashable]):
+        self.consumers: set[Hashable] = set(consumers)
+        self._tasks: dict[str, Task[bytes]] = {}
+        self._taken: dict[str, set[Hashable]] = {}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self._tasks)} ASTs>'
+
+    async def get(self, key: str, parse: Callable[[], Awaitable[bytes]], *, consumer: Hashable) -> bytes:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = create_task(parse())
+            self._taken[key] = set()
+
+        self._taken[key].add(consumer)
+        if self._taken[key] >= self.consumers:
+            del self._tasks[key]
+            del self._taken[key]
+
+        return await task
+
+    def finished(self, consumer: Hashable):
+        """
+        Stop waiting for the given consumer, and forget the results that all other consumers already took.
+        """
+        self.consumers.discard(consumer)
+        for key, taken in list(self._taken.items()):
+            if taken >= self.consumers:
+                del self._tasks[key]
+                del self._taken[key]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+from asyncio import current_task
+from contextlib import AbstractContextManager, nullcontext
+from heapq import heappop, heappush
+from threading import Lock, get_ident
+from time import perf_counter_ns
+from typing import Any, Hashable, TYPE_CHECKING
+
+from ..utils import AbsolutePath
+
+if TYPE_CHECKING:
+    from sobiraka.models import Page
+
+
+class Tracer:
+    """
+    Records how long various operations take during the build and exports them
+    in the Chrome trace-event format, which can be opened in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+
+    Each operation is wrapped in `with RT.TRACER.span(name, category)`.
+    Unless `start()` was called, spans are not recorded and cost almost nothing.
+
+    Spans of the same asyncio task (or thread) are nested into each other naturally,
+    and the nested spans inherit the page-related arguments from the outer ones.
+    Concurrent tasks are distributed between several lanes, which are displayed as separate threads.
+    A lane is only reused when the previous task has closed all its spans, so the spans on each lane never overlap.
+
+    Spans recorded in other processes can be added via `add_events()` and are displayed as separate processes.
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.events: list[dict[str, Any]] = []
+
+        self.origin: int = perf_counter_ns()
+        self._lock = Lock()
+        self._owners: dict[Hashable, _Owner] = {}
+        self._free_lanes: list[int] = []
+        self._lanes_count: int = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.events)} events>'
+
+    def start(self, origin: int = None):
+        """
+        Start recording spans.
+        The timestamps are counted from `origin` (in `perf_counter_ns()` units), which defaults to the current moment.
+        """
+        self.enabled = True
+        self.origin = origin if origin is not None else perf_counter_ns()
+
+    def span(self, name: str, category: str, *, page: Page = None, **args: Any) -> AbstractContextManager:
+        """
+        Measure the duration of the code inside the `with` block.
+        If a `page` is given, its path, location and document are added to the span's arguments.
+        """
+        if not self.enabled:
+            return nullcontext()
+        if page is not None:
+            args.update(path=str(page.source.path_in_project),
+                        location=str(page.location),
+                        document=page.document.autoprefix)
+        return _Span(self, name, category, args)
+
+    def add_events(self, events: list[dict[str, Any]]):
+        """
+        Add the events recorded by another process's tracer, e.g., a process that built a single document.
+        That tracer must have been started with this tracer's `origin`, so that the timestamps match.
+        """
+        with self._lock:
+            self.events += events
+
+    def save(self, path: AbsolutePath):
+        metadata: list[dict[str, Any]] = []
+        for pid in sorted({event['pid'] for event in self.events} | {os.getpid()}):
+            name = 'sobiraka' if pid == os.getpid() else f'sobiraka (process {pid})'
+            metadata.append(dict(ph='M', pid=pid, tid=0, name='process_name', args=dict(name=name)))
+            for lane in sorted({event['tid'] for event in self.events if event['pid'] == pid}):
+                metadata.append(dict(ph='M', pid=pid, tid=lane, name='thread_name', args=dict(name=f'lane {lane}')))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(dict(traceEvents=metadata + self.events, displayTimeUnit='ms')))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Lanes
+
+    def _enter(self, span: _Span):
+        """
+        Assign the lane of the current task or thread (taking a new one if necessary) and the start time to the span.
+        """
+        key = _current_owner()
+        with self._lock:
+            owner = self._owners.get(key)
+            if owner is None:
+                if self._free_lanes:
+                    lane = heappop(self._free_lanes)
+                else:
+                    self._lanes_count += 1
+                    lane = self._lanes_count
+                owner = self._owners[key] = _Owner(lane)
+            else:
+                outer = owner.stack[-1].args
+                span.args = {key: outer[key] for key in _INHERITED_ARGS if key in outer} | span.args
+            owner.stack.append(span)
+            span.lane = owner.lane
+            span.start = self._now()
+
+    def _exit(self, span: _Span):
+        key = _current_owner()
+        with self._lock:
+            self.events.append(dict(ph='X', name=span.name, cat=span.category, ts=span.start,
+                                    dur=self._now() - span.start, pid=os.getpid(), tid=span.lane, args=span.args))
+            owner = self._owners[key]
+            owner.stack.pop()
+            if not owner.stack:
+                del self._owners[key]
+                heappush(self._free_lanes, owner.lane)
+
+    def _now(self) -> int:
+        return (perf_counter_ns() - self.origin) // 1000
+
+    # endregion
+
+
+class _Span(AbstractContextManager):
+    def __init__(self, tracer: Tracer, name: str, category: str, args: dict[str, Any]):
+        self.tracer: Tracer = tracer
+        self.name: str = name
+        self.category: str = category
+        self.args: dict[str, Any] = args
+        self.lane: int = 0
+        self.start: int = 0
+
+    def __enter__(self):
+        self.tracer._enter(self)  # pylint: disable=protected-access
+        return self
+
+    def __exit__(self, *_):
+        self.tracer._exit(self)  # pylint: disable=protected-access
+
+
+class _Owner:
+    def __init__(self, lane: int):
+        self.lane: int = lane
+        self.stack: list[_Span] = []
+
+
+_INHERITED_ARGS = 'path', 'location', 'document'
+
+
+def _current_owner() -> Hashable:
+    try:
+        task = current_task()
+    except RuntimeError:
+        task = None
+    return task if task is not None else get_ident()
@@ -0,0 +1,3 @@
+from .serve import serve
+from .server import PreviewServer
+from .watcher import Watcher
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sys
+
+from sobiraka.models import Project
+from sobiraka.models.load import load_project
+from sobiraka.processing.abstract.waiter import BuildFailure
+from sobiraka.processing.web import WebBuilder
+from sobiraka.runtime import RT, Scheduler
+from sobiraka.utils import AbsolutePath, print_colorful_exc
+from .server import PreviewServer
+from .watcher import Watcher
+
+
+async def serve(manifest_path: AbsolutePath, output: AbsolutePath, *,
+                host: str = '127.0.0.1',
+                port: int = 8000,
+                jobs: int = None):
+    """
+    Build the web documentation, serve it over HTTP, and rebuild it whenever any of the project's files change.
+    All builds after the first one are incremental, so the unchanged HTML files are not written again
+    (but all pages are still processed and rendered).
+    After each successful rebuild, the open browser tabs are reloaded automatically.
+
+    Runs until interrupted.
+    """
+    server = PreviewServer(output, host, port)
+    await server.start()
+    print(f'Serving {output} at http://{host}:{port}/', file=sys.stderr)
+
+    try:
+        project = await _build(manifest_path, output, jobs=jobs)
+        while True:
+            watcher = Watcher(_watched_directories(manifest_path, project),
+                              ignore=[path for path in (output, RT.TMP) if path is not None])
+            async for changed in watcher.changes():
+                print(f'Detected changes in {len(changed)} file(s), rebuilding...', file=sys.stderr)
+                if new_project := await _build(manifest_path, output, jobs=jobs):
+                    project = new_project
+                    server.notify_reload()
+                    # The set of watched directories (e.g., themes) may have changed with the config
+                    break
+
+    finally:
+        await server.close()
+
+
+async def _build(manifest_path: AbsolutePath, output: AbsolutePath, *, jobs: int | None) -> Project | None:
+    """
+    Load the project and build it. Return the project if the build succeeded.
+    Unlike `sobiraka web`, errors do not stop the server, they are just printed.
+    """
+    try:
+        project = load_project(manifest_path)
+        RT.SCHEDULER = Scheduler(jobs or project.jobs)
+        builder = WebBuilder(project, output, incremental=True)
+        await RT.run_isolated(builder.run())
+
+    except BuildFailure as exc:
+        print(f'Build failed: {len(exc.exceptions)} error(s).', file=sys.stderr)
+        return None
+
+    except Exception:  # pylint: disable=broad-exception-caught
+        print_colorful_exc()
+        return None
+
+    print('Build finished.', file=sys.stderr)
+    return project
+
+
+def _watched_directories(manifest_path: AbsolutePath, project: Project | None) -> list[AbsolutePath]:
+    directories: list[AbsolutePath] = [manifest_path.parent]
+    if project is not None:
+        for document in project.documents:
+            directories.append(document.config.web.theme.path)
+
+    # Do not watch the same files twice
+    directories = sorted(set(directories))
+    return [d for d in directories if not any(other in d.parents for other in directories)]
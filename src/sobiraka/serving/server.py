@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from asyncio import Queue, Server, StreamReader, StreamWriter, start_server
+from mimetypes import guess_type
+from urllib.parse import quote, unquote, urlsplit
+
+from sobiraka.utils import AbsolutePath
+
+LIVE_RELOAD_PATH = '/_sobiraka/livereload'
+LIVE_RELOAD_SCRIPT = f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = () => location.reload();</script>'
+
+
+class PreviewServer:
+    """
+    A small HTTP server for previewing the built documentation locally.
+
+    Every HTML page is served with an additional script that subscribes to reload notifications
+    (sent as Server-Sent Events), so that browsers reload the page after each successful rebuild.
+
+    This server is only meant for previewing. It does not try to be fast, complete or secure enough for production.
+    """
+
+    def __init__(self, root: AbsolutePath, host: str, port: int):
+        self.root: AbsolutePath = root.resolve()
+        self.host: str = host
+        self.port: int = port
+
+        self._server: Server | None = None
+        self._clients: set[Queue[str]] = set()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: http://{self.host}:{self.port}/>'
+
+    async def start(self):
+        self._server = await start_server(self._handle, self.host, self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def notify_reload(self):
+        for client in self._clients:
+            client.put_nowait('reload')
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # region Handling requests
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass
+
+            try:
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            except ValueError:
+                await self._respond(writer, 400, b'Bad Request')
+                return
+
+            if method not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, b'Method Not Allowed')
+                return
+
+            path = unquote(urlsplit(target).path)
+            if path == LIVE_RELOAD_PATH:
+                await self._serve_events(writer)
+            else:
+                await self._serve_file(writer, path, with_body=method == 'GET')
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def _serve_file(self, writer: StreamWriter, path: str, *, with_body: bool):
+        file = (self.root / path.lstrip('/')).resolve()
+        if file != self.root and self.root not in file.parents:
+            await self._respond(writer, 403, b'Forbidden')
+            return
+
+        if file.is_dir():
+            if not path.endswith('/'):
+                await self._respond(writer, 301, b'', headers={'Location': quote(path) + '/'})
+                return
+            file /= 'index.html'
+
+        if not file.is_file():
+            await self._respond(writer, 404, b'Not Found')
+            return
+
+        content_type, _ = guess_type(file, strict=False)
+        content_type = content_type or 'application/octet-stream'
+        body = file.read_bytes()
+        if content_type == 'text/html':
+            body = _inject_live_reload(body)
+            content_type += '; charset=utf-8'
+
+        await self._respond(writer, 200, body, content_type=content_type, with_body=with_body)
+
+    async def _serve_events(self, writer: StreamWriter):
+        writer.write(b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'Connection: close\r\n\r\n')
+        await writer.drain()
+
+        client: Queue[str] = Queue()
+        self._clients.add(client)
+        try:
+            while True:
+                event = await client.get()
+                writer.write(f'data: {event}\n\n'.encode('utf-8'))
+                await writer.drain()
+        finally:
+            self._clients.discard(client)
+
+    @staticmethod
+    async def _respond(writer: StreamWriter, status: int, body: bytes, *,
+                       content_type: str = 'text/plain; charset=utf-8',
+                       headers: dict[str, str] = None,
+                       with_body: bool = True):
+        head = f'HTTP/1.1 {status} {_REASONS[status]}\r\n' \
+               f'Content-Type: {content_type}\r\n' \
+               f'Content-Length: {len(body)}\r\n' \
+               f'Cache-Control: no-store\r\n' \
+               f'Connection: close\r\n'
+        for key, value in (headers or {}).items():
+            head += f'{key}: {value}\r\n'
+        writer.write(head.encode('latin-1') + b'\r\n')
+        if with_body:
+            writer.write(body)
+        await writer.drain()
+
+    # endregion
+
+
+_REASONS = {
+    200: 'OK',
+    301: 'Moved Permanently',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+}
+
+
+def _inject_live_reload(html: bytes) -> bytes:
+    script = LIVE_RELOAD_SCRIPT.encode('utf-8')
+    position = html.rfind(b'</body>')
+    if position == -1:
+        return html + script
+    return html[:position] + script + html[position:]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+from asyncio import sleep, to_thread
+from typing import AsyncIterator, Iterable
+
+from sobiraka.utils import AbsolutePath
+
+Snapshot = dict[AbsolutePath, tuple[int, int]]
+
+
+class Watcher:
+    """
+    Polls the given directories and reports the files that were created, modified or deleted.
+
+    Polling is slower than inotify and its counterparts, but it works the same on all platforms,
+    inside containers and on network filesystems, and it needs no extra dependencies.
+    Hidden files and directories, as well as anything inside the `ignore` directories, are not watched.
+    """
+
+    def __init__(self, roots: Iterable[AbsolutePath], *, ignore: Iterable[AbsolutePath] = (), interval: float = 0.5):
+        self.roots: tuple[AbsolutePath, ...] = tuple(roots)
+        self.ignore: tuple[AbsolutePath, ...] = tuple(ignore)
+        self.interval: float = interval
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {", ".join(map(str, self.roots))}>'
+
+    async def changes(self) -> AsyncIterator[set[AbsolutePath]]:
+        """
+        Yield a set of changed paths each time something changes.
+        Changes that happen in quick succession (e.g., an editor saving several files) are reported together.
+        """
+        snapshot = await to_thread(self.snapshot)
+        while True:
+            await sleep(self.interval)
+            new_snapshot = await to_thread(self.snapshot)
+            if new_snapshot == snapshot:
+                continue
+
+            # Wait until things settle down
+            while True:
+                await sleep(self.interval)
+                newer_snapshot = await to_thread(self.snapshot)
+                if newer_snapshot == new_snapshot:
+                    break
+                new_snapshot = newer_snapshot
+
+            changed = {path for path in snapshot.keys() | new_snapshot.keys()
+                       if snapshot.get(path) != new_snapshot.get(path)}
+            snapshot = new_snapshot
+            yield changed
+
+    def snapshot(self) -> Snapshot:
+        snapshot: Snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirpath = AbsolutePath(dirpath)
+                dirnames[:] = [d for d in dirnames if not d.startswith('.') and not self._is_ignored(dirpath / d)]
+                for filename in filenames:
+                    if filename.startswith('.'):
+                        continue
+                    path = dirpath / filename
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = stat.st_mtime_ns, stat.st_size
+        return snapshot
+
+    def _is_ignored(self, path: AbsolutePath) -> bool:
+        return any(path == ignored or ignored in path.parents for ignored in self.ignore)
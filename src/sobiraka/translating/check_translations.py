@@ -17,12 +17,12 @@ def check_translations(project: Project, *, strict: bool) -> int:
 
             if document.lang == project.primary_language:
                 print(colored.green('  This is the primary document'), file=sys.stderr)
-                print(colored.green(f'  Pages: {len(document.root.all_pages())}'), file=sys.stderr)
+                print(colored.green(f'  Pages: {len(document.all_pages())}'), file=sys.stderr)
 
             else:
                 pages: dict[TranslationStatus, list[Page]] = {status: [] for status in TranslationStatus}
 
-                for page in document.root.all_pages():
+                for page in document.all_pages():
                     pages[page.translation_status].append(page)
 
                 print(colored.green(f'  Up-to-date pages: {len(pages[TranslationStatus.UPTODATE])}'), file=sys.stderr)
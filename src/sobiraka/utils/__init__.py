@@ -3,20 +3,26 @@ from .betterpath import AbsolutePath, IncompatiblePathTypes, PathGoesOutsideStar
     WrongPathType, absolute_or_relative
 from .consume_task_silently import consume_task_silently
 from .convert_or_none import convert_or_none
+from .copy_file import copy_file
 from .delete_extra_files import delete_extra_files
+from .digest import digest
 from .expand_vars import expand_vars
 from .first_existing_path import first_existing_path
-from .jinja import configured_jinja
+from .highlight_code import highlight_code
+from .jinja import JinjaBytecodeCache, configured_jinja, render_string_async
 from .keydefaultdict import KeyDefaultDict
 from .last_item import last_key, last_value, update_last_dataclass, update_last_value
 from .location import Location
 from .merge_dicts import merge_dicts
+from .minify_html import minify_html
 from .missing import MISSING
 from .panflute_utils import insert_after, panflute_to_bytes, replace_element
 from .parse_vars import parse_vars
+from .precompress import precompress
 from .print_colorful_exc import print_colorful_exc
 from .quotationmark import Apostrophe, QuotationMark
 from .raw import HtmlBlock, HtmlInline, LatexBlock, LatexInline
+from .resize_image import resize_image
 from .sorted_dict import sorted_dict
 from .tocnumber import RootNumber, TocNumber, Unnumbered
 from .unique_list import UniqueList
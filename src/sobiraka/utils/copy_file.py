@@ -0,0 +1,35 @@
+import os
+from shutil import copyfile
+
+from .betterpath import AbsolutePath
+
+
+def copy_file(source: AbsolutePath, target: AbsolutePath):
+    """
+    Copy the file's content, letting the kernel do the copying if possible.
+
+    On Linux, `os.copy_file_range()` makes the filesystem share the data blocks between the files
+    (on Btrfs, XFS and other filesystems that support reflinks) or at least copy them without passing through Python.
+    If it is not supported, a regular copy is performed.
+
+    The target is replaced atomically, so that the processes reading it never see a partially written file.
+    """
+    temp = target.with_name(f'.{target.name}.tmp')
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        _copy_file_range(source, temp)
+    except OSError:
+        copyfile(source, temp)
+    temp.replace(target)
+
+
+def _copy_file_range(source: AbsolutePath, target: AbsolutePath):
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        while size > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), size)
+            if copied == 0:
+                break
+            size -= copied
@@ -0,0 +1,15 @@
+from hashlib import sha256
+
+
+def digest(*parts: str | bytes) -> str:
+    """
+    Calculate a hex SHA-256 digest of the given parts, suitable for use as a cache key.
+    The parts are separated with a zero byte, so that ('ab', 'c') and ('a', 'bc') produce different digests.
+    """
+    hasher = sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        hasher.update(part)
+        hasher.update(b'\0')
+    return hasher.hexdigest()
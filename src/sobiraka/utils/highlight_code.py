@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import yaml
+
+if TYPE_CHECKING:
+    from pygments.formatters.html import HtmlFormatter
+    from pygments.lexer import Lexer
+
+
+def highlight_code(code: str, language: str, attributes: tuple[tuple[str, str], ...], style: str | None) -> str:
+    """
+    Highlight the code with Pygments and return the HTML code, without the wrapping `<pre>` and `<code>`.
+    The `attributes` are the code block's attributes, which are passed to the lexer as options
+    after being parsed as YAML values.
+
+    The function is self-contained, so that it can be run in a separate process.
+    """
+    from pygments import highlight
+
+    return highlight(code, get_lexer(language, attributes), get_formatter(style)).rstrip()
+
+
+@lru_cache
+def get_lexer(language: str, attributes: tuple[tuple[str, str], ...]) -> 'Lexer':
+    """
+    Return a lexer for the language with the given options.
+    The lexers are reused, since creating one involves a lookup among all the lexers and, often, compiling regexes.
+    """
+    from pygments.lexers import get_lexer_by_name
+
+    options = {k: yaml.safe_load(v) for k, v in attributes}
+    return get_lexer_by_name(language, **options)
+
+
+@lru_cache
+def get_formatter(style: str | None) -> 'HtmlFormatter':
+    from pygments.formatters.html import HtmlFormatter
+    from pygments.styles import get_style_by_name
+
+    if style is not None:
+        return HtmlFormatter(nowrap=True, wrapcode=True, style=get_style_by_name(style))
+    return HtmlFormatter(nowrap=True, wrapcode=True)
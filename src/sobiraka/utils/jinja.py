@@ -1,12 +1,68 @@
+import re
+from typing import Any
+
 import jinja2
+from diskcache import Cache
 
 from sobiraka.utils import AbsolutePath
+from .digest import digest
 
 
-def configured_jinja(template_dir: AbsolutePath) -> jinja2.Environment:
+def configured_jinja(template_dir: AbsolutePath, *, bytecode_cache: jinja2.BytecodeCache = None) -> jinja2.Environment:
     return jinja2.Environment(
         loader=jinja2.FileSystemLoader(template_dir),
         enable_async=True,
         undefined=jinja2.StrictUndefined,
         comment_start_string='{{#',
-        comment_end_string='#}}')
+        comment_end_string='#}}',
+        bytecode_cache=bytecode_cache)
+
+
+class JinjaBytecodeCache(jinja2.BytecodeCache):
+    """
+    Stores compiled Jinja templates in a persistent cache (see `RT.cache()`),
+    so that the templates that did not change are not compiled again in the next build.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache: Cache = cache
+
+    def load_bytecode(self, bucket: jinja2.bccache.Bucket):
+        data = self.cache.get(bucket.key)
+        if data is not None:
+            bucket.bytecode_from_string(data)
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket):
+        self.cache.set(bucket.key, bucket.bytecode_to_string())
+
+    def clear(self):
+        self.cache.clear()
+
+
+async def render_string_async(jinja: jinja2.Environment, text: str, variables: dict[str, Any]) -> str:
+    """
+    Render the text as a Jinja template, like `jinja.from_string(text).render_async(variables)`.
+
+    Most texts do not use any template syntax at all, so they skip Jinja completely.
+    Other texts are compiled using the environment's bytecode cache (if any), keyed by the text's digest.
+    """
+    if '{{' not in text and '{%' not in text:
+        # Make the same changes that Jinja's lexer would make
+        text = _NEWLINE.sub(jinja.newline_sequence, text)
+        if not jinja.keep_trailing_newline:
+            text = text.removesuffix(jinja.newline_sequence)
+        return text
+
+    if jinja.bytecode_cache is None:
+        template = jinja.from_string(text)
+    else:
+        bucket = jinja.bytecode_cache.get_bucket(jinja, digest(text), None, text)
+        if bucket.code is None:
+            bucket.code = jinja.compile(text)
+            jinja.bytecode_cache.set_bucket(bucket)
+        template = jinja.template_class.from_code(jinja, bucket.code, jinja.make_globals(None))
+
+    return await template.render_async(variables)
+
+
+_NEWLINE = re.compile(r'\r\n|\r|\n')
@@ -0,0 +1,27 @@
+import re
+
+_PRESERVED = re.compile(r'<(pre|textarea|script|style)(?=[\s>/]).*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r'<!--(?!\[if\b).*?-->', re.DOTALL)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def minify_html(html: str) -> str:
+    """
+    Remove the comments and collapse the whitespace in the HTML code,
+    except inside `<pre>`, `<textarea>`, `<script>` and `<style>`, where the whitespace matters.
+
+    Each run of whitespace is replaced with a single newline (if it contains one) or a single space,
+    so the page looks exactly the same in the browser.
+    """
+    result: list[str] = []
+    pos = 0
+    for m in _PRESERVED.finditer(html):
+        result += _minify_text(html[pos:m.start()]), m.group()
+        pos = m.end()
+    result.append(_minify_text(html[pos:]))
+    return ''.join(result)
+
+
+def _minify_text(text: str) -> str:
+    text = _COMMENT.sub('', text)
+    return _WHITESPACE.sub(lambda m: '\n' if '\n' in m.group() else ' ', text)
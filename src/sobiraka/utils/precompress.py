@@ -0,0 +1,14 @@
+import gzip
+
+import brotli
+
+
+def precompress(data: bytes) -> tuple[bytes, bytes]:
+    """
+    Compress the data with gzip and Brotli, both at the highest levels.
+    This is slow, so the function is meant to be run in a separate process, once per file.
+
+    The result does not depend on the current time, so the same data always produces the same files.
+    """
+    return (gzip.compress(data, compresslevel=9, mtime=0),
+            brotli.compress(data, mode=brotli.MODE_TEXT, quality=11))
@@ -0,0 +1,23 @@
+from io import BytesIO
+
+import PIL.Image
+
+
+def resize_image(data: bytes, width: int, image_format: str, quality: int) -> bytes:
+    """
+    Scale the image down to the given width, keeping its ratio, and encode it in the given format
+    (as named by Pillow, e.g., `PNG` or `WEBP`).
+
+    The function is self-contained, so that it can be run in a separate process.
+    """
+    with PIL.Image.open(BytesIO(data)) as original:
+        image = original
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), PIL.Image.Resampling.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        result = BytesIO()
+        image.save(result, format=image_format, quality=quality, optimize=True)
+        return result.getvalue()
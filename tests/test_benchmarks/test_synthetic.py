@@ -0,0 +1,31 @@
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from sobiraka.models.load import load_project
+from sobiraka.utils import AbsolutePath
+
+sys.path.insert(0, str(AbsolutePath(__file__).parent.parent.parent / 'benchmarks'))
+
+# pylint: disable=wrong-import-order,wrong-import-position
+from synthetic import SyntheticProject
+
+
+class TestSyntheticProject(TestCase):
+    def test_load(self):
+        spec = SyntheticProject(pages=10, depth=2, fanout=2, images=1, languages=('en', 'ru'), nav=True)
+        with TemporaryDirectory(prefix='sobiraka-test-') as temp_dir:
+            manifest_path = spec.write(AbsolutePath(temp_dir))
+            project = load_project(manifest_path)
+
+            self.assertEqual(['en', 'ru'], [document.autoprefix for document in project.documents])
+            for document in project.documents:
+                pages = list((AbsolutePath(temp_dir) / document.root_path).rglob('*.md'))
+                self.assertGreater(len(pages), 10)
+
+    def test_deterministic(self):
+        self.assertEqual(SyntheticProject(seed=1).files(), SyntheticProject(seed=1).files())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import json
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+from sobiraka.processing.web import AssetFingerprints, OutputManifest
+from sobiraka.utils import AbsolutePath, RelativePath
+
+
+class TestAssetFingerprints(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.output = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        self.manifest = OutputManifest(self.output)
+        self.manifest.write_bytes(self.output / '_static' / 'theme.css', b'body {}')
+        self.manifest.write_bytes(self.output / 'custom.js', b'alert(1)')
+
+        self.fingerprints = AssetFingerprints(self.manifest)
+        self.created = await self.fingerprints.add([RelativePath('_static/theme.css'), RelativePath('custom.js'),
+                                                    RelativePath('_static/missing.css')])
+        self.css = self.fingerprints.mapping[RelativePath('_static/theme.css')]
+        self.js = self.fingerprints.mapping[RelativePath('custom.js')]
+
+    def test_copies(self):
+        self.assertRegex(str(self.css), r'^_static/theme\.[0-9a-f]{10}\.css$')
+        self.assertRegex(str(self.js), r'^custom\.[0-9a-f]{10}\.js$')
+        self.assertEqual({self.output / self.css, self.output / self.js}, self.created)
+        self.assertEqual(b'body {}', (self.output / self.css).read_bytes())
+        self.assertEqual(b'body {}', (self.output / '_static' / 'theme.css').read_bytes())
+
+    def test_rewrite(self):
+        html = '\n'.join((
+            '<link rel="stylesheet" href="../_static/theme.css"/>',
+            "<script src='../custom.js?v=1'></script>",
+            '<img src="../_static/logo.png"/>',
+            '<a href="https://example.com/custom.js">',
+            '<a href="page.html#custom.js">',
+        ))
+        expected = '\n'.join((
+            f'<link rel="stylesheet" href="../_static/{self.css.name}"/>',
+            f"<script src='../{self.js.name}?v=1'></script>",
+            '<img src="../_static/logo.png"/>',
+            '<a href="https://example.com/custom.js">',
+            '<a href="page.html#custom.js">',
+        ))
+        self.assertEqual(expected, self.fingerprints.rewrite(html, RelativePath('section')))
+
+    async def test_css_urls(self):
+        self.manifest.write_bytes(self.output / '_static' / 'fonts' / 'font.woff2', b'font')
+        self.manifest.write_bytes(self.output / '_static' / 'style.css', b"""
+            @font-face { src: url('fonts/font.woff2?v=1') format('woff2'); }
+            body { background: url(data:image/png;base64,AAAA) }
+            a { background: url( "../custom.js" ) }
+            p { background: url(https://example.com/fonts/font.woff2) }
+        """)
+        await self.fingerprints.add([RelativePath('_static/style.css'), RelativePath('_static/fonts/font.woff2')])
+        font = self.fingerprints.mapping[RelativePath('_static/fonts/font.woff2')]
+        style = self.fingerprints.mapping[RelativePath('_static/style.css')]
+
+        self.assertEqual(f"""
+            @font-face {{ src: url('fonts/{font.name}?v=1') format('woff2'); }}
+            body {{ background: url(data:image/png;base64,AAAA) }}
+            a {{ background: url("../{self.js.name}") }}
+            p {{ background: url(https://example.com/fonts/font.woff2) }}
+        """, (self.output / style).read_text())
+        self.assertIn(b"url('fonts/font.woff2?v=1')", (self.output / '_static' / 'style.css').read_bytes())
+
+    async def test_css_digest_depends_on_urls(self):
+        names = []
+        for font in (b'one', b'two'):
+            manifest = OutputManifest(self.output)
+            manifest.write_bytes(self.output / 'font.woff2', font)
+            manifest.write_bytes(self.output / 'style.css', b'body { font: url(font.woff2) }')
+            fingerprints = AssetFingerprints(manifest)
+            await fingerprints.add([RelativePath('style.css'), RelativePath('font.woff2')])
+            names.append(fingerprints.mapping[RelativePath('style.css')])
+        self.assertNotEqual(names[0], names[1])
+
+    def test_save_and_update(self):
+        self.fingerprints.save(self.output / AssetFingerprints.FILENAME)
+        data = json.loads((self.output / AssetFingerprints.FILENAME).read_text())
+        self.assertEqual({'_static/theme.css': str(self.css), 'custom.js': str(self.js)}, data)
+
+        other = AssetFingerprints(OutputManifest(self.output))
+        other.update(self.output / AssetFingerprints.FILENAME)
+        self.assertEqual(self.fingerprints.mapping, other.mapping)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+from contextlib import redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+from textwrap import dedent
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from sobiraka.processing.build import build
+from sobiraka.processing.latex import LatexBuilder
+from sobiraka.utils import AbsolutePath
+
+
+class TestBuild(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.temp_dir = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        self.outputs: list[AbsolutePath] = []
+
+    async def _build_latex(self, manifest: str) -> int:
+        manifest_path = self.temp_dir / 'sobiraka.yaml'
+        manifest_path.write_text(dedent(manifest))
+
+        async def fake_run(builder: LatexBuilder):
+            self.outputs.append(builder.output)
+
+        with patch.object(LatexBuilder, 'run', fake_run), redirect_stderr(StringIO()):
+            return await build(manifest_path, ['latex'], self.temp_dir / 'output', jobs=1)
+
+    async def test_single_document(self):
+        exit_code = await self._build_latex('''
+            title: Documentation
+        ''')
+        self.assertEqual(0, exit_code)
+        self.assertEqual([self.temp_dir / 'output' / 'latex' / 'Documentation.pdf'], self.outputs)
+
+    async def test_several_documents(self):
+        exit_code = await self._build_latex('''
+            languages:
+              en: {title: English, paths: {root: en}}
+              ru: {title: Russian, paths: {root: ru}}
+        ''')
+        self.assertEqual(0, exit_code)
+        self.assertEqual([self.temp_dir / 'output' / 'latex' / 'English.pdf',
+                          self.temp_dir / 'output' / 'latex' / 'Russian.pdf'], self.outputs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+from unittest import main
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Page, PageMeta, SourceFile, Syntax
+from sobiraka.processing.abstract import BuildCache
+from sobiraka.runtime import RT
+from sobiraka.utils import Location, RelativePath
+
+
+class TestBuildCache(AbstractTestWithRtTmp):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        project = FakeProject({'src': FakeDocument({'page.md': 'Hello'})})
+        self.source = SourceFile(project.documents[0], RelativePath('src/page.md'))
+        self.page = Page(self.source, Location('/page'), Syntax.MD, PageMeta(), 'Hello')
+        self.path = RT.TMP / 'cache.json'
+
+    def rebuild(self, fingerprint: str = 'fingerprint') -> BuildCache:
+        return BuildCache(self.path, fingerprint)
+
+    async def test_unchanged(self):
+        cache = self.rebuild()
+        self.assertFalse(cache.is_rendered(self.page, 'rendered'))
+        cache.save()
+
+        cache = self.rebuild()
+        self.assertTrue(cache.is_rendered(self.page, 'rendered'))
+
+    async def test_changed_rendering(self):
+        cache = self.rebuild()
+        cache.is_rendered(self.page, 'rendered')
+        cache.save()
+
+        cache = self.rebuild()
+        self.assertFalse(cache.is_rendered(self.page, 'rendered differently'))
+
+    async def test_changed_fingerprint(self):
+        cache = self.rebuild()
+        cache.is_rendered(self.page, 'rendered')
+        cache.save()
+
+        cache = self.rebuild('another fingerprint')
+        self.assertFalse(cache.is_rendered(self.page, 'rendered'))
+
+    async def test_only_current_pages_are_saved(self):
+        cache = self.rebuild()
+        cache.is_rendered(self.page, 'rendered')
+        cache.save()
+
+        self.rebuild().save()
+
+        cache = self.rebuild()
+        self.assertFalse(cache.is_rendered(self.page, 'rendered'))
+
+
+del AbstractTestWithRtTmp
+
+if __name__ == '__main__':
+    main()
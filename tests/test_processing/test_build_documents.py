@@ -0,0 +1,93 @@
+import os
+from contextlib import redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+from textwrap import dedent
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+from sobiraka.models.load import load_project
+from sobiraka.processing.build import build_documents
+from sobiraka.runtime import RT, Tracer
+from sobiraka.utils import AbsolutePath
+
+
+class TestBuildDocuments(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.temp_dir = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+
+    async def test_failures_are_reported_in_order(self):
+        temp_dir = self.temp_dir
+        manifest_path = temp_dir / 'sobiraka.yaml'
+        manifest_path.write_text(dedent('''
+            languages:
+              en: {title: English, paths: {root: en}}
+              ru: {title: Russian, paths: {root: ru}}
+        '''))
+        project = load_project(manifest_path)
+        targets = [(document, temp_dir / 'output' / document.config.title) for document in project.documents]
+
+        # Each process will fail to load the project
+        manifest_path.unlink()
+
+        stderr = StringIO()
+        with redirect_stderr(stderr):
+            exit_code = await build_documents('markdown', manifest_path, targets, jobs=2)
+
+        self.assertEqual(1, exit_code)
+        output = stderr.getvalue()
+        self.assertIn('FileNotFoundError', output)
+        self.assertLess(output.index("'English': failed"), output.index("'Russian': failed"))
+
+    async def test_issues_are_reported(self):
+        manifest_path = self.temp_dir / 'sobiraka.yaml'
+        manifest_path.write_text(dedent('''
+            languages:
+              en: {title: English, paths: {root: en}}
+              ru: {title: Russian, paths: {root: ru}}
+        '''))
+        for lang in ('en', 'ru'):
+            (self.temp_dir / lang).mkdir()
+        (self.temp_dir / 'en' / 'index.md').write_text('# English\n\nSee [this page](missing.md).\n')
+        (self.temp_dir / 'ru' / 'index.md').write_text('# Russian\n')
+        project = load_project(manifest_path)
+        targets = [(document, self.temp_dir / 'output' / document.config.title) for document in project.documents]
+
+        stderr = StringIO()
+        with redirect_stderr(stderr):
+            exit_code = await build_documents('markdown', manifest_path, targets, jobs=2)
+
+        self.assertEqual(1, exit_code)
+        output = stderr.getvalue()
+        self.assertIn('1 issue occurred in en/index.md:\n  Bad link: missing.md', output)
+        self.assertIn("'English': failed with exit code 1.", output)
+        self.assertIn("'Russian': done.", output)
+
+    async def test_spans_are_forwarded(self):
+        manifest_path = self.temp_dir / 'sobiraka.yaml'
+        manifest_path.write_text(dedent('''
+            languages:
+              en: {title: English, paths: {root: en}}
+              ru: {title: Russian, paths: {root: ru}}
+        '''))
+        for lang in ('en', 'ru'):
+            (self.temp_dir / lang).mkdir()
+            (self.temp_dir / lang / 'index.md').write_text('# Hello\n')
+        project = load_project(manifest_path)
+        targets = [(document, self.temp_dir / 'output' / document.config.title) for document in project.documents]
+
+        tracer = Tracer()
+        tracer.start()
+        with patch.object(RT, 'TRACER', tracer), redirect_stderr(StringIO()):
+            exit_code = await build_documents('markdown', manifest_path, targets, jobs=2)
+
+        self.assertEqual(0, exit_code)
+        documents = {event['args'].get('document') for event in tracer.events}
+        self.assertLessEqual({'en', 'ru'}, documents)
+        self.assertNotIn(os.getpid(), {event['pid'] for event in tracer.events})
+
+
+if __name__ == '__main__':
+    main()
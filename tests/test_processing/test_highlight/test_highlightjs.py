@@ -1,9 +1,14 @@
 from abc import ABCMeta
 from unittest import main
 
+from typing_extensions import override
+
 from abstracttests.projecttestcase import FailingProjectTestCase
+from helpers.fakefilesystem import PseudoFiles
 from test_processing.test_highlight.abstract import AbstractHighlightTest
 from sobiraka.processing.html import Head, HeadCssFile, HeadCssUrl, HeadJsFile, HeadJsUrl
+from sobiraka.processing.html.highlight import BundleRequiresLocalLibrary
+from sobiraka.processing.html.highlight.highlightjs import INIT_SCRIPT
 from sobiraka.utils import RelativePath
 
 
@@ -124,6 +129,47 @@ class TestHighlightJS_Local_MissingJS(AbstractHighlightTest_HighlightJS, Failing
     test_render = None
 
 
+class TestHighlightJS_Local_Bundle(AbstractHighlightTest_HighlightJS):
+    CONFIG = {'highlightjs': {
+        'location': './libs/hljs',
+        'style': 'github',
+        'bundle': True,
+    }}
+    SOURCE = '```shell\necho 1\n```\n\n```dockerfile\nFROM scratch\n```'
+    EXPECTED_HEAD = Head((
+        HeadCssFile(RelativePath('libs/hljs/styles/github.min.css')),
+    ))
+    test_render = None
+
+    @override
+    def additional_files(self) -> PseudoFiles:
+        return {
+            'libs/hljs/highlight.min.js': 'var hljs={}\n//# sourceMappingURL=highlight.min.js.map\n',
+            'libs/hljs/styles/github.min.css': '',
+            'libs/hljs/languages/dockerfile.min.js': 'hljs.registerLanguage("dockerfile",()=>({}));',
+            'libs/hljs/languages/fortran.min.js': 'hljs.registerLanguage("fortran",()=>({}));',
+        }
+
+    async def test_bundle(self):
+        await self.builder._bundle_highlighter(self.document)  # pylint: disable=protected-access
+        tag = self.builder.heads[self.document][-1]
+        self.assertIsInstance(tag, HeadJsFile)
+        self.assertRegex(str(tag.path), r'^_static/js/highlightjs-bundle\.[0-9a-f]{10}\.js$')
+
+        expected = 'var hljs={};\nhljs.registerLanguage("dockerfile",()=>({}));\n' + INIT_SCRIPT
+        self.assertEqual(expected, (self.builder.output / tag.path).read_text())
+
+
+class TestHighlightJS_URL_Bundle(AbstractHighlightTest_HighlightJS, FailingProjectTestCase):
+    CONFIG = {'highlightjs': {
+        'location': 'https://example.com/hljs',
+        'bundle': True,
+    }}
+    EXPECTED_EXCEPTION_TYPES = {BundleRequiresLocalLibrary}
+    test_head = None
+    test_render = None
+
+
 del AbstractHighlightTest, AbstractHighlightTest_HighlightJS, FailingProjectTestCase
 
 if __name__ == '__main__':
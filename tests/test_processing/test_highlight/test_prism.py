@@ -1,9 +1,14 @@
+import json
 from abc import ABCMeta
 from unittest import main
 
+from typing_extensions import override
+
 from abstracttests.projecttestcase import FailingProjectTestCase
+from helpers.fakefilesystem import PseudoFiles
 from test_processing.test_highlight.abstract import AbstractHighlightTest
 from sobiraka.processing.html import Head, HeadCssFile, HeadCssUrl, HeadJsFile, HeadJsUrl
+from sobiraka.processing.html.highlight import BundleRequiresLocalLibrary
 from sobiraka.utils import RelativePath
 
 
@@ -141,6 +146,58 @@ class TestPrism_Local_MissingJS_Autoloader(AbstractHighlightTest_Prism, FailingP
     test_render = None
 
 
+class TestPrism_Local_Bundle(AbstractHighlightTest_Prism):
+    CONFIG = {'prism': {
+        'location': './libs/prism',
+        'style': 'tomorrow',
+        'bundle': True,
+    }}
+    SOURCE = '```shell\necho 1\n```\n\n```php\necho 1;\n```'
+    EXPECTED_HEAD = Head((
+        HeadCssFile(RelativePath('libs/prism/themes/prism-tomorrow.min.css')),
+    ))
+    test_render = None
+
+    @override
+    def additional_files(self) -> PseudoFiles:
+        components = {'languages': {
+            'meta': {'path': 'components/prism-{id}'},
+            'markup': {},
+            'clike': {},
+            'javascript': {'require': 'clike', 'optional': 'markup', 'alias': 'js'},
+            'bash': {'alias': ['sh', 'shell']},
+            'markup-templating': {'require': 'markup'},
+            'php': {'require': 'markup-templating'},
+        }}
+        files = {
+            'libs/prism/components.json': json.dumps(components),
+            'libs/prism/plugins/autoloader/prism-autoloader.min.js': 'autoloader',
+            'libs/prism/themes/prism-tomorrow.min.css': '',
+        }
+        for name in ('core', *components['languages']):
+            files[f'libs/prism/components/prism-{name}.min.js'] = name
+        return files
+
+    async def test_bundle(self):
+        await self.builder._bundle_highlighter(self.document)  # pylint: disable=protected-access
+        tag = self.builder.heads[self.document][-1]
+        self.assertIsInstance(tag, HeadJsFile)
+        self.assertRegex(str(tag.path), r'^_static/js/prism-bundle\.[0-9a-f]{10}\.js$')
+
+        expected = 'core;\nbash;\nmarkup;\nmarkup-templating;\nphp;\n'
+        self.assertEqual(expected, (self.builder.output / tag.path).read_text())
+
+
+class TestPrism_CDN_Bundle(AbstractHighlightTest_Prism, FailingProjectTestCase):
+    CONFIG = {'prism': {
+        'location': 'jsdelivr',
+        'bundle': True,
+    }}
+    EXPECTED_EXCEPTION_TYPES = {BundleRequiresLocalLibrary}
+    test_head = None
+    test_render = None
+
+
 del AbstractHighlightTest, AbstractHighlightTest_Prism, FailingProjectTestCase
 
 if __name__ == '__main__':
@@ -1,13 +1,20 @@
 from abc import ABCMeta
 from textwrap import dedent
 from unittest import main
+from unittest.mock import patch
 
+from panflute import CodeBlock
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
 from abstracttests.singlepageprojecttest import SinglePageProjectTest
 from abstracttests.weasyprintprojecttestcase import WeasyPrintProjectTestCase
 from test_processing.test_highlight.abstract import AbstractHighlightTest
 from sobiraka.models.config import Config, Config_PDF, Config_Paths, Config_Pygments
 from sobiraka.processing.html import Head, HeadCssFile
+from sobiraka.processing.html.highlight import Pygments
+from sobiraka.runtime import RT
 from sobiraka.utils import RelativePath
+from sobiraka.utils.highlight_code import get_lexer
 
 
 class AbstractHighlightTest_Pygments(AbstractHighlightTest, metaclass=ABCMeta):
@@ -70,6 +77,34 @@ class TestPygments_WeasyPrint_PHP(SinglePageProjectTest, WeasyPrintProjectTestCa
         )
 
 
+class TestPygments_Cache(AbstractTestWithRtTmp):
+    EXPECTED = '<span class="nb">echo</span><span class="w"> </span><span class="m">1</span>'
+
+    async def test_cache(self):
+        for _ in range(2):
+            pygments = Pygments(Config_Pygments(style=None), None)
+            block, _ = await pygments.highlight(CodeBlock('echo 1', classes=['shell']))
+            self.assertIn(self.EXPECTED, block.text)
+        self.assertEqual(1, len(RT.cache('pygments')))
+
+        # Different options produce a different result
+        await pygments.highlight(CodeBlock('echo 1', classes=['shell'], attributes={'stripnl': 'false'}))
+        self.assertEqual(2, len(RT.cache('pygments')))
+
+    def test_lexer_reuse(self):
+        self.assertIs(get_lexer('php', (('startinline', 'true'),)), get_lexer('php', (('startinline', 'true'),)))
+        self.assertIsNot(get_lexer('php', ()), get_lexer('php', (('startinline', 'true'),)))
+
+    async def test_process(self):
+        try:
+            with patch.object(Pygments, 'PROCESS_THRESHOLD', 1):
+                block, _ = await Pygments(Config_Pygments(style=None), None).highlight(
+                    CodeBlock('echo 1', classes=['shell']))
+            self.assertIn(self.EXPECTED, block.text)
+        finally:
+            await RT.SCHEDULER.shutdown()
+
+
 del AbstractHighlightTest, AbstractHighlightTest_Pygments, SinglePageProjectTest, WeasyPrintProjectTestCase
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from sobiraka.processing.web import OutputManifest
+from sobiraka.utils import AbsolutePath
+
+
+class TestOutputManifest(TestCase):
+    def setUp(self):
+        super().setUp()
+        # pylint: disable=consider-using-with
+        self.output = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+
+    def build(self, files: dict[str, bytes]) -> OutputManifest:
+        manifest = OutputManifest(self.output)
+        for name, data in files.items():
+            manifest.write_bytes(self.output / name, data)
+        manifest.save()
+        return manifest
+
+    def test_first_build(self):
+        manifest = self.build({'index.html': b'index', 'a/b.html': b'b'})
+        self.assertEqual({'index.html', 'a/b.html'}, manifest.changed)
+        self.assertEqual(b'b', (self.output / 'a' / 'b.html').read_bytes())
+
+    def test_unchanged_files_are_not_written(self):
+        self.build({'index.html': b'index', 'a.html': b'a'})
+        os.utime(self.output / 'index.html', (0, 0))
+        os.utime(self.output / 'a.html', (0, 0))
+
+        manifest = self.build({'index.html': b'index', 'a.html': b'A'})
+        self.assertEqual({'a.html'}, manifest.changed)
+        self.assertEqual(0, (self.output / 'index.html').stat().st_mtime)
+        self.assertNotEqual(0, (self.output / 'a.html').stat().st_mtime)
+
+    def test_modified_output_is_written(self):
+        self.build({'index.html': b'index'})
+        (self.output / 'index.html').write_bytes(b'something else')
+
+        manifest = self.build({'index.html': b'index'})
+        self.assertEqual({'index.html'}, manifest.changed)
+        self.assertEqual(b'index', (self.output / 'index.html').read_bytes())
+
+    def test_copy(self):
+        source = self.output / 'source.png'
+        source.write_bytes(b'image')
+
+        manifest = OutputManifest(self.output)
+        manifest.copy(source, self.output / 'a' / 'image.png')
+        manifest.save()
+        self.assertEqual({'a/image.png'}, manifest.changed)
+        self.assertEqual(b'image', (self.output / 'a' / 'image.png').read_bytes())
+        os.utime(self.output / 'a' / 'image.png', (0, 0))
+
+        # The source was touched, but its content did not change
+        os.utime(source, (1, 1))
+        manifest = OutputManifest(self.output)
+        manifest.copy(source, self.output / 'a' / 'image.png')
+        manifest.save()
+        self.assertEqual(set(), manifest.changed)
+        self.assertEqual(0, (self.output / 'a' / 'image.png').stat().st_mtime)
+
+        source.write_bytes(b'new image')
+        manifest = OutputManifest(self.output)
+        manifest.copy(source, self.output / 'a' / 'image.png')
+        self.assertEqual({'a/image.png'}, manifest.changed)
+        self.assertEqual(b'new image', (self.output / 'a' / 'image.png').read_bytes())
+
+    def test_saved_lists(self):
+        self.build({'index.html': b'index', 'a.html': b'a', 'b.html': b'b'})
+        self.build({'index.html': b'index', 'a.html': b'A', 'c.html': b'c'})
+
+        data = json.loads((self.output / OutputManifest.FILENAME).read_text())
+        self.assertEqual(['a.html', 'c.html', 'index.html'], list(data['files']))
+        self.assertEqual(['a.html', 'c.html'], data['changed'])
+        self.assertEqual(['b.html'], data['deleted'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+from unittest import main
+
+from panflute import Doc, Para, Str
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from sobiraka.pandoc import Pandoc
+from sobiraka.processing.abstract import Builder
+from sobiraka.runtime import RT
+
+
+class CountingPandoc(Pandoc):
+    def __init__(self):
+        super().__init__()
+        self.calls: list[bytes] = []
+
+    async def convert(self, data: bytes, **_kwargs) -> bytes:
+        self.calls.append(data)
+        return b'{"parsed": ' + data + b'}'
+
+    async def version(self) -> str:
+        return 'pandoc 0.0'
+
+
+class AbstractCacheTest(AbstractTestWithRtTmp):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.original_pandoc = RT.PANDOC
+        RT.PANDOC = self.pandoc = CountingPandoc()
+
+    async def asyncTearDown(self):
+        RT.PANDOC = self.original_pandoc
+        await super().asyncTearDown()
+
+
+class TestAstCache(AbstractCacheTest):
+
+    async def test_same_text_is_parsed_once(self):
+        first = await Builder.parse('"Hello"', 'markdown')
+        second = await Builder.parse('"Hello"', 'markdown')
+        self.assertEqual(b'{"parsed": "Hello"}', first)
+        self.assertEqual(first, second)
+        self.assertEqual([b'"Hello"'], self.pandoc.calls)
+
+    async def test_different_text(self):
+        await Builder.parse('"Hello"', 'markdown')
+        await Builder.parse('"World"', 'markdown')
+        self.assertEqual([b'"Hello"', b'"World"'], self.pandoc.calls)
+
+    async def test_different_format(self):
+        await Builder.parse('"Hello"', 'markdown')
+        await Builder.parse('"Hello"', 'rst')
+        self.assertEqual([b'"Hello"', b'"Hello"'], self.pandoc.calls)
+
+    async def test_without_tmp(self):
+        RT.TMP = None
+        await Builder.parse('"Hello"', 'markdown')
+        await Builder.parse('"Hello"', 'markdown')
+        self.assertEqual([b'"Hello"', b'"Hello"'], self.pandoc.calls)
+
+
+class TestRenderCache(AbstractCacheTest):
+    async def test_same_doc_is_rendered_once(self):
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none')
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none')
+        self.assertEqual(1, len(self.pandoc.calls))
+
+    async def test_different_doc(self):
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none')
+        await Builder.render(Doc(Para(Str('World'))), 'html', wrap='none')
+        self.assertEqual(2, len(self.pandoc.calls))
+
+    async def test_different_format(self):
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none')
+        await Builder.render(Doc(Para(Str('Hello'))), 'latex', wrap='none')
+        self.assertEqual(2, len(self.pandoc.calls))
+
+    async def test_different_flags(self):
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none')
+        await Builder.render(Doc(Para(Str('Hello'))), 'html', wrap='none', highlight=False)
+        self.assertEqual(2, len(self.pandoc.calls))
+
+
+del AbstractTestWithRtTmp, AbstractCacheTest
+
+if __name__ == '__main__':
+    main()
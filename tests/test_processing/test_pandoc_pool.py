@@ -0,0 +1,76 @@
+from asyncio import gather, run
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+from unittest.mock import patch
+
+from sobiraka.pandoc import Pandoc
+
+
+class TestPandocPool(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.pandoc = Pandoc(2)
+        self.addCleanup(self.pandoc.close)
+
+    async def convert(self, text: str) -> bytes:
+        return await self.pandoc.convert(text.encode('utf-8'), source_format='markdown', target_format='plain')
+
+    async def test_concurrent(self):
+        texts = [f'Paragraph *number* {i}' for i in range(10)]
+        results = await gather(*map(self.convert, texts))
+        self.assertEqual([f'Paragraph number {i}\n'.encode('utf-8') for i in range(10)], results)
+        self.assertEqual(2, len(self.pandoc._servers))  # pylint: disable=protected-access
+
+    async def test_same_as_process(self):
+        data = b'Hello, *world*!\n\n```python\nprint()\n```'
+        with_server = await self.pandoc.convert(data, source_format='markdown', target_format='html')
+        with_process = await Pandoc().convert(data, source_format='markdown', target_format='html')
+        self.assertEqual(with_process, with_server)
+
+    async def test_same_as_process_without_highlight(self):
+        data = b'```python\nprint()\n```'
+        with_server = await self.pandoc.convert(data, source_format='markdown', target_format='html', highlight=False)
+        with_process = await Pandoc().convert(data, source_format='markdown', target_format='html', highlight=False)
+        self.assertEqual(with_process, with_server)
+
+    async def test_started_on_first_convert(self):
+        self.assertIsNone(self.pandoc._servers)  # pylint: disable=protected-access
+        await self.pandoc.version()
+        self.assertIsNone(self.pandoc._servers)  # pylint: disable=protected-access
+        await self.convert('Hello')
+        self.assertEqual(2, len(self.pandoc._servers))  # pylint: disable=protected-access
+
+    async def test_restart_after_close(self):
+        self.assertEqual(b'Hello\n', await self.convert('Hello'))
+        old_servers = self.pandoc._servers  # pylint: disable=protected-access
+
+        self.pandoc.close()
+        self.assertTrue(all(server.process.poll() is not None for server in old_servers))
+
+        self.assertEqual(b'World\n', await self.convert('World'))
+        self.assertEqual(2, self.pandoc.workers)
+        self.assertIsNot(old_servers, self.pandoc._servers)  # pylint: disable=protected-access
+
+
+class TestPandocPool_EventLoops(TestCase):
+    def test_new_event_loop(self):
+        with patch('sobiraka.pandoc.pandoc.atexit.register') as register:
+            pandoc = Pandoc(1)
+        self.addCleanup(pandoc.close)
+
+        async def convert(text: str) -> bytes:
+            return await pandoc.convert(text.encode('utf-8'), source_format='markdown', target_format='plain')
+
+        # Each run() creates a new event loop, but the servers are reused
+        self.assertEqual(b'Hello\n', run(convert('Hello')))
+        servers = pandoc._servers  # pylint: disable=protected-access
+        self.assertEqual(b'World\n', run(convert('World')))
+        self.assertIs(servers, pandoc._servers)  # pylint: disable=protected-access
+
+        # Closing and restarting the servers does not register another exit handler
+        pandoc.close()
+        self.assertEqual(b'Again\n', run(convert('Again')))
+        register.assert_called_once_with(pandoc.close)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import gzip
+import os
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+import brotli
+
+from sobiraka.processing.web import OutputManifest, precompress_files
+from sobiraka.runtime import RT
+from sobiraka.utils import AbsolutePath
+
+
+class TestPrecompression(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.output = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+
+    async def asyncTearDown(self):
+        await RT.SCHEDULER.shutdown()
+        await super().asyncTearDown()
+
+    async def build(self, files: dict[str, bytes]) -> OutputManifest:
+        manifest = OutputManifest(self.output)
+        for name, data in files.items():
+            manifest.write_bytes(self.output / name, data)
+        results = {self.output / name for name in files}
+        results |= await precompress_files(results, manifest)
+        manifest.save()
+        return manifest
+
+    async def test_copies(self):
+        manifest = await self.build({'index.html': b'<p>Hello</p>', 'image.png': b'image'})
+        self.assertEqual({'index.html', 'index.html.gz', 'index.html.br', 'image.png'}, manifest.changed)
+        self.assertEqual(b'<p>Hello</p>', gzip.decompress((self.output / 'index.html.gz').read_bytes()))
+        self.assertEqual(b'<p>Hello</p>', brotli.decompress((self.output / 'index.html.br').read_bytes()))
+
+    async def test_unchanged_files_are_not_compressed_again(self):
+        await self.build({'a.html': b'a', 'b.css': b'b'})
+        for name in ('a.html.gz', 'a.html.br', 'b.css.gz', 'b.css.br'):
+            os.utime(self.output / name, (0, 0))
+
+        manifest = await self.build({'a.html': b'a', 'b.css': b'B'})
+        self.assertEqual({'b.css', 'b.css.gz', 'b.css.br'}, manifest.changed)
+        self.assertEqual(0, (self.output / 'a.html.gz').stat().st_mtime)
+        self.assertEqual(b'B', gzip.decompress((self.output / 'b.css.gz').read_bytes()))
+
+    async def test_missing_copy_is_created_again(self):
+        await self.build({'a.html': b'a'})
+        (self.output / 'a.html.br').unlink()
+
+        manifest = await self.build({'a.html': b'a'})
+        self.assertEqual({'a.html.br'}, manifest.changed)
+        self.assertEqual(b'a', brotli.decompress((self.output / 'a.html.br').read_bytes()))
+
+
+if __name__ == '__main__':
+    main()
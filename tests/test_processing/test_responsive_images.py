@@ -0,0 +1,83 @@
+from importlib.resources import files
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from unittest import main
+
+import PIL.Image
+
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.models.config import Config, Config_Paths, Config_Theme, Config_Web, Config_Web_Images
+from sobiraka.processing.web import WebBuilder
+from sobiraka.utils import AbsolutePath, RelativePath
+
+
+def make_png(width: int, height: int) -> bytes:
+    data = BytesIO()
+    PIL.Image.new('RGB', (width, height)).save(data, format='PNG')
+    return data.getvalue()
+
+
+class TestResponsiveImages(ProjectTestCase[WebBuilder]):
+    REQUIRE = Status.PROCESS4
+
+    def _init_builder(self) -> WebBuilder:
+        # pylint: disable=consider-using-with
+        output = self.enterContext(TemporaryDirectory(prefix='sobiraka-test-'))
+        return WebBuilder(self.project, AbsolutePath(output))
+
+    def _init_project(self) -> Project:
+        config = Config(
+            paths=Config_Paths(
+                root=RelativePath('src'),
+                resources=RelativePath('img_src'),
+            ),
+            web=Config_Web(
+                theme=Config_Theme(path=AbsolutePath(files('sobiraka')) / 'files' / 'themes' / 'raw'),
+                resources_prefix='img_dst',
+                images=Config_Web_Images(widths=(10, 20, 40), formats=('webp',)),
+            )
+        )
+
+        project = FakeProject({
+            'src': FakeDocument(config, {
+                'page.md': '![](/big.png)\n\n![](/small.png)',
+            })
+        })
+        project.fs.add_files({
+            'img_src/big.png': make_png(30, 15),
+            'img_src/small.png': make_png(8, 4),
+        })
+        return project
+
+    def test_variants(self):
+        expected = {
+            'big-10w.png': (10, 5),
+            'big-20w.png': (20, 10),
+            'big-10w.webp': (10, 5),
+            'big-20w.webp': (20, 10),
+            'big-30w.webp': (30, 15),
+            'small-8w.webp': (8, 4),
+        }
+        for name, size in expected.items():
+            with self.subTest(name):
+                with PIL.Image.open(self.builder.output / 'img_dst' / name) as image:
+                    self.assertEqual(size, image.size)
+        self.assertFalse((self.builder.output / 'img_dst' / 'big-40w.png').exists())
+
+    def test_html(self):
+        html = (self.builder.output / 'src' / 'page.html').read_text()
+        self.assertIn('<picture><source type="image/webp" '
+                      'srcset="../img_dst/big-10w.webp 10w, ../img_dst/big-20w.webp 20w, ../img_dst/big-30w.webp 30w">'
+                      '<img src="../img_dst/big.png" loading="lazy" decoding="async" '
+                      'srcset="../img_dst/big-10w.png 10w, ../img_dst/big-20w.png 20w, ../img_dst/big.png 30w" />'
+                      '</picture>', html)
+        self.assertIn('<picture><source type="image/webp" srcset="../img_dst/small-8w.webp 8w">'
+                      '<img src="../img_dst/small.png" loading="lazy" decoding="async" /></picture>', html)
+
+
+del ProjectTestCase
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from asyncio import gather, sleep
+from importlib.resources import files
+from unittest import main
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models.config import Config, Config_Paths, Config_Theme, Config_Web
+from sobiraka.processing.html.abstracthtml import _sass_imports
+from sobiraka.processing.web import WebBuilder
+from sobiraka.runtime import RT
+from sobiraka.utils import AbsolutePath, RelativePath
+
+# pylint: disable=protected-access
+
+
+class TestSassCache(AbstractTestWithRtTmp):
+    def make_builder(self) -> WebBuilder:
+        config = Config(
+            paths=Config_Paths(root=RelativePath('src')),
+            web=Config_Web(theme=Config_Theme(path=AbsolutePath(files('sobiraka')) / 'files' / 'themes' / 'raw')),
+        )
+        return WebBuilder(FakeProject({'src': FakeDocument(config, {'index.md': ''})}), RT.TMP / 'output')
+
+    async def test_compiled_once(self):
+        calls: list[str] = []
+
+        async def compile_func() -> bytes:
+            calls.append('compile')
+            await sleep(0)
+            return b'.a{}'
+
+        builder = self.make_builder()
+        results = await gather(*(builder._compile_sass_once('key', compile_func) for _ in range(5)))
+        self.assertEqual([b'.a{}'] * 5, results)
+        self.assertEqual(['compile'], calls)
+
+        # The next build gets the result from the persistent cache
+        self.assertEqual(b'.a{}', await self.make_builder()._compile_sass_once('key', compile_func))
+        self.assertEqual(['compile'], calls)
+
+    def test_imports(self):
+        root = RT.TMP / 'styles'
+        (root / 'parts' / 'colors').mkdir(parents=True)
+        (root / 'main.scss').write_text('@use "sass:math";\n@import "parts/base", "parts/colors";\n')
+        (root / 'parts' / '_base.scss').write_text('@use "../vars" as v;')
+        (root / 'parts' / 'colors' / '_index.scss').write_text('')
+        (root / '_vars.scss').write_text('')
+        (root / 'unused.scss').write_text('')
+
+        expected = [root / '_vars.scss', root / 'main.scss', root / 'parts' / '_base.scss',
+                    root / 'parts' / 'colors' / '_index.scss']
+        self.assertEqual(expected, _sass_imports(root / 'main.scss'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+from textwrap import dedent
+from unittest import main
+
+from typing_extensions import override
+
+from abstracttests.projecttestcase import FailingProjectTestCase, ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.processing.abstract.waiter import IssuesOccurred, NoSourceCreatedForPath
+from sobiraka.utils import RelativePath
+
+
+class TestWaiterManyPages(ProjectTestCase):
+    REQUIRE = Status.LOAD
+
+    @override
+    def _init_project(self) -> Project:
+        return FakeProject({
+            'src': FakeDocument({
+                f'section-{i}': {f'page-{j}.md': f'# Page {i}.{j}' for j in range(20)}
+                for i in range(20)
+            }),
+        })
+
+    def test_all_pages_loaded(self):
+        pages = tuple(self.project.get_document().root.all_pages())
+        self.assertEqual(20 * 20 + 20 + 1, len(pages))
+        self.assertTrue(all(page.status is Status.LOAD for page in pages))
+
+    def test_nothing_left(self):
+        waiter = self.builder.waiter
+        self.assertEqual(set(), waiter.unloaded_sources)
+        self.assertEqual(set(), waiter.unfinished_pages)
+        self.assertEqual(set(), waiter.unfinished_tasks)
+        self.assertEqual(set(), waiter.failed)
+
+
+class TestWaiterFailures(FailingProjectTestCase):
+    REQUIRE = Status.LOAD
+    EXPECTED_EXCEPTION_TYPES = {IssuesOccurred}
+
+    @override
+    def _init_project(self) -> Project:
+        return FakeProject({
+            'src': FakeDocument({
+                'a': {
+                    '_nav.yaml': dedent('''
+                        items:
+                          - missing.md
+                    ''').strip(),
+                    'index.md': '# A',
+                },
+                'b': {
+                    '_nav.yaml': dedent('''
+                        items:
+                          - missing.md
+                    ''').strip(),
+                    'index.md': '# B',
+                },
+            }),
+        })
+
+    def test_exceptions_sorted_by_path(self):
+        paths: list[RelativePath] = []
+        for exc in self.exceptions.exceptions:
+            assert isinstance(exc, IssuesOccurred)
+            paths.append(exc.path)
+        self.assertEqual([RelativePath('src/a'), RelativePath('src/b')], paths)
+
+
+class TestWaiterMissingPath(ProjectTestCase):
+    REQUIRE = Status.LOAD
+
+    @override
+    def _init_project(self) -> Project:
+        return FakeProject({
+            'src': FakeDocument({
+                'page.md': '# Page',
+            }),
+        })
+
+    async def test_wait_for_missing_path(self):
+        with self.assertRaises(NoSourceCreatedForPath):
+            await self.builder.waiter.wait(RelativePath('src/missing.md'), Status.LOAD)
+
+
+del ProjectTestCase, FailingProjectTestCase
+
+if __name__ == '__main__':
+    main()
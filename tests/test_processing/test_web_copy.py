@@ -0,0 +1,47 @@
+import unittest
+from asyncio import gather
+from tempfile import TemporaryDirectory
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.processing.web import WebBuilder
+from sobiraka.runtime import RT
+from sobiraka.utils import AbsolutePath, RelativePath
+
+
+class TestWebCopy(ProjectTestCase[WebBuilder], AbstractTestWithRtTmp):
+    REQUIRE = Status.LOAD
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.sources = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        (self.sources / 'one.css').write_text('one')
+        (self.sources / 'two.css').write_text('two')
+
+    def _init_project(self) -> Project:
+        return FakeProject({'src': FakeDocument({'index.md': ''})})
+
+    def _init_builder(self):
+        return WebBuilder(self.project, RT.TMP / 'output')
+
+    async def test_same_source(self):
+        target = RelativePath('_static/style.css')
+        await gather(*(self.builder.add_file_from_location(self.sources / 'one.css', target) for _ in range(3)))
+        self.assertEqual(1, len(self.builder._copy_tasks))  # pylint: disable=protected-access
+        self.assertEqual('one', (self.builder.output / target).read_text())
+
+    async def test_different_sources(self):
+        target = RelativePath('_static/style.css')
+        await gather(self.builder.add_file_from_location(self.sources / 'one.css', target),
+                     self.builder.add_file_from_location(self.sources / 'two.css', target))
+        self.assertEqual(2, len(self.builder._copy_tasks))  # pylint: disable=protected-access
+        self.assertEqual('two', (self.builder.output / target).read_text())
+
+
+del ProjectTestCase, AbstractTestWithRtTmp
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from textwrap import dedent
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.models.config import Config, Config_Paths, Config_Theme, Config_Web
+from sobiraka.processing.web import WebBuilder
+from sobiraka.runtime import RT
+from sobiraka.utils import Location, RelativePath
+
+
+class TestWebNavFragments(ProjectTestCase[WebBuilder], AbstractTestWithRtTmp):
+    REQUIRE = Status.LOAD
+
+    def _init_project(self) -> Project:
+        config = Config(
+            paths=Config_Paths(root=RelativePath('src')),
+            web=Config_Web(theme=Config_Theme.from_name('sobiraka2025')),
+        )
+        return FakeProject({
+            'src': FakeDocument(config, {
+                'index.md': '',
+                'aaa': {'index.md': '', 'one.md': '', 'two.md': ''},
+                'bbb': {'index.md': '', 'three.md': ''},
+            }),
+        })
+
+    def _init_builder(self):
+        return WebBuilder(self.project, RT.TMP)
+
+    async def render(self, location: str) -> str:
+        page = self.project.get_document().get_page_by_location(Location(location))
+        html = await self.builder.nav_fragments.render('nav.html', page)
+        return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+    async def test_rendered_once_per_depth(self):
+        for location in ('/', '/aaa/', '/aaa/one', '/aaa/two', '/bbb/', '/bbb/three'):
+            await self.render(location)
+        self.assertEqual(2, len(self.builder.nav_fragments._fragments))  # pylint: disable=protected-access
+
+    async def test_patched(self):
+        expected = dedent('''
+            <nav>
+            <ul>
+            <li>
+            <a class='selected' href='index.html'>aaa</a>
+            <ul>
+            <li>
+            <a class='current' href=''>one</a>
+            </li>
+            <li>
+            <a href='two.html'>two</a>
+            </li>
+            </ul>
+            </li>
+            <li>
+            <a href='../bbb/index.html'>bbb</a>
+            <ul>
+            <li>
+            <a href='../bbb/three.html'>three</a>
+            </li>
+            </ul>
+            </li>
+            </ul>
+            </nav>
+        ''').strip()
+        # The fragment is rendered for the first page, but then reused for another one
+        await self.render('/bbb/three')
+        self.assertEqual(expected, await self.render('/aaa/one'))
+
+    async def test_urls_relative_to_each_page(self):
+        await self.render('/aaa/one')
+        html = await self.render('/aaa/')
+        self.assertIn("<a class='current' href=''>aaa</a>", html)
+        self.assertIn("<a href='one.html'>one</a>", html)
+        self.assertIn("<a href='../bbb/index.html'>bbb</a>", html)
+
+        html = await self.render('/')
+        self.assertIn("<a href='aaa/index.html'>aaa</a>", html)
+        self.assertIn("<a href='bbb/three.html'>three</a>", html)
+
+
+del ProjectTestCase, AbstractTestWithRtTmp
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+from tempfile import TemporaryDirectory
+from typing import Iterable
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+from unittest.mock import patch
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.__main__ import async_main
+from sobiraka.models import Project, Status
+from sobiraka.models.config import Config, Config_Paths
+from sobiraka.processing.web import IncompleteShards, OutputManifest, Shard, ShardManifest, WebBuilder, merge_shards
+from sobiraka.processing.web.search import PagefindIndexer
+from sobiraka.processing.web.shards import SearchRecords
+from sobiraka.runtime import RT
+from sobiraka.utils import AbsolutePath, RelativePath
+
+
+class TestShard(TestCase):
+    def test_parse(self):
+        self.assertEqual(Shard(2, 3), Shard.parse('2/3'))
+        self.assertEqual('2/3', str(Shard.parse('2/3')))
+        self.assertEqual('2-of-3', Shard.parse('2/3').dirname)
+
+    def test_parse_invalid(self):
+        for text in ('', '2', '0/3', '4/3', '1/0', 'a/b'):
+            with self.subTest(text):
+                with self.assertRaises(ValueError):
+                    Shard.parse(text)
+
+
+class TestWebShards(ProjectTestCase[WebBuilder], AbstractTestWithRtTmp):
+    REQUIRE = Status.LOAD
+
+    def _init_project(self) -> Project:
+        return FakeProject({
+            name: FakeDocument(Config(paths=Config_Paths(root=RelativePath(name))), {'index.md': f'# {name}'})
+            for name in ('ccc', 'aaa', 'ddd', 'bbb', 'eee')
+        })
+
+    def _init_builder(self):
+        return WebBuilder(self.project, RT.TMP, shard=Shard(2, 2))
+
+    def test_documents_are_distributed_by_autoprefix(self):
+        shards = [tuple(d.autoprefix for d in Shard(i, 2).select(self.project.documents)) for i in (1, 2)]
+        self.assertEqual([('aaa', 'ccc', 'eee'), ('bbb', 'ddd')], shards)
+
+    def test_other_documents_are_only_loaded(self):
+        self.assertEqual(('bbb', 'ddd'), tuple(d.autoprefix for d in self.builder.get_built_documents()))
+        self.assertEqual({'aaa': Status.LOAD, 'ccc': Status.LOAD, 'eee': Status.LOAD},
+                         {d.autoprefix: s for d, s in self.builder.waiter.target_statuses.items()})
+
+
+class TestMergeShards(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.output = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+
+    def make_shard(self, shard: str, *files: str, **kwargs):
+        path = ShardManifest.path(self.output, Shard.parse(shard))
+        output_manifest = OutputManifest(self.output, path.parent / OutputManifest.FILENAME)
+        for file in files:
+            output_manifest.write_bytes(self.output / file, file.encode())
+        output_manifest.save()
+        ShardManifest(shard, files=list(files), **kwargs).save(path)
+
+    async def test_merge(self):
+        self.make_shard('1/2', 'aaa/index.html', '_static/style.css')
+        self.make_shard('2/2', 'bbb/index.html', '_static/style.css')
+        (self.output / 'old').mkdir()
+        (self.output / 'old' / 'index.html').write_text('old')
+
+        await merge_shards(self.output)
+
+        self.assertEqual(['.sobiraka-output.json', '_static', '_static/style.css',
+                          'aaa', 'aaa/index.html', 'bbb', 'bbb/index.html'],
+                         sorted(str(f.relative_to(self.output)) for f in self.output.walk_all()))
+
+    async def test_merge_precompressed_search(self):
+        async def fake_merge(index_path: AbsolutePath, records_paths: Iterable[AbsolutePath]):
+            index_path.mkdir(parents=True)
+            (index_path / 'pagefind-entry.json').write_text(str(len(list(records_paths))))
+
+        search = [SearchRecords(engine='pagefind', index_path='_pagefind', records='_shards/records.json')]
+        self.make_shard('1/2', 'aaa/index.html', search=search, precompress=True)
+        self.make_shard('2/2', 'bbb/index.html', search=search)
+
+        with patch.object(PagefindIndexer, 'merge', fake_merge):
+            await merge_shards(self.output)
+
+        self.assertEqual(['.sobiraka-output.json', '_pagefind',
+                          '_pagefind/pagefind-entry.json',
+                          '_pagefind/pagefind-entry.json.br',
+                          '_pagefind/pagefind-entry.json.gz',
+                          'aaa', 'aaa/index.html', 'bbb', 'bbb/index.html'],
+                         sorted(str(f.relative_to(self.output)) for f in self.output.walk_all()))
+
+    async def test_command(self):
+        self.make_shard('1/1', 'aaa/index.html')
+        argv = ['sobiraka', '--tmpdir', str(self.output / '_tmp'), '--pandoc-workers', '0',
+                'merge', '--output', str(self.output)]
+        with patch.object(sys, 'argv', argv), patch.object(RT, 'TMP'), patch.object(RT, 'PANDOC'), \
+                self.assertRaises(SystemExit) as cm:
+            await async_main()
+        self.assertEqual(0, cm.exception.code)
+        self.assertTrue((self.output / 'aaa' / 'index.html').exists())
+        self.assertFalse((self.output / '_shards').exists())
+
+    async def test_missing_shard(self):
+        self.make_shard('1/3', 'aaa/index.html')
+        self.make_shard('3/3', 'ccc/index.html')
+        with self.assertRaisesRegex(IncompleteShards, 'found: 1/3, 3/3'):
+            await merge_shards(self.output)
+        self.assertTrue((self.output / 'aaa' / 'index.html').exists())
+
+
+del ProjectTestCase
+
+if __name__ == '__main__':
+    main()
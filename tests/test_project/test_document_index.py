@@ -0,0 +1,67 @@
+from unittest import main
+
+from typing_extensions import override
+
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.models.config import Config, Config_Paths
+from sobiraka.utils import RelativePath
+
+
+class TestDocumentIndex(ProjectTestCase):
+    REQUIRE = Status.LOAD
+
+    @override
+    def _init_project(self) -> Project:
+        project = FakeProject({
+            'src-en': FakeDocument(Config(paths=Config_Paths(root=RelativePath('src-en'))), {
+                'index.md': '# Home',
+                'aaa.md': '# AAA',
+                'section': {
+                    'index.md': '# Section',
+                    'bbb.md': '# BBB',
+                },
+            }),
+            'src-ru': FakeDocument(Config(paths=Config_Paths(root=RelativePath('src-ru'))), {
+                'index.md': '# Главная',
+                'aaa.md': '# AAA',
+            }),
+        })
+        project.documents[0].lang, project.documents[0].codename = 'en', None
+        project.documents[1].lang, project.documents[1].codename = 'ru', None
+        project.primary_language = 'en'
+        return project
+
+    def test_all_pages(self):
+        for document in self.project.documents:
+            with self.subTest(document):
+                self.assertEqual(document.root.all_pages(), document.all_pages())
+
+    def test_index_is_stored(self):
+        document = self.project.documents[0]
+        self.assertTrue(document.index.complete)
+        self.assertIs(document.index, document.index)
+
+    def test_get_page_by_location(self):
+        document = self.project.documents[0]
+        for page in document.all_pages():
+            with self.subTest(page):
+                self.assertIs(page, document.get_page_by_location(page.location))
+        with self.assertRaises(KeyError):
+            document.get_page_by_location('/missing')
+
+    def test_translations(self):
+        en, ru = self.project.documents
+        aaa_en = en.get_page_by_location('/aaa')
+        aaa_ru = ru.get_page_by_location('/aaa')
+        self.assertIs(aaa_ru, self.project.get_translation(aaa_en, 'ru'))
+        self.assertEqual((aaa_en, aaa_ru), self.project.get_all_translations(aaa_en))
+        self.assertEqual((en.get_page_by_location('/section/bbb'),),
+                         self.project.get_all_translations(en.get_page_by_location('/section/bbb')))
+
+
+del ProjectTestCase
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ from unittest import TestCase, main
 from unittest.mock import Mock
 
 from sobiraka.models import Document, FileSystem
-from sobiraka.models.load import load_project_from_str
+from sobiraka.models.load import JobsInsideDocument, load_project_from_str
 from sobiraka.utils import RelativePath
 
 
@@ -442,6 +442,32 @@ class TestManifest_2L_2V_AllDefaults(TestManifest_2L_2V):
     '''
 
 
+class TestManifest_Jobs(TestCase):
+    def test_single_document(self):
+        project = load_project_from_str('''
+            title: Documentation
+            jobs: 3
+        ''', fs=Mock(FileSystem))
+        self.assertEqual(3, project.jobs)
+
+    def test_top_level(self):
+        project = load_project_from_str('''
+            jobs: 3
+            languages:
+              en: {title: Documentation}
+              ru: {title: Документация}
+        ''', fs=Mock(FileSystem))
+        self.assertEqual(3, project.jobs)
+
+    def test_inside_document(self):
+        with self.assertRaises(JobsInsideDocument):
+            load_project_from_str('''
+                languages:
+                  en: {title: Documentation, jobs: 3}
+                  ru: {title: Документация}
+            ''', fs=Mock(FileSystem))
+
+
 del _TestManifest
 
 if __name__ == '__main__':
@@ -0,0 +1,55 @@
+from asyncio import gather
+from io import BytesIO
+from unittest import main
+
+import PIL.Image
+
+from abstracttests.abstracttestwithrt import AbstractTestWithRtTmp
+from helpers.fakefilesystem import FakeFileSystem
+from sobiraka.models import RealFileSystem
+from sobiraka.runtime import ImageInfo, Images, RT
+from sobiraka.utils import RelativePath
+
+
+def make_png(width: int, height: int) -> bytes:
+    data = BytesIO()
+    PIL.Image.new('RGBA', (width, height)).save(data, format='PNG')
+    return data.getvalue()
+
+
+class TestImages(AbstractTestWithRtTmp):
+    async def test_info(self):
+        fs = FakeFileSystem({'image.png': make_png(40, 30)})
+        info = await Images(RT).get_info(fs, RelativePath('image.png'))
+        self.assertEqual(ImageInfo(width=40, height=30, format='PNG', mode='RGBA'), info)
+        self.assertAlmostEqual(4 / 3, info.ratio)
+
+    async def test_read_once(self):
+        fs = FakeFileSystem({'image.png': make_png(40, 30)})
+        images = Images(RT)
+        await gather(*(images.get_info(fs, RelativePath('image.png')) for _ in range(10)))
+        self.assertEqual(1, len(images._tasks))  # pylint: disable=protected-access
+
+    async def test_persistent_cache(self):
+        project_dir = RT.TMP / 'project'
+        project_dir.mkdir()
+        (project_dir / 'image.png').write_bytes(make_png(40, 30))
+        fs = RealFileSystem(project_dir)
+
+        info = await Images(RT).get_info(fs, RelativePath('image.png'))
+        self.assertEqual((40, 30), (info.width, info.height))
+
+        # Another build gets the info from the persistent cache
+        self.assertEqual(1, len(RT.cache('images')))
+        info = await Images(RT).get_info(fs, RelativePath('image.png'))
+        self.assertEqual((40, 30), (info.width, info.height))
+
+        # The file is read again after it changes
+        (project_dir / 'image.png').write_bytes(make_png(20, 20))
+        info = await Images(RT).get_info(fs, RelativePath('image.png'))
+        self.assertEqual((20, 20), (info.width, info.height))
+        self.assertEqual(2, len(RT.cache('images')))
+
+
+if __name__ == '__main__':
+    main()
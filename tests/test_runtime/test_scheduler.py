@@ -0,0 +1,123 @@
+from asyncio import Event, create_task, gather, sleep
+from unittest import IsolatedAsyncioTestCase, main
+
+from sobiraka.runtime import Scheduler
+
+
+class TestScheduler(IsolatedAsyncioTestCase):
+    async def test_limit(self):
+        scheduler = Scheduler(2)
+        running = 0
+        max_running = 0
+
+        async def job():
+            nonlocal running, max_running
+            async with scheduler.slot():
+                running += 1
+                max_running = max(max_running, running)
+                await sleep(0.01)
+                running -= 1
+
+        await gather(*(job() for _ in range(10)))
+        self.assertEqual(2, max_running)
+        self.assertEqual(0, scheduler.running)
+
+    async def test_fifo(self):
+        scheduler = Scheduler(1)
+        order: list[str] = []
+        release = Event()
+
+        async def job(key: str):
+            async with scheduler.slot(key):
+                order.append(key)
+                await release.wait()
+
+        tasks = []
+        for key in 'ABCD':
+            tasks.append(create_task(job(key)))
+            await sleep(0)
+        release.set()
+        await gather(*tasks)
+        self.assertEqual(list('ABCD'), order)
+
+    async def test_prioritize(self):
+        scheduler = Scheduler(1)
+        order: list[str] = []
+        release = Event()
+
+        async def job(key: str):
+            async with scheduler.slot(key):
+                order.append(key)
+                await release.wait()
+
+        tasks = []
+        for key in 'ABCD':
+            tasks.append(create_task(job(key)))
+            await sleep(0)
+        scheduler.prioritize('D')
+        release.set()
+        await gather(*tasks)
+        self.assertEqual(list('ADBC'), order)
+
+    async def test_prioritize_once(self):
+        scheduler = Scheduler(1)
+        order: list[str] = []
+        release = Event()
+
+        async def job(key: str):
+            async with scheduler.slot(key):
+                order.append(key)
+                await release.wait()
+
+        scheduler.prioritize('D')
+        tasks = []
+        for key in 'ABCD':
+            tasks.append(create_task(job(key)))
+            await sleep(0)
+        release.set()
+        await gather(*tasks)
+        self.assertEqual(list('ADBC'), order)
+        self.assertEqual(set(), scheduler._urgent)  # pylint: disable=protected-access
+
+        # The key is no longer prioritized after its operation has been given a slot
+        release.clear()
+        order.clear()
+        tasks = []
+        for key in 'ABCD':
+            tasks.append(create_task(job(key)))
+            await sleep(0)
+        release.set()
+        await gather(*tasks)
+        self.assertEqual(list('ABCD'), order)
+        self.assertEqual(0, scheduler.waiting)
+
+    async def test_cancel_waiting(self):
+        scheduler = Scheduler(1)
+        release = Event()
+
+        async def job():
+            async with scheduler.slot():
+                await release.wait()
+
+        first = create_task(job())
+        second = create_task(job())
+        await sleep(0)
+        second.cancel()
+        await sleep(0)
+        release.set()
+        await first
+        self.assertTrue(second.cancelled())
+        self.assertEqual(0, scheduler.running)
+
+
+    async def test_run_in_process(self):
+        scheduler = Scheduler(2)
+        try:
+            results = await gather(*(scheduler.run_in_process(pow, 2, n) for n in range(5)))
+            self.assertEqual([1, 2, 4, 8, 16], results)
+        finally:
+            await scheduler.shutdown()
+
+
+if __name__ == '__main__':
+    main()
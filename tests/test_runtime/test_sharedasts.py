@@ -0,0 +1,57 @@
+from asyncio import gather, sleep
+from unittest import IsolatedAsyncioTestCase, main
+
+from sobiraka.runtime import SharedAsts
+
+
+class TestSharedAsts(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.parsed: list[str] = []
+
+    def parser(self, text: str):
+        async def parse() -> bytes:
+            self.parsed.append(text)
+            await sleep(0.01)
+            return text.encode('utf-8')
+        return parse
+
+    async def test_parsed_once_for_all_consumers(self):
+        shared = SharedAsts('xyz')
+        results = await gather(shared.get('a', self.parser('A'), consumer='x'),
+                               shared.get('a', self.parser('A'), consumer='y'),
+                               shared.get('b', self.parser('B'), consumer='x'),
+                               shared.get('a', self.parser('A'), consumer='z'))
+        self.assertEqual([b'A', b'A', b'B', b'A'], results)
+        self.assertEqual(['A', 'B'], self.parsed)
+
+    async def test_forgotten_after_all_consumers(self):
+        shared = SharedAsts('xy')
+        await shared.get('a', self.parser('A'), consumer='x')
+        await shared.get('a', self.parser('A'), consumer='y')
+        await shared.get('a', self.parser('A'), consumer='x')
+        self.assertEqual(['A', 'A'], self.parsed)
+
+    async def test_same_text_twice_in_one_consumer(self):
+        # E.g., two empty pages in one format
+        shared = SharedAsts('xy')
+        await shared.get('a', self.parser('A'), consumer='x')
+        await shared.get('a', self.parser('A'), consumer='x')
+        await shared.get('a', self.parser('A'), consumer='y')
+        self.assertEqual(['A'], self.parsed)
+        self.assertEqual('<SharedAsts: 0 ASTs>', repr(shared))
+
+    async def test_forgotten_after_other_consumers_finished(self):
+        shared = SharedAsts('xy')
+        await shared.get('a', self.parser('A'), consumer='x')
+        await shared.get('b', self.parser('B'), consumer='y')
+        self.assertEqual('<SharedAsts: 2 ASTs>', repr(shared))
+
+        # Nobody else will take 'a'
+        shared.finished('y')
+        self.assertEqual('<SharedAsts: 1 ASTs>', repr(shared))
+        shared.finished('x')
+        self.assertEqual('<SharedAsts: 0 ASTs>', repr(shared))
+
+
+if __name__ == '__main__':
+    main()
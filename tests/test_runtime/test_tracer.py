@@ -0,0 +1,77 @@
+import json
+from asyncio import gather, sleep
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+from sobiraka.runtime import Tracer
+from sobiraka.utils import AbsolutePath
+
+
+class TestTracer(IsolatedAsyncioTestCase):
+    async def test_disabled(self):
+        tracer = Tracer()
+        with tracer.span('something', 'test'):
+            pass
+        self.assertEqual([], tracer.events)
+
+    async def test_nested_spans_inherit_arguments(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span('outer', 'test', path='src/page.md', document='en'):
+            with tracer.span('inner', 'test', format='json'):
+                await sleep(0)
+
+        self.assertEqual(2, len(tracer.events))
+        inner, outer = tracer.events[0], tracer.events[1]
+        self.assertEqual('inner', inner['name'])
+        self.assertEqual(dict(path='src/page.md', document='en', format='json'), inner['args'])
+        self.assertEqual(outer['tid'], inner['tid'])
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertLessEqual(inner['ts'] + inner['dur'], outer['ts'] + outer['dur'])
+
+    async def test_concurrent_tasks_use_different_lanes(self):
+        tracer = Tracer()
+        tracer.start()
+
+        async def job(name: str):
+            with tracer.span(name, 'test'):
+                await sleep(0.01)
+
+        await gather(job('a'), job('b'), job('c'))
+        self.assertEqual({1, 2, 3}, {event['tid'] for event in tracer.events})
+
+        # The lanes are reused after the tasks finish
+        await gather(job('d'), job('e'))
+        self.assertEqual({1, 2}, {event['tid'] for event in tracer.events[3:]})
+
+    async def test_save(self):
+        tracer = Tracer()
+        tracer.start()
+        with tracer.span('something', 'test'):
+            pass
+
+        with TemporaryDirectory(prefix='sobiraka-test-') as temp_dir:
+            path = AbsolutePath(temp_dir) / 'trace.json'
+            tracer.save(path)
+            data = json.loads(path.read_text())
+
+        events = [e for e in data['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual(['something'], [e['name'] for e in events])
+
+    async def test_save_events_from_other_process(self):
+        tracer = Tracer()
+        tracer.start()
+        tracer.add_events([dict(ph='X', name='remote', cat='test', ts=0, dur=1, pid=-1, tid=3, args={})])
+
+        with TemporaryDirectory(prefix='sobiraka-test-') as temp_dir:
+            path = AbsolutePath(temp_dir) / 'trace.json'
+            tracer.save(path)
+            data = json.loads(path.read_text())
+
+        metadata = {(e['pid'], e['tid'], e['name']) for e in data['traceEvents'] if e['ph'] == 'M'}
+        self.assertIn((-1, 0, 'process_name'), metadata)
+        self.assertIn((-1, 3, 'thread_name'), metadata)
+
+
+if __name__ == '__main__':
+    main()
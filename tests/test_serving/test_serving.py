@@ -0,0 +1,81 @@
+from asyncio import open_connection
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, TestCase, main
+
+from sobiraka.serving import PreviewServer, Watcher
+from sobiraka.serving.server import LIVE_RELOAD_SCRIPT
+from sobiraka.utils import AbsolutePath
+
+
+class TestWatcher(TestCase):
+    def setUp(self):
+        super().setUp()
+        # pylint: disable=consider-using-with
+        self.root = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        (self.root / 'src').mkdir()
+        (self.root / 'src' / 'page.md').write_text('# Page')
+        (self.root / 'build').mkdir()
+        (self.root / 'build' / 'page.html').write_text('<h1>Page</h1>')
+        (self.root / '.git').mkdir()
+        (self.root / '.git' / 'HEAD').write_text('ref')
+
+    def test_snapshot(self):
+        watcher = Watcher([self.root], ignore=[self.root / 'build'])
+        self.assertEqual({self.root / 'src' / 'page.md'}, set(watcher.snapshot()))
+
+    def test_snapshot_detects_changes(self):
+        watcher = Watcher([self.root])
+        before = watcher.snapshot()
+        (self.root / 'src' / 'page.md').write_text('# Page, but longer')
+        self.assertNotEqual(before, watcher.snapshot())
+
+
+class TestPreviewServer(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # pylint: disable=consider-using-with
+        self.root = AbsolutePath(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        (self.root / 'index.html').write_text('<html><body><h1>Hello</h1></body></html>')
+        (self.root / 'section').mkdir()
+        (self.root / 'section' / 'index.html').write_text('<h1>Section</h1>')
+        (self.root / 'style.css').write_text('h1 { color: red; }')
+
+        self.server = PreviewServer(self.root, '127.0.0.1', 0)
+        await self.server.start()
+        self.addAsyncCleanup(self.server.close)
+
+    async def get(self, path: str) -> tuple[str, bytes]:
+        # pylint: disable=protected-access
+        port = self.server._server.sockets[0].getsockname()[1]
+        reader, writer = await open_connection('127.0.0.1', port)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+        response = await reader.read()
+        writer.close()
+        head, body = response.split(b'\r\n\r\n', 1)
+        return head.decode().splitlines()[0], body
+
+    async def test_html_with_live_reload(self):
+        status, body = await self.get('/')
+        self.assertEqual('HTTP/1.1 200 OK', status)
+        self.assertEqual(f'<html><body><h1>Hello</h1>{LIVE_RELOAD_SCRIPT}</body></html>', body.decode())
+
+    async def test_static_file(self):
+        status, body = await self.get('/style.css')
+        self.assertEqual('HTTP/1.1 200 OK', status)
+        self.assertEqual(b'h1 { color: red; }', body)
+
+    async def test_redirect_to_directory(self):
+        status, _ = await self.get('/section')
+        self.assertEqual('HTTP/1.1 301 Moved Permanently', status)
+
+    async def test_not_found(self):
+        status, _ = await self.get('/missing.html')
+        self.assertEqual('HTTP/1.1 404 Not Found', status)
+
+    async def test_outside_root(self):
+        status, _ = await self.get('/../../etc/passwd')
+        self.assertEqual('HTTP/1.1 403 Forbidden', status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+
+from abstracttests.projecttestcase import ProjectTestCase
+from helpers.fakeproject import FakeDocument, FakeProject
+from sobiraka.models import Project, Status
+from sobiraka.processing.toc import Toc, TocItem, toc, toc_node
+from sobiraka.utils import Location
+
+
+class TestTocNode(ProjectTestCase):
+    REQUIRE = Status.LOAD
+
+    def _init_project(self) -> Project:
+        return FakeProject({
+            'src': FakeDocument({
+                'index.md': '',
+                'section': {'index.md': '', 'page.md': ''},
+                'other.md': '',
+            })
+        })
+
+    def test_node_is_reused(self):
+        document = self.project.get_document()
+        node = toc_node(document.root_page)
+        toc(document.root_page, builder=self.builder)
+        self.assertIs(node, toc_node(document.root_page))
+        self.assertIs(node.children[1], toc_node(document.get_page_by_location(Location('/section/'))))
+
+    def test_views(self):
+        document = self.project.get_document()
+        page = document.get_page_by_location(Location('/section/page'))
+        other = document.get_page_by_location(Location('/other'))
+
+        expected_from_page = Toc(
+            TocItem('other', '../other.md'),
+            TocItem('section', './', is_breadcrumb=True, children=Toc(
+                TocItem('page', '', is_current=True, is_breadcrumb=True),
+            )),
+        )
+        expected_from_other = Toc(
+            TocItem('other', '', is_current=True, is_breadcrumb=True),
+            TocItem('section', 'section/', children=Toc(
+                TocItem('page', 'section/page.md'),
+            )),
+        )
+
+        for current_page, expected in ((page, expected_from_page),
+                                       (other, expected_from_other),
+                                       (page, expected_from_page)):
+            with self.subTest(current_page):
+                actual = toc(document.root_page, builder=self.builder, current_page=current_page)
+                self.assertEqual(expected, actual)
+                self.assertEqual(str(expected), str(actual))
+
+    def test_urls_are_reused_within_url_base(self):
+        document = self.project.get_document()
+        page = document.get_page_by_location(Location('/section/page'))
+        section = document.get_page_by_location(Location('/section/'))
+
+        def get_url_base(page):
+            return str(page.location if page.location.is_dir else page.location.parent)
+
+        make_internal_url = self.builder.make_internal_url
+        with patch.object(self.builder, 'get_url_base', get_url_base), \
+                patch.object(self.builder, 'make_internal_url', wraps=make_internal_url) as mock:
+            toc(document.root_page, builder=self.builder, current_page=page)
+            self.assertEqual(3, mock.call_count)
+
+            # From the section index, 'other' is reused, while 'page' and 'section' are not (they are self-links)
+            mock.reset_mock()
+            actual = toc(document.root_page, builder=self.builder, current_page=section)
+            self.assertEqual(2, mock.call_count)
+
+        expected = Toc(
+            TocItem('other', '../other.md'),
+            TocItem('section', '', is_current=True, is_breadcrumb=True, children=Toc(
+                TocItem('page', 'page.md'),
+            )),
+        )
+        self.assertEqual(expected, actual)
+
+
+del ProjectTestCase
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+import jinja2
+from diskcache import Cache
+
+from sobiraka.utils import JinjaBytecodeCache, render_string_async
+
+
+class TestRenderStringAsync(IsolatedAsyncioTestCase):
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self.cache = Cache(self.enterContext(TemporaryDirectory(prefix='sobiraka-test-')))
+        self.addCleanup(self.cache.close)
+
+    def make_jinja(self) -> jinja2.Environment:
+        return jinja2.Environment(enable_async=True,
+                                  comment_start_string='{{#',
+                                  comment_end_string='#}}',
+                                  bytecode_cache=JinjaBytecodeCache(self.cache))
+
+    async def test_without_syntax(self):
+        jinja = self.make_jinja()
+        for text in ('', 'Hello', 'Hello\n', 'Hello\r\nworld\r\n\n', '{ # } %} #}}', 'Hello\r'):
+            with self.subTest(text):
+                with patch.object(jinja, 'compile') as compile_:
+                    actual = await render_string_async(jinja, text, {})
+                compile_.assert_not_called()
+                self.assertEqual(await jinja.from_string(text).render_async(), actual)
+
+    async def test_with_syntax(self):
+        data = {
+            'Hello, {{ name }}!': 'Hello, world!',
+            '{% if name %}yes{% endif %}\n': 'yes',
+            'Hello{{# comment #}}': 'Hello',
+        }
+        for text, expected in data.items():
+            with self.subTest(text):
+                self.assertEqual(expected, await render_string_async(self.make_jinja(), text, dict(name='world')))
+
+    async def test_bytecode_cache(self):
+        text = 'Hello, {{ name }}!'
+        await render_string_async(self.make_jinja(), text, dict(name='world'))
+
+        jinja = self.make_jinja()
+        with patch.object(jinja, 'compile') as compile_:
+            actual = await render_string_async(jinja, text, dict(name='cache'))
+        compile_.assert_not_called()
+        self.assertEqual('Hello, cache!', actual)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+from textwrap import dedent
+from unittest import TestCase, main
+
+from sobiraka.utils import minify_html
+
+
+class TestMinifyHtml(TestCase):
+    def test_whitespace(self):
+        html = '<p>Hello,   <b>world</b>!</p>\n\n  <p>\tBye.</p>'
+        self.assertEqual('<p>Hello, <b>world</b>!</p>\n<p> Bye.</p>', minify_html(html))
+
+    def test_comments(self):
+        html = '<p>Hello<!-- a comment -->!</p><!--[if IE]><p>IE</p><![endif]-->'
+        self.assertEqual('<p>Hello!</p><!--[if IE]><p>IE</p><![endif]-->', minify_html(html))
+
+    def test_preserved_elements(self):
+        html = dedent('''
+            <pre><code>if x:
+                print(x)  # <!-- not a comment --></code></pre>
+            <script>
+              let   x;
+            </script>
+            <TEXTAREA>  a  </TEXTAREA>
+        ''').strip()
+        self.assertEqual(html, minify_html(html))
+
+    def test_similar_custom_elements(self):
+        html = '<pre-view>  a  </pre-view>  <script-x>  b  </script-x>\n<pre>  c  </pre>'
+        self.assertEqual('<pre-view> a </pre-view> <script-x> b </script-x>\n<pre>  c  </pre>', minify_html(html))
+
+
+if __name__ == '__main__':
+    main()